@@ -0,0 +1,4 @@
+# Benchmarks are plain scripts, run e.g. as:
+#   python -m tirf_sim.benchmarks.bench_light_table_image
+# The full suite compares against stored baselines:
+#   python -m tirf_sim.benchmarks.suite [--save-baseline]
@@ -0,0 +1,82 @@
+# tirf_sim/benchmarks/bench_import.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from .common import print_row
+
+PACKAGE = __package__.rsplit('.', 1)[0]
+MODULES = ['', 'optical_components', 'microscope', 'sample', 'simulation', 'render', 'gui']
+IMPORT_BUDGET_MS = 50  # On top of NumPy, which every module needs
+# Loaded on first use only; none may appear after a plain import
+LAZY_MODULES = ['PyQt5', 'pyqtgraph', 'scipy', 'multiprocessing', 'concurrent.futures.process', 'cProfile',
+                'tempfile']
+
+CHECK = """
+import numpy
+import {module}
+import json, logging, sys
+print(json.dumps({{'loaded': [m for m in {lazy!r} if m in sys.modules],
+        'handlers': len(logging.getLogger('tirf_sim').handlers)}}))
+"""
+
+def measure_import(module):
+    """Import module in a fresh interpreter after NumPy.
+
+    Returns (ms, report): the cumulative -X importtime of module, and
+    which LAZY_MODULES were loaded and how many handlers the package
+    logger has.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [root, os.environ.get('PYTHONPATH')])))
+    code = CHECK.format(module=module, lazy=LAZY_MODULES)
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], env=env, capture_output=True,
+                            text=True, check=True)
+    # Lines are "import time: <self us> | <cumulative us> | <indented name>"
+    for line in result.stderr.splitlines():
+        fields = line.split('|')
+        if len(fields) == 3 and fields[2].strip() == module:
+            ms = int(fields[1]) / 1000
+            break
+    else:
+        raise ValueError(f"No import time reported for {module}")
+    return ms, json.loads(result.stdout)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Package import time in a fresh interpreter (python -X importtime)")
+    parser.add_argument('--repeats', type=int, default=10)
+    parser.add_argument('--budget', type=float, default=IMPORT_BUDGET_MS, help="ms per module on top of NumPy")
+    args = parser.parse_args(argv)
+
+    print(f"{'import':<24} {'median ms':>10} {'p95 ms':>10}")
+    ok = True
+    for name in MODULES:
+        module = '.'.join(filter(None, [PACKAGE, name]))
+        try:
+            measure_import(module)  # Warm up the bytecode cache
+        except subprocess.CalledProcessError as e:
+            print(f"{name or PACKAGE:<24} import failed: {e.stderr.strip().splitlines()[-1]}")
+            ok = False
+            continue
+        samples, report = [], None
+        for _ in range(args.repeats):
+            ms, report = measure_import(module)
+            samples.append(ms)
+        median_ms, p95_ms = float(np.median(samples)), float(np.percentile(samples, 95))
+        print_row(name or PACKAGE, median_ms, p95_ms, args.budget)
+        ok &= p95_ms <= args.budget
+        if report['loaded']:
+            print(f"  imports {', '.join(report['loaded'])} eagerly")
+            ok = False
+        if report['handlers']:
+            print("  installs a logging handler on import")
+            ok = False
+    return 0 if ok else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,34 @@
+# tirf_sim/benchmarks/bench_light_table_image.py
+
+import argparse
+import logging
+import sys
+
+from .common import FRAME_BUDGET_MS, time_call, print_row
+from ..simulation.light_table import LightTable
+from ..optical_components import Objective, Ray
+
+SIZES = [128, 256, 512, 1024, 2048]
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="LightTable.get_image size-scaling benchmark")
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.WARNING)
+
+    light_table = LightTable()
+    light_table.add_component(Objective(position=(0, 0, 0), orientation=(0, 0, 1),
+                                        magnification=60, numerical_aperture=1.49))
+    light_table.rays = [Ray(origin=(0, 0, 0), direction=(0.3, 0.2, 1), wavelength=488)]
+
+    print(f"{'size':<24} {'median ms':>10} {'p95 ms':>10}  (budget {FRAME_BUDGET_MS} ms)")
+    within_budget = True
+    for n in SIZES:
+        median_ms, p95_ms = time_call(lambda: light_table.get_image((n, n)), repeats=args.repeats)
+        print_row(f"{n}x{n}", median_ms, p95_ms, FRAME_BUDGET_MS)
+        within_budget &= p95_ms <= FRAME_BUDGET_MS
+    return 0 if within_budget else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
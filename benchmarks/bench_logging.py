@@ -0,0 +1,58 @@
+# tirf_sim/benchmarks/bench_logging.py
+
+import argparse
+import io
+import logging
+import sys
+
+import numpy as np
+
+from .common import time_call, print_row
+from ..logger import setup_logger, set_log_level
+from ..optical_components import Laser, Camera, Objective, RayBatch
+from ..simulation.light_table import LightTable
+
+def build_light_table():
+    light_table = LightTable()
+    laser = Laser(position=(100, 500, 0), orientation=(1, 0, 0), wavelength=488, power=100)
+    laser.set_angles(np.pi / 2, 0)  # Point the beam at the camera
+    light_table.add_component(laser)
+    light_table.add_component(Objective(position=(300, 500, 0), orientation=(1, 0, 0),
+                                        magnification=60, numerical_aperture=1.49))
+    light_table.add_component(Camera(position=(600, 500, 0), orientation=(-1, 0, 0)))
+    return light_table
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Per-frame cost of debug logging")
+    parser.add_argument('--rays', type=int, default=1000, help="single-ray camera intersections per frame")
+    parser.add_argument('--repeats', type=int, default=20)
+    args = parser.parse_args(argv)
+
+    light_table = build_light_table()
+    camera = light_table.components[-1]
+    rays = RayBatch(origins=(100, 500, 0), directions=np.tile([1.0, 0, 0], (args.rays, 1)),
+                    wavelengths=488, lengths=1500).to_rays()
+
+    def frame():
+        light_table.invalidate()
+        light_table.simulate_light_path()
+        for ray in rays:
+            camera.ray_intersection(ray)
+        light_table.get_image()
+
+    # Capture output in memory so console speed does not skew the result
+    handler = setup_logger().handlers[0]
+    stream = handler.setStream(io.StringIO())
+    try:
+        print(f"{'log level':<24} {'median ms':>10} {'p95 ms':>10}")
+        for level in ['DEBUG', 'INFO']:
+            set_log_level(level)
+            median_ms, p95_ms = time_call(frame, repeats=args.repeats)
+            print_row(level, median_ms, p95_ms)
+    finally:
+        handler.setStream(stream)
+        set_log_level(logging.INFO)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,44 @@
+# tirf_sim/benchmarks/bench_movie.py
+
+import argparse
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from .bench_sample import build_bench
+from ..sample import FluorophoreDynamics
+from ..simulation import render_movie
+
+def peak_rss_mb():
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time-lapse movie throughput benchmark")
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--emitters', type=int, default=100000)
+    parser.add_argument('--sensor-size', type=int, default=512)
+    parser.add_argument('--min-fps', type=float, default=5.0)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.WARNING)
+
+    microscope = build_bench(args.emitters, args.sensor_size)
+    dynamics = FluorophoreDynamics(diffusion=1e4)
+    with tempfile.TemporaryDirectory() as tmpdir:
+        rss_before = peak_rss_mb()
+        start = time.perf_counter()
+        path = render_movie(microscope, args.frames, os.path.join(tmpdir, 'movie'), dynamics, seed=0)
+        elapsed = time.perf_counter() - start
+        size_mb = os.path.getsize(path) / 2**20
+
+    fps = args.frames / elapsed
+    print(f"{args.frames} frames of {args.sensor_size}x{args.sensor_size}, {args.emitters} emitters")
+    print(f"{fps:.1f} frames/s ({size_mb:.0f} MB written, peak RSS +{peak_rss_mb() - rss_before:.0f} MB)")
+    return 0 if fps >= args.min_fps else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,50 @@
+# tirf_sim/benchmarks/bench_sample.py
+
+import argparse
+import logging
+import sys
+
+import numpy as np
+
+from .common import time_call, print_row
+from ..microscope import Microscope
+from ..optical_components import Laser, Objective, Camera
+from ..sample import FluorophoreSample
+
+EMITTER_COUNTS = [10**4, 10**5, 10**6]
+SAMPLE_BUDGET_MS = 1000  # One frame of a 10^6-emitter sample
+
+def build_bench(count, sensor_size=512):
+    microscope = Microscope()
+    microscope.add_component(Laser(position=(0, 0, 0), orientation=(0, 0, 1), wavelength=488, power=1))
+    microscope.add_component(Objective(position=(0, 0, 10), orientation=(0, 0, 1),
+                                       magnification=100, numerical_aperture=1.49))
+    microscope.add_component(Camera(position=(0, 0, 100), orientation=(0, 0, -1),
+                                    sensor_size=(sensor_size, sensor_size)))
+    # Fill the field of view (160 nm pixels)
+    extent = sensor_size * 160
+    microscope.set_sample(FluorophoreSample.random(count, extent=(extent, extent), depth=1000, seed=0))
+    return microscope
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microscope.render_sample emitter-scaling benchmark")
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.WARNING)
+
+    print(f"{'emitters':<24} {'median ms':>10} {'p95 ms':>10}  (budget {SAMPLE_BUDGET_MS} ms)")
+    within_budget = True
+    for count in EMITTER_COUNTS:
+        microscope = build_bench(count)
+        laser = microscope.get_component(Laser)
+        for mode, angle in [("TIRF", 70), ("Epifluorescence", 0)]:
+            microscope.set_mode(mode)
+            laser.set_angles(np.radians(angle), 0)
+            median_ms, p95_ms = time_call(microscope.render_sample, repeats=args.repeats, warmup=1)
+            print_row(f"{count} {mode}", median_ms, p95_ms, SAMPLE_BUDGET_MS)
+            within_budget &= p95_ms <= SAMPLE_BUDGET_MS
+    return 0 if within_budget else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
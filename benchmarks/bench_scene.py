@@ -0,0 +1,62 @@
+# tirf_sim/benchmarks/bench_scene.py
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+from .common import time_call, print_row
+from ..microscope import Microscope, save_scene, load_scene
+from ..optical_components import Laser, Mirror, Lens, Filter, Camera
+
+LOAD_BUDGET_MS = 25  # Loading a compiled 1000-component scene
+
+def build_bench(count, seed=0):
+    # A laser and camera with count - 2 components scattered between them
+    rng = np.random.default_rng(seed)
+    microscope = Microscope()
+    microscope.add_component(Laser(position=(0, 0, 0), orientation=(1, 0, 0), wavelength=488, power=100))
+    for i in range(count - 2):
+        position = rng.uniform(0, 1000, 3)
+        orientation = rng.normal(size=3)
+        kind = i % 3
+        if kind == 0:
+            microscope.add_component(Mirror(position, orientation, size=(20, 20, 1)))
+        elif kind == 1:
+            microscope.add_component(Lens(position, orientation, focal_length=50, diameter=25))
+        else:
+            microscope.add_component(Filter(position, orientation, pass_band=(400, 600)))
+    microscope.add_component(Camera(position=(1000, 0, 0), orientation=(-1, 0, 0)))
+    return microscope
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scene file load benchmark")
+    parser.add_argument('--components', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.WARNING)
+
+    microscope = build_bench(args.components)
+    print(f"{'load ' + str(args.components) + ' components':<24} {'median ms':>10} {'p95 ms':>10}")
+    within_budget = True
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for extension in ['json', 'toml', 'yaml']:
+            path = os.path.join(tmpdir, f"bench.{extension}")
+            try:
+                save_scene(microscope, path)
+            except ValueError as e:
+                print(f"{extension:<24} skipped: {e}")
+                continue
+            print_row(f"{extension} uncached", *time_call(lambda: load_scene(path, cache_dir=False),
+                                                          repeats=args.repeats, warmup=0))
+            median_ms, p95_ms = time_call(lambda: load_scene(path), repeats=args.repeats)
+            print_row(f"{extension} compiled", median_ms, p95_ms, LOAD_BUDGET_MS)
+            within_budget &= p95_ms <= LOAD_BUDGET_MS
+    return 0 if within_budget else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
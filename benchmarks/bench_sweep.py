@@ -0,0 +1,37 @@
+# tirf_sim/benchmarks/bench_sweep.py
+
+import argparse
+import logging
+import os
+import sys
+import time
+
+import numpy as np
+
+from ..microscope.scene import DEFAULT_SCENE
+from ..simulation.sweep import parameter_grid, run_sweep
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sweep throughput against worker count")
+    parser.add_argument('--configurations', type=int, default=256)
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.WARNING)
+    # Sweep across the critical-angle range with the beam on the camera
+    grid = parameter_grid(angle_x=list(np.linspace(60, 90, args.configurations)))
+
+    workers = 1
+    baseline = None
+    print(f"{'workers':<10} {'configs/s':>10} {'speedup':>8} {'task ms':>8}")
+    while workers <= args.max_workers:
+        start = time.perf_counter()
+        task_times = [result.elapsed for result in run_sweep(DEFAULT_SCENE, grid, workers=workers)]
+        rate = len(grid) / (time.perf_counter() - start)
+        baseline = baseline or rate
+        print(f"{workers:<10} {rate:>10.1f} {rate / baseline:>8.2f} {np.median(task_times) * 1000:>8.2f}")
+        workers *= 2
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
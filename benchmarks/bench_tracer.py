@@ -0,0 +1,58 @@
+# tirf_sim/benchmarks/bench_tracer.py
+
+import argparse
+import logging
+import sys
+
+import numpy as np
+
+from .common import time_call
+from ..microscope.tracer import SequentialTracer
+from ..optical_components import Filter, Mirror, RayBatch
+
+COMPONENT_COUNTS = [5, 20, 50, 200, 500]
+
+def build_bench(n, rng):
+    # Filters and mirrors scattered over a 1000 x 1000 optical table
+    components = []
+    for i in range(n):
+        position = (rng.uniform(0, 1000), rng.uniform(0, 1000), 0)
+        orientation = rng.normal(size=3)
+        if i % 2:
+            components.append(Mirror(position=position, orientation=orientation, size=(40, 40)))
+        else:
+            components.append(Filter(position=position, orientation=orientation, pass_band=(400, 700)))
+    return components
+
+def build_beam(n_rays, rng):
+    # A slightly diverging beam launched across the table
+    directions = np.column_stack([np.ones(n_rays), rng.normal(0, 0.02, n_rays), rng.normal(0, 0.002, n_rays)])
+    return RayBatch(origins=(0, 500, 0), directions=directions, wavelengths=488, lengths=2000)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tracer cost against component count")
+    parser.add_argument('--rays', type=int, default=1000)
+    parser.add_argument('--repeats', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.ERROR)
+    rng = np.random.default_rng(0)
+    batch = build_beam(args.rays, rng)
+
+    print(f"{'components':<12} {'bvh ms':>10} {'linear ms':>10} {'speedup':>8}")
+    for n in COMPONENT_COUNTS:
+        components = build_bench(n, rng)
+        timings = []
+        for use_bvh in [True, False]:
+            tracer = SequentialTracer(max_depth=8, use_bvh=use_bvh)
+
+            def trace():
+                # Drop the previous results, or every call after the first is a cache hit
+                tracer.clear(components)
+                tracer.trace(components, batch)
+            timings.append(time_call(trace, repeats=args.repeats)[0])
+        print(f"{n:<12} {timings[0]:>10.2f} {timings[1]:>10.2f} {timings[1] / timings[0]:>8.2f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
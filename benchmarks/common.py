@@ -0,0 +1,23 @@
+# tirf_sim/benchmarks/common.py
+
+import time
+import numpy as np
+
+FRAME_BUDGET_MS = 50  # GUI timer interval in MainWindow
+
+def time_call(func, repeats=20, warmup=2):
+    """Time func() and return (median, p95) in milliseconds."""
+    for _ in range(warmup):
+        func()
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples)), float(np.percentile(samples, 95))
+
+def print_row(label, median_ms, p95_ms, budget_ms=None):
+    status = ''
+    if budget_ms is not None:
+        status = 'ok' if p95_ms <= budget_ms else 'OVER BUDGET'
+    print(f"{label:<24} {median_ms:>10.3f} {p95_ms:>10.3f}  {status}")
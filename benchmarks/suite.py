@@ -0,0 +1,256 @@
+# tirf_sim/benchmarks/suite.py
+"""Benchmark suite with stored baselines.
+
+Times the tracing, rendering, GUI update and sweep hot paths over ray
+count, component count and sensor size, and compares each median with
+benchmarks/baseline.json:
+
+    python -m tirf_sim.benchmarks.suite                  # report against the baseline
+    python -m tirf_sim.benchmarks.suite --save-baseline  # record a new baseline
+    python -m tirf_sim.benchmarks.suite --filter camera --threshold 1.5
+
+Exits with 1 if any case is slower than threshold x its baseline. Runs
+headless; the LightTableView case uses Qt's offscreen platform and is
+skipped without PyQt5 and pyqtgraph.
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .bench_tracer import build_bench, build_beam
+from ..microscope import Microscope
+from ..microscope.scene import DEFAULT_SCENE
+from ..optical_components import Laser, Camera, Filter, Objective, Ray, RayBatch, TransmissionCurve
+from ..simulation.light_table import LightTable
+from ..simulation.sweep import parameter_grid, run_sweep
+from ..simulation.monte_carlo import simulate_photons
+from ..sample.tirf import get_tirf_table
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+DEFAULT_THRESHOLD = 1.25  # Slower than 1.25x the baseline median is a regression
+TIME_PER_CASE = 0.5  # Seconds of timed calls per case, within min/max repeats
+
+Case = namedtuple('Case', ['name', 'setup', 'params'])
+Result = namedtuple('Result', ['key', 'median_ms', 'p95_ms', 'repeats'])
+
+def sensor_camera(sensor):
+    return Camera(position=(0, 0, 0), orientation=(0, 0, -1), sensor_size=(sensor, sensor))
+
+def setup_ray_intersection(sensor):
+    camera = sensor_camera(sensor)
+    ray = Ray(origin=(10, 20, 100), direction=(0, 0, -1), wavelength=488)
+    return lambda: camera.ray_intersection(ray)
+
+def setup_ray_intersection_batch(rays):
+    camera = sensor_camera(1000)
+    rng = np.random.default_rng(0)
+    batch = RayBatch(origins=np.column_stack([rng.uniform(-500, 500, (rays, 2)), np.full(rays, 100)]),
+                     directions=(0, 0, -1), wavelengths=488)
+    return lambda: camera.ray_intersection_batch(batch)
+
+def setup_add_diffraction_spot(sensor):
+    camera = sensor_camera(sensor)
+    return lambda: camera.add_diffraction_spot(sensor / 2 + 0.3, sensor / 2 + 0.6)
+
+def setup_add_diffraction_spots(rays):
+    camera = sensor_camera(1000)
+    xs, ys = np.random.default_rng(0).uniform(0, 1000, (2, rays))
+    return lambda: camera.add_diffraction_spots(xs, ys)
+
+def setup_filter_transmission(rays):
+    # Tabulated curve with 1 nm spacing, as from a vendor data sheet
+    wavelengths = np.arange(350, 801)
+    curve = TransmissionCurve(wavelengths, np.clip(np.sin(wavelengths / 7) ** 2, 0, 1))
+    band = Filter(position=(0, 0, 0), orientation=(1, 0, 0), pass_band=(0, 0), transmission=curve)
+    batch = RayBatch(np.zeros((rays, 3)), (1, 0, 0), np.random.default_rng(0).uniform(400, 700, rays))
+    return lambda: band.interact_with_light_batch(batch)
+
+def setup_light_table_trace(components):
+    light_table = LightTable()
+    light_table.add_component(Laser(position=(0, 500, 0), orientation=(1, 0, 0), wavelength=488, power=100))
+    for component in build_bench(components, np.random.default_rng(0)):
+        light_table.add_component(component)
+    light_table.add_component(Camera(position=(1000, 500, 0), orientation=(-1, 0, 0)))
+
+    def trace():
+        light_table.invalidate()
+        light_table.simulate_light_path()
+    return trace
+
+def setup_light_table_image(sensor):
+    # get_image only draws the spot when the table has an Objective
+    light_table = LightTable()
+    light_table.add_component(Objective(position=(300, 500, 0), orientation=(1, 0, 0), magnification=60,
+                                        numerical_aperture=1.49))
+    rng = np.random.default_rng(0)
+    light_table.rays = [Ray(origin=(0, 0, 0), direction=rng.normal(size=3), wavelength=488) for _ in range(10)]
+    return lambda: light_table.get_image((sensor, sensor))
+
+def setup_microscope_trace(components, rays):
+    microscope = Microscope()
+    for component in build_bench(components, np.random.default_rng(0)):
+        microscope.add_component(component)
+    batch = build_beam(rays, np.random.default_rng(1))
+
+    def trace():
+        microscope.tracer.clear(microscope.components)
+        microscope.simulate_light_path_batch(batch)
+    return trace
+
+def setup_light_table_view(rays):
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    try:
+        from PyQt5.QtWidgets import QApplication
+        from ..gui.light_table_view import LightTableView
+    except ImportError:
+        return None
+    setup_light_table_view.app = QApplication.instance() or QApplication([])
+    view = LightTableView()
+    rng = np.random.default_rng(0)
+    view.components = [('rectangle', rng.uniform(0, 1000, 2), np.array([1, 0]), (20, 20)) for _ in range(20)]
+    view.rays = RayBatch(origins=rng.uniform(0, 1000, (rays, 3)), directions=rng.normal(size=(rays, 3)),
+                         wavelengths=488, lengths=100)
+    return view.update_display
+
+def setup_sweep(configurations):
+    grid = parameter_grid(angle_x=list(np.linspace(60, 90, configurations)))
+    return lambda: list(run_sweep(DEFAULT_SCENE, grid, workers=1))
+
+def setup_photons(photons):
+    microscope = Microscope()
+    laser = Laser(position=(100, 532, 32), orientation=(1, 0, 0), wavelength=488, power=100, beam_waist=10)
+    laser.set_angles(np.pi / 2, 0)
+    microscope.add_component(laser)
+    microscope.add_component(Camera(position=(600, 500, 0), orientation=(-1, 0, 0), sensor_size=(64, 64)))
+    return lambda: simulate_photons(microscope, photons)
+
+def setup_tirf_lookup(angles):
+    table = get_tirf_table(488, numerical_aperture=1.49)
+    theta = np.radians(np.linspace(0, 90, angles))
+    return lambda: table.lookup(theta)
+
+CASES = [
+    Case('camera.ray_intersection', setup_ray_intersection, {'sensor': [100, 1000]}),
+    Case('camera.ray_intersection_batch', setup_ray_intersection_batch, {'rays': [1000, 100000]}),
+    Case('camera.add_diffraction_spot', setup_add_diffraction_spot, {'sensor': [100, 1000, 2048]}),
+    Case('camera.add_diffraction_spots', setup_add_diffraction_spots, {'rays': [100, 10000]}),
+    Case('filter.transmission', setup_filter_transmission, {'rays': [1000, 100000]}),
+    Case('light_table.simulate_light_path', setup_light_table_trace, {'components': [2, 20, 200]}),
+    Case('light_table.get_image', setup_light_table_image, {'sensor': [128, 512, 2048]}),
+    Case('microscope.simulate_light_path', setup_microscope_trace,
+         {'components': [5, 50, 500], 'rays': [1, 1000]}),
+    Case('light_table_view.update_display', setup_light_table_view, {'rays': [10, 1000, 10000]}),
+    Case('sweep.run_sweep', setup_sweep, {'configurations': [16, 64]}),
+    Case('monte_carlo.simulate_photons', setup_photons, {'photons': [10**5, 10**6]}),
+    Case('tirf.lookup', setup_tirf_lookup, {'angles': [1, 10000]}),
+]
+
+def case_key(name, params):
+    return name + '[' + ','.join(f"{k}={v}" for k, v in params.items()) + ']'
+
+def expand(case):
+    # Every combination of the case's parameter values
+    names = list(case.params)
+    for values in np.array(np.meshgrid(*case.params.values(), indexing='ij')).reshape(len(names), -1).T:
+        yield dict(zip(names, (int(v) for v in values)))
+
+def time_case(func, min_repeats=5, max_repeats=200):
+    # Repeat for about TIME_PER_CASE seconds after one warm-up call
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    repeats = int(np.clip(TIME_PER_CASE / max(first, 1e-6), min_repeats, max_repeats))
+    samples = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.median(samples)), float(np.percentile(samples, 95)), repeats
+
+def run_suite(pattern=None):
+    """Time every case whose key contains pattern; yields Results, or None timings if skipped."""
+    for case in CASES:
+        for params in expand(case):
+            key = case_key(case.name, params)
+            if pattern and pattern not in key:
+                continue
+            func = case.setup(**params)
+            if func is None:
+                yield Result(key, None, None, 0)
+                continue
+            yield Result(key, *time_case(func))
+
+def machine_info():
+    return {'python': platform.python_version(), 'numpy': np.__version__,
+            'machine': platform.machine(), 'processor': platform.processor() or platform.node()}
+
+def load_baseline(path=BASELINE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'machine': None, 'results': {}}
+
+def save_baseline(results, path=BASELINE_PATH):
+    baseline = load_baseline(path)
+    baseline['machine'] = machine_info()
+    baseline['results'].update({r.key: round(r.median_ms, 4) for r in results})
+    with open(path, 'w') as f:
+        json.dump(baseline, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+def compare(median_ms, baseline_ms, threshold=DEFAULT_THRESHOLD):
+    """'new', 'ok', 'faster' or 'REGRESSION' for one result against its baseline."""
+    if baseline_ms is None:
+        return 'new'
+    ratio = median_ms / baseline_ms
+    if ratio > threshold:
+        return 'REGRESSION'
+    return 'faster' if ratio < 1 / threshold else 'ok'
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="tirf_sim benchmark suite")
+    parser.add_argument('--filter', help="only run cases whose name contains this")
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help="slowdown ratio reported as a regression")
+    parser.add_argument('--save-baseline', action='store_true', help="store these timings as the baseline")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('tirf_sim').setLevel(logging.ERROR)
+    baseline = load_baseline(args.baseline)
+    if baseline['machine'] and baseline['machine'] != machine_info():
+        print(f"Note: baseline was recorded on {baseline['machine']}")
+
+    print(f"{'case':<64} {'median ms':>10} {'p95 ms':>10} {'baseline':>10} {'ratio':>7}")
+    results = []
+    regressions = 0
+    for result in run_suite(args.filter):
+        if result.median_ms is None:
+            print(f"{result.key:<64} {'skipped (needs PyQt5 and pyqtgraph)':>40}")
+            continue
+        results.append(result)
+        reference = baseline['results'].get(result.key)
+        status = compare(result.median_ms, reference, args.threshold)
+        regressions += status == 'REGRESSION'
+        ratio = f"{result.median_ms / reference:>7.2f}" if reference else f"{'':>7}"
+        reference = f"{reference:>10.3f}" if reference else f"{'-':>10}"
+        print(f"{result.key:<64} {result.median_ms:>10.3f} {result.p95_ms:>10.3f} {reference} {ratio}  {status}")
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Saved {len(results)} timings to {args.baseline}")
+        return 0
+    print(f"{regressions} regression(s) beyond {args.threshold:.2f}x")
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,3 +1,9 @@
-from .main_window import MainWindow, run_gui
-
+# MainWindow and run_gui are imported on first use, so importing tirf_sim.gui
+# does not load PyQt5 and pyqtgraph
 __all__ = ['MainWindow', 'run_gui']
+
+def __getattr__(name):
+    if name in __all__:
+        from . import main_window
+        return getattr(main_window, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -4,6 +4,7 @@ import pyqtgraph as pg
 import numpy as np
 from PyQt5.QtWidgets import QWidget, QVBoxLayout
 from PyQt5.QtCore import pyqtSignal
+from ..optical_components import RayBatch
 from ..logger import logger
 
 class LightTableView(QWidget):
@@ -20,43 +21,86 @@ class LightTableView(QWidget):
         self.plot_widget.setYRange(0, 1000)
 
         self.components = []
-        self.rays = []
+        self.rays = RayBatch.empty()
+
+        # Items are created once and updated in place with setData
+        self.component_items = []
+        self.drawn_components = []
+        self.ray_item = pg.PlotDataItem(pen=pg.mkPen('r', width=2), connect='pairs')
+        self.plot_widget.addItem(self.ray_item)
+        self.scene_bounds = None
 
     def update_light_table(self, components, rays):
         self.components = components
-        self.rays = rays
+        self.rays = rays if isinstance(rays, RayBatch) else RayBatch.from_rays(rays)
         self.update_display()
 
     def update_display(self):
         try:
-            self.plot_widget.clear()
-
-            # Draw components
-            for shape, pos, orientation, size in self.components:
-                if shape == 'rectangle':
-                    x, y = pos[0], pos[1]
-                    w, h = size[0], size[1]
-                    rect_points = [
-                        (x - w/2, y - h/2), (x + w/2, y - h/2),
-                        (x + w/2, y + h/2), (x - w/2, y + h/2),
-                        (x - w/2, y - h/2)
-                    ]
-                    rect = pg.PlotDataItem(x=[p[0] for p in rect_points],
-                                           y=[p[1] for p in rect_points],
-                                           pen=pg.mkPen('w'))
-                    self.plot_widget.addItem(rect)
-                elif shape == 'circle':
-                    circle = pg.ScatterPlotItem([pos[0]], [pos[1]], size=size[0], pen=pg.mkPen('w'), brush=pg.mkBrush(None))
-                    self.plot_widget.addItem(circle)
-
-            # Draw rays
-            for ray in self.rays:
-                start = ray.origin[:2]  # Use only x and y coordinates
-                end = start + ray.direction[:2] * ray.length
-                line = pg.PlotDataItem([start[0], end[0]], [start[1], end[1]], pen=pg.mkPen('r', width=2))
-                self.plot_widget.addItem(line)
-
-            self.plot_widget.autoRange()
+            if not self.same_components(self.components, self.drawn_components):
+                self.update_component_items()
+
+            # Draw all rays as one line item, one start/end pair per ray
+            starts = self.rays.origins[:, :2]  # Use only x and y coordinates
+            ends = starts + self.rays.directions[:, :2] * self.rays.lengths[:, np.newaxis]
+            points = np.empty((2 * len(self.rays), 2))
+            points[0::2] = starts
+            points[1::2] = ends
+            self.ray_item.setData(points[:, 0], points[:, 1], connect='pairs')
+
+            bounds = self.get_scene_bounds(points)
+            if bounds is not None and (self.scene_bounds is None or not np.allclose(bounds, self.scene_bounds)):
+                self.scene_bounds = bounds
+                self.plot_widget.autoRange()
             logger.debug("Light table display updated successfully")
         except Exception as e:
             logger.error(f"Error updating light table display: {str(e)}")
+
+    def update_component_items(self):
+        # Reuse each component's item while its shape is unchanged
+        for index, (shape, pos, orientation, size) in enumerate(self.components):
+            item = self.component_items[index] if index < len(self.component_items) else None
+            if shape == 'rectangle':
+                x, y = pos[0], pos[1]
+                w, h = size[0], size[1]
+                rect_x = [x - w/2, x + w/2, x + w/2, x - w/2, x - w/2]
+                rect_y = [y - h/2, y - h/2, y + h/2, y + h/2, y - h/2]
+                if not isinstance(item, pg.PlotDataItem):
+                    item = self.replace_component_item(index, pg.PlotDataItem(pen=pg.mkPen('w')))
+                item.setData(rect_x, rect_y)
+            elif shape == 'circle':
+                if not isinstance(item, pg.ScatterPlotItem):
+                    item = self.replace_component_item(
+                        index, pg.ScatterPlotItem(pen=pg.mkPen('w'), brush=pg.mkBrush(None)))
+                item.setData([pos[0]], [pos[1]], size=size[0])
+
+        for item in self.component_items[len(self.components):]:
+            self.plot_widget.removeItem(item)
+        del self.component_items[len(self.components):]
+        self.drawn_components = [(shape, np.array(pos), np.array(orientation), np.array(size))
+                                 for shape, pos, orientation, size in self.components]
+
+    def replace_component_item(self, index, item):
+        if index < len(self.component_items):
+            self.plot_widget.removeItem(self.component_items[index])
+            self.component_items[index] = item
+        else:
+            self.component_items.append(item)
+        self.plot_widget.addItem(item)
+        return item
+
+    def get_scene_bounds(self, ray_points):
+        points = [ray_points]
+        for shape, pos, orientation, size in self.components:
+            half = np.asarray(size[:2], dtype=float) / 2
+            points.append(np.array([pos[:2] - half, pos[:2] + half]))
+        points = np.concatenate(points)
+        if not len(points):
+            return None
+        return np.concatenate([points.min(axis=0), points.max(axis=0)])
+
+    @staticmethod
+    def same_components(components, drawn):
+        return len(components) == len(drawn) and all(
+            a[0] == b[0] and all(np.array_equal(np.asarray(u), v) for u, v in zip(a[1:], b[1:]))
+            for a, b in zip(components, drawn))
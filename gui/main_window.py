@@ -8,45 +8,55 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QComboBox, QLabel,
-                             QDockWidget, QFrame, QListWidget, QSlider, QListWidgetItem)
-from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import Qt, QTimer
+                             QDockWidget, QFrame, QListWidget, QSlider, QListWidgetItem,
+                             QCheckBox)
+from PyQt5.QtGui import QImage, QPixmap, QFont
+from PyQt5.QtCore import Qt, QObject, pyqtSignal
 import numpy as np
 
 from tirf_sim.simulation.engine import SimulationEngine
-from tirf_sim.microscope.microscope import Microscope
-from tirf_sim.optical_components import Laser, Mirror, Lens, Objective, Camera
-from .light_table_view import LightTableView
+from tirf_sim.simulation.worker import SimulationWorker
+from tirf_sim.simulation.cache import ResultCache
+from tirf_sim.microscope.scene import build_microscope, DEFAULT_SCENE
+from tirf_sim.sample.tirf import incidence_angle
 
-from ..logger import logger
+from ..logger import logger, debug_enabled
+
+
+class FrameNotifier(QObject):
+    # Emitted from the simulation thread; Qt delivers it on the GUI thread
+    frame_ready = pyqtSignal()
 
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, scene=None, profile_frames=None, profile_output='frames.prof'):
         super().__init__()
         self.setWindowTitle("TIRF Microscope Simulation")
         self.resize(1200, 800)
 
-        self.microscope = Microscope()
-        self.setup_microscope()
-        self.simulation_engine = SimulationEngine(self.microscope)
+        self.setup_microscope(scene or DEFAULT_SCENE)
+        # Converged progressive images are kept so revisited settings show at once
+        self.simulation_engine = SimulationEngine(self.microscope, ResultCache())
+        self.profiler = self.simulation_engine.profiler
+        if profile_frames:
+            self.profiler.capture(profile_frames, profile_output)
 
         self.setup_central_widget()
         self.setup_docks()
 
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_simulation)
-        self.timer.start(50)  # Update every 50 ms
-
-    def setup_microscope(self):
-        laser = Laser(position=(100, 500, 0), orientation=(1, 0, 0), wavelength=488, power=100)
-        camera = Camera(position=(600, 500, 0), orientation=(-1, 0, 0))  # Moved closer to the laser
+        # Tracing runs on a worker thread that signals when a frame is ready,
+        # so slow frames never block the sliders
+        self.frame_notifier = FrameNotifier()
+        self.frame_notifier.frame_ready.connect(self.update_simulation)
+        self.simulation_worker = SimulationWorker(self.simulation_engine,
+                                                  on_frame=self.frame_notifier.frame_ready.emit)
+        self.simulation_worker.start()
 
-        logger.info(f"Laser set up at position {laser.position} with orientation {laser.orientation}")
-        logger.info(f"Camera set up at position {camera.position} with orientation {camera.orientation}")
-
-        self.microscope.add_component(laser)
-        self.microscope.add_component(camera)
+    def setup_microscope(self, scene):
+        self.microscope = build_microscope(scene)
+        for component in self.microscope.components:
+            logger.info(f"{type(component).__name__} set up at position {component.position} "
+                        f"with orientation {component.orientation}")
 
     def setup_central_widget(self):
         self.central_widget = QWidget()
@@ -70,7 +80,7 @@ class MainWindow(QMainWindow):
         self.component_list = QListWidget()
         for component in self.microscope.components:
             item = QListWidgetItem(type(component).__name__)
-            item.setCheckState(Qt.Checked)
+            item.setCheckState(Qt.Checked if component.is_on else Qt.Unchecked)
             self.component_list.addItem(item)
         self.component_list.itemChanged.connect(self.toggle_component)
         layout.addWidget(self.component_list)
@@ -89,6 +99,11 @@ class MainWindow(QMainWindow):
         layout.addWidget(QLabel("Laser Angle Y"))
         layout.addWidget(self.laser_angle_y_slider)
 
+        # Penetration depth and intensity at the coverslip for the slider angles
+        self.excitation_label = QLabel()
+        layout.addWidget(self.excitation_label)
+        self.update_excitation_label()
+
 
         self.laser_power_slider = QSlider(Qt.Horizontal)
         self.laser_power_slider.setRange(0, 100)
@@ -97,6 +112,15 @@ class MainWindow(QMainWindow):
         layout.addWidget(QLabel("Laser Power"))
         layout.addWidget(self.laser_power_slider)
 
+        # Coarse Monte Carlo preview while dragging, refined while the controls are idle
+        self.lod_toggle = QCheckBox("Progressive Rendering")
+        self.lod_toggle.toggled.connect(self.toggle_lod)
+        layout.addWidget(self.lod_toggle)
+
+        self.timings_toggle = QCheckBox("Show Frame Timings")
+        self.timings_toggle.toggled.connect(self.toggle_timings)
+        layout.addWidget(self.timings_toggle)
+
         self.simulation_toggle = QPushButton("Start Simulation")
         self.simulation_toggle.setCheckable(True)
         self.simulation_toggle.toggled.connect(self.toggle_simulation)
@@ -112,28 +136,64 @@ class MainWindow(QMainWindow):
         self.image_label = QLabel()
         self.image_label.setAlignment(Qt.AlignCenter)
         layout.addWidget(self.image_label)
+
+        # Rolling per-stage timings, shown under the image when enabled
+        self.timings_label = QLabel()
+        self.timings_label.setFont(QFont('Monospace'))
+        self.timings_label.setVisible(False)
+        layout.addWidget(self.timings_label)
         dock.setWidget(widget)
         self.addDockWidget(Qt.RightDockWidgetArea, dock)
 
     def setup_light_table_view_dock(self):
+        # pyqtgraph is imported here, when the dock is built, rather than with the module
+        from .light_table_view import LightTableView
         dock = QDockWidget("Light Table View", self)
         self.light_table_view = LightTableView()
         dock.setWidget(self.light_table_view)
         self.addDockWidget(Qt.BottomDockWidgetArea, dock)
 
+    def get_parameters(self):
+        # Snapshot of the controls for the simulation worker
+        return {
+            'angle_x': self.laser_angle_x_slider.value(),
+            'angle_y': self.laser_angle_y_slider.value(),
+            'power': self.laser_power_slider.value(),
+            'is_on': [self.component_list.item(i).checkState() == Qt.Checked
+                      for i in range(self.component_list.count())],
+        }
+
+    def submit_parameters(self):
+        self.simulation_worker.submit(self.get_parameters())
+
     def update_laser_power(self, value):
-        laser = next((c for c in self.microscope.components if isinstance(c, Laser)), None)
-        if laser:
-            laser.power = value
-            logger.info(f"Updated laser power to {value}")
+        self.submit_parameters()
+        logger.info(f"Updated laser power to {value}")
 
     def update_laser_angle(self):
-        laser = next((c for c in self.microscope.components if isinstance(c, Laser)), None)
-        if laser:
-            angle_x = np.radians(self.laser_angle_x_slider.value())
-            angle_y = np.radians(self.laser_angle_y_slider.value())
-            laser.set_angles(angle_x, angle_y)
-            logger.info(f"Updated laser angles to ({angle_x:.2f}, {angle_y:.2f})")
+        self.submit_parameters()
+        angle_x = np.radians(self.laser_angle_x_slider.value())
+        angle_y = np.radians(self.laser_angle_y_slider.value())
+        logger.info(f"Updated laser angles to ({angle_x:.2f}, {angle_y:.2f})")
+        self.update_excitation_label()
+
+    def update_excitation_label(self):
+        # A table lookup, so this keeps up with the sliders
+        theta = incidence_angle(np.radians(self.laser_angle_x_slider.value()),
+                                np.radians(self.laser_angle_y_slider.value()))
+        try:
+            profile = self.microscope.get_excitation_profile(theta)
+        except ValueError:
+            self.excitation_label.setText("")
+            return
+        text = f"Incidence {np.degrees(theta):.1f}\N{DEGREE SIGN}: "
+        if not profile.in_aperture:
+            text += "beyond the objective NA"
+        elif profile.total_reflection:
+            text += f"evanescent, depth {profile.depth:.0f} nm, intensity {profile.intensity:.2f}"
+        else:
+            text += f"propagating, transmission {profile.intensity:.2f}"
+        self.excitation_label.setText(text)
 
 
     def update_lens_oscillation(self, value):
@@ -143,53 +203,73 @@ class MainWindow(QMainWindow):
     def toggle_simulation(self, checked):
         if checked:
             self.simulation_engine.start()
+            self.submit_parameters()
             self.simulation_toggle.setText("Stop Simulation")
         else:
             self.simulation_engine.stop()
             self.simulation_toggle.setText("Start Simulation")
 
+    def toggle_lod(self, checked):
+        self.simulation_engine.set_lod(checked)
+        self.submit_parameters()
+        logger.info(f"Progressive rendering {'on' if checked else 'off'}")
+
+    def toggle_timings(self, checked):
+        self.timings_label.setVisible(checked)
+        if checked:
+            self.timings_label.setText(self.profiler.format_summary())
+
     def toggle_component(self, item):
         index = self.component_list.row(item)
         component = self.microscope.components[index]
-        if item.checkState() == Qt.Checked:
-            component.turn_on()
-        else:
-            component.turn_off()
-        logger.info(f"Toggled {type(component).__name__} {'on' if component.is_on else 'off'}")
+        self.submit_parameters()
+        logger.info(f"Toggled {type(component).__name__} {'on' if item.checkState() == Qt.Checked else 'off'}")
 
 
     def update_simulation(self):
+        # Show the newest frame from the worker; older ones are dropped
         try:
-            if self.simulation_engine.is_running:
-                self.simulation_engine.light_table.simulate_light_path()
-                camera = next((c for c in self.microscope.components if isinstance(c, Camera)), None)
-                if camera:
-                    image = camera.get_image()
-                    self.display_image(image)
-                    logger.debug(f"Camera image updated, max value: {np.max(image)}")
-                    camera.clear_image()  # Clear the image after displaying
-
-                components = self.simulation_engine.get_schematic_representation()
-                rays = self.simulation_engine.get_rays()
-                self.light_table_view.update_light_table(components, rays)
-                logger.debug("Simulation updated successfully")
+            frame = self.simulation_worker.latest_frame()
+            if frame is None:
+                return
+            try:
+                if frame.image is not None:
+                    with self.profiler.stage('display'):
+                        self.display_image(frame.image)
+                    if debug_enabled():
+                        logger.debug("Camera image updated, max value: %s", np.max(frame.image))
+            finally:
+                # The pixmap holds its own copy, so the buffer can be reused
+                self.simulation_worker.release(frame)
+
+            with self.profiler.stage('plot'):
+                self.light_table_view.update_light_table(frame.schematic, frame.rays)
+            if self.timings_label.isVisible():
+                self.timings_label.setText(self.profiler.format_summary())
+            logger.debug("Simulation updated successfully")
         except Exception as e:
             logger.error(f"Error updating simulation: {str(e)}")
 
+    def closeEvent(self, event):
+        self.simulation_worker.stop()
+        super().closeEvent(event)
+
     def display_image(self, image):
-        if np.max(image) > 0:
-            logger.debug(f"Displaying image with max value: {np.max(image)}")
+        if debug_enabled() and np.max(image) > 0:
+            logger.debug("Displaying image with max value: %s", np.max(image))
+        # Wrap the uint8 buffer without copying; QImage needs the row stride in bytes
+        image = np.ascontiguousarray(image, dtype=np.uint8)
         h, w = image.shape
-        qimage = QImage(image.data, w, h, w, QImage.Format_Grayscale8)
+        qimage = QImage(image.data, w, h, image.strides[0], QImage.Format_Grayscale8)
         pixmap = QPixmap.fromImage(qimage)
         scaled_pixmap = pixmap.scaled(400, 400, Qt.KeepAspectRatio, Qt.SmoothTransformation)
         self.image_label.setPixmap(scaled_pixmap)
         self.image_label.setAlignment(Qt.AlignCenter)
 
 
-def run_gui():
+def run_gui(scene=None, profile_frames=None, profile_output='frames.prof'):
     app = QApplication([])
-    window = MainWindow()
+    window = MainWindow(scene, profile_frames, profile_output)
     window.show()
     app.exec_()
 
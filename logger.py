@@ -1,24 +1,44 @@
 # tirf_sim/logger.py
 
 import logging
+import os
 
-def setup_logger():
-    logger = logging.getLogger('tirf_sim')
-    logger.setLevel(logging.DEBUG)
+LOG_LEVEL_ENV_VAR = 'TIRF_SIM_LOG_LEVEL'
+DEFAULT_LOG_LEVEL = 'INFO'
 
-    # Create console handler and set level to debug
-    ch = logging.StreamHandler()
-    ch.setLevel(logging.DEBUG)
+# Importing the package adds no handlers; applications call setup_logger().
+# Until then the level follows the root logger, and warnings and errors
+# still reach stderr through logging's last-resort handler.
+logger = logging.getLogger('tirf_sim')
 
-    # Create formatter
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+def setup_logger(level=None):
+    # Level comes from the argument, then TIRF_SIM_LOG_LEVEL, then INFO
 
-    # Add formatter to ch
-    ch.setFormatter(formatter)
+    # Create console handler once; the level is set on the logger so
+    # disabled debug calls return before any formatting happens
+    if not logger.handlers:
+        ch = logging.StreamHandler()
 
-    # Add ch to logger
-    logger.addHandler(ch)
+        # Create formatter
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 
+        # Add formatter to ch
+        ch.setFormatter(formatter)
+
+        # Add ch to logger
+        logger.addHandler(ch)
+
+    set_log_level(level or os.environ.get(LOG_LEVEL_ENV_VAR, DEFAULT_LOG_LEVEL), logger)
     return logger
 
-logger = setup_logger()
+def set_log_level(level, logger=None):
+    logger = logger or logging.getLogger('tirf_sim')
+    if isinstance(level, str):
+        level = level.upper()
+        if not isinstance(logging.getLevelName(level), int):
+            raise ValueError(f"Invalid log level: {level}")
+    logger.setLevel(level)
+
+def debug_enabled():
+    # Guard for debug messages whose arguments are expensive to compute
+    return logger.isEnabledFor(logging.DEBUG)
@@ -5,13 +5,28 @@ Created on Mon Aug 19 09:16:59 2024
 
 @author: george
 """
+import argparse
 import sys
 import os
 
 # Add the parent directory of 'tirf_sim' to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from tirf_sim.gui.main_window import run_gui
+from tirf_sim.logger import setup_logger
 
 if __name__ == "__main__":
-    run_gui()
+    parser = argparse.ArgumentParser(description="TIRF microscope simulation")
+    parser.add_argument('--log-level', help="DEBUG, INFO, WARNING or ERROR "
+                        "(default: $TIRF_SIM_LOG_LEVEL or INFO)")
+    parser.add_argument('--scene', help="JSON, YAML or TOML scene file (default: laser and camera bench)")
+    parser.add_argument('--profile-frames', type=int, metavar='N',
+                        help="run cProfile over the first N simulated frames")
+    parser.add_argument('--profile-output', default='frames.prof',
+                        help="pstats file written by --profile-frames (default: frames.prof)")
+    args = parser.parse_args()
+    setup_logger(args.log_level)
+
+    # Qt is only imported once the arguments are known to be good
+    from tirf_sim.gui.main_window import run_gui
+    from tirf_sim.microscope.scene import read_scene_file
+    run_gui(read_scene_file(args.scene) if args.scene else None, args.profile_frames, args.profile_output)
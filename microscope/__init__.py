@@ -1,3 +1,6 @@
 from .microscope import Microscope
+from .scene import (load_scene, save_scene, read_scene_file, build_microscope, validate_scene,
+                    scene_from_microscope, DEFAULT_SCENE)
 
-__all__ = ['Microscope']
+__all__ = ['Microscope', 'load_scene', 'save_scene', 'read_scene_file', 'build_microscope', 'validate_scene',
+           'scene_from_microscope', 'DEFAULT_SCENE']
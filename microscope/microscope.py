@@ -1,10 +1,19 @@
 from typing import List
-from ..optical_components.base import OpticalComponent, Ray
+import numpy as np
+from ..optical_components.base import OpticalComponent, Ray, RayBatch
+from ..optical_components import Laser, Objective, Camera
+from ..sample.tirf import GLASS_INDEX, WATER_INDEX, incidence_angle, get_tirf_table
+from .tracer import SequentialTracer
 
 class Microscope:
+    # Emitters fainter than this fraction of the brightest are not drawn
+    SAMPLE_CULL_FRACTION = 1e-3
+
     def __init__(self):
         self.components: List[OpticalComponent] = []
         self.mode = "TIRF"
+        self.tracer = SequentialTracer()
+        self.sample = None
 
     def add_component(self, component: OpticalComponent):
         self.components.append(component)
@@ -15,12 +24,84 @@ class Microscope:
         else:
             raise ValueError("Invalid microscope mode")
 
+    def set_sample(self, sample):
+        self.sample = sample
+
     def simulate_light_path(self, initial_ray: Ray) -> List[Ray]:
-        rays = [initial_ray]
-        for component in self.components:
-            new_rays = component.interact_with_light(rays[-1])
-            if new_rays:
-                rays.extend(new_rays)
-            else:
-                break  # Light was absorbed or reflected away
-        return rays
+        # Traced segments, starting with the initial ray up to its first hit
+        return self.simulate_light_path_batch(RayBatch.from_rays([initial_ray])).to_rays()
+
+    def simulate_light_path_batch(self, batch: RayBatch) -> RayBatch:
+        return self.tracer.trace(self.components, batch)
+
+    def get_component(self, component_type):
+        return next((c for c in self.components if isinstance(c, component_type)), None)
+
+    def get_incidence_angle(self):
+        """Angle (radians) of the excitation beam at the coverslip.
+
+        In TIRF mode the laser tilt sets the angle; in Epifluorescence mode
+        the beam is brought in along the optical axis.
+        """
+        laser = self.get_component(Laser)
+        if self.mode != "TIRF" or laser is None:
+            return 0.0
+        return float(incidence_angle(laser.angle_x, laser.angle_y))
+
+    def get_tirf_table(self):
+        """Shared TIRFTable for the laser wavelength, the immersion and sample indices and the objective NA."""
+        laser = self.get_component(Laser)
+        if laser is None:
+            raise ValueError("A TIRF table needs a Laser")
+        objective = self.get_component(Objective)
+        n1 = objective.immersion_index if objective is not None else GLASS_INDEX
+        n2 = self.sample.refractive_index if self.sample is not None else WATER_INDEX
+        return get_tirf_table(laser.wavelength, n1, n2,
+                              objective.numerical_aperture if objective is not None else None)
+
+    def get_excitation_profile(self, theta=None):
+        """TIRFProfile at the angles of incidence theta (radians); the current one by default."""
+        return self.get_tirf_table().lookup(self.get_incidence_angle() if theta is None else theta)
+
+    def get_sample_excitation(self):
+        # Excitation at every emitter; zero if the objective cannot pass the beam
+        laser = self.get_component(Laser)
+        objective = self.get_component(Objective)
+        if laser is None or objective is None:
+            raise ValueError("Imaging a sample needs a Laser and an Objective")
+        theta = self.get_incidence_angle()
+        if not laser.is_on or objective.immersion_index * np.sin(theta) > objective.numerical_aperture:
+            return np.zeros(len(self.sample), dtype=np.float32)
+        return self.sample.excitation(theta, laser.wavelength, objective.immersion_index, laser.power)
+
+    def render_sample(self, camera=None, method='auto'):
+        """Image the sample's fluorescence onto the camera and return the image.
+
+        Emitters are drawn as Gaussian spots (sigma = 0.21 lambda / NA) whose
+        pixels sum to the emitter's excitation, centred on the optical axis.
+        method is passed to Camera.render_spots: 'direct', 'fft' or 'auto'
+        to choose by emitter density. Returns None if no sample is set.
+        """
+        if self.sample is None:
+            return None
+        camera = camera or self.get_component(Camera)
+        if camera is None:
+            raise ValueError("Imaging a sample needs a Camera")
+        objective = self.get_component(Objective)
+        emission = self.get_sample_excitation()
+
+        pixel_size = camera.pixel_pitch / objective.magnification
+        sigma = 0.21 * self.sample.emission_wavelength / objective.numerical_aperture / pixel_size
+        radius = max(1, int(np.ceil(4 * sigma)))
+        rows, cols = camera.image.shape
+
+        pixel_x = self.sample.positions[:, 0] / np.float32(pixel_size) + np.float32(cols / 2)
+        pixel_y = self.sample.positions[:, 1] / np.float32(pixel_size) + np.float32(rows / 2)
+        # Skip emitters too faint to see or whose spots miss the sensor
+        visible = ((emission > self.SAMPLE_CULL_FRACTION * emission.max(initial=0)) &
+                   (pixel_x > -radius) & (pixel_x < cols + radius) &
+                   (pixel_y > -radius) & (pixel_y < rows + radius))
+
+        camera.clear_image()
+        camera.render_spots(pixel_x[visible], pixel_y[visible], emission[visible], sigma ** 2, radius, method)
+        return camera.get_image()
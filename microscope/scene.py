@@ -0,0 +1,357 @@
+# tirf_sim/microscope/scene.py
+"""Scene files: a Microscope's mode and components as plain data.
+
+A scene is a dict with an optional 'mode' and a list of 'components'.
+Each component names its class in 'type' and gives its constructor
+arguments, plus optional 'is_on', the Laser's 'angle_x'/'angle_y' (in
+degrees, as in sweeps) and Camera settings such as 'accumulate_mode' or
+a 'detector' dict of DetectorModel arguments. Scenes are stored as JSON,
+YAML (needs PyYAML) or TOML, chosen by file extension.
+"""
+
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+
+import numpy as np
+
+from .microscope import Microscope
+from ..optical_components import (Laser, Mirror, Lens, BeamSplitter, Filter, Objective, Camera,
+                                  DetectorModel, TransmissionCurve)
+from ..logger import logger
+
+COMPONENT_TYPES = {cls.__name__: cls for cls in [Laser, Mirror, Lens, BeamSplitter, Filter, Objective, Camera]}
+MODES = ('TIRF', 'Epifluorescence')
+SCENE_FORMATS = {'.json': 'json', '.yaml': 'yaml', '.yml': 'yaml', '.toml': 'toml'}
+CACHE_VERSION = 5  # Bump when the compiled scene file layout changes
+COMPILED_PACKAGES = ('optical_components', 'microscope', 'sample', 'utils')
+
+# Settings applied after construction, per component type
+EXTRA_FIELDS = {
+    'Laser': ('angle_x', 'angle_y'),
+    'Camera': ('accumulate_mode', 'pixel_pitch', 'psf_sigma', 'psf_radius', 'detector'),
+}
+
+# Bench shown by MainWindow when no scene file is given
+DEFAULT_SCENE = {
+    'mode': 'TIRF',
+    'components': [
+        {'type': 'Laser', 'position': [100, 500, 0], 'orientation': [1, 0, 0], 'wavelength': 488, 'power': 100},
+        {'type': 'Camera', 'position': [600, 500, 0], 'orientation': [-1, 0, 0]},
+    ],
+}
+
+def constructor_fields(component_type):
+    # (name, required) for each constructor argument
+    parameters = list(inspect.signature(COMPONENT_TYPES[component_type].__init__).parameters.values())[1:]
+    return [(p.name, p.default is inspect.Parameter.empty) for p in parameters]
+
+def is_number(value):
+    return isinstance(value, (int, float, np.number)) and not isinstance(value, bool)
+
+def is_vector(value, length=None):
+    return (isinstance(value, (list, tuple, np.ndarray)) and (length is None or len(value) == length)
+            and all(is_number(v) for v in value))
+
+def is_curve(value):
+    # [wavelengths, values] table accepted by TransmissionCurve
+    if not (isinstance(value, (list, tuple)) and len(value) == 2 and all(is_vector(v) for v in value)):
+        return False
+    try:
+        TransmissionCurve(*value)
+    except ValueError:
+        return False
+    return True
+
+# Checks for field values; fields not listed here must be numbers
+FIELD_CHECKS = {
+    'position': (lambda v: is_vector(v, 3), "a list of 3 numbers"),
+    'orientation': (lambda v: is_vector(v, 3) and any(v), "a non-zero list of 3 numbers"),
+    'size': (lambda v: is_vector(v) and len(v) in (2, 3), "a list of 2 or 3 numbers"),
+    'pass_band': (lambda v: is_vector(v, 2) and v[0] <= v[1], "a [low, high] pair"),
+    'sensor_size': (lambda v: is_vector(v, 2) and all(int(n) == n and n > 0 for n in v),
+                    "a list of 2 positive integers"),
+    'split_ratio': (lambda v: is_number(v) and 0 <= v <= 1, "a number between 0 and 1"),
+    'transmission': (is_curve, "a [wavelengths, values] table with values between 0 and 1"),
+    'reflection': (is_curve, "a [wavelengths, values] table with values between 0 and 1"),
+    'psf_radius': (lambda v: isinstance(v, (int, np.integer)) and v > 0, "a positive integer"),
+    'dtype': (lambda v: v in [np.dtype(t).name for t in Camera.IMAGE_DTYPES],
+              "one of " + ", ".join(np.dtype(t).name for t in Camera.IMAGE_DTYPES)),
+    'accumulate_mode': (lambda v: v in Camera.ACCUMULATE_MODES, "one of " + ", ".join(Camera.ACCUMULATE_MODES)),
+    'is_on': (lambda v: isinstance(v, bool), "true or false"),
+    'detector': (lambda v: isinstance(v, dict) and all(is_number(x) for x in v.values()),
+                 "a table of numbers"),
+}
+
+def validate_scene(scene):
+    """Raise ValueError naming every problem in a scene dict."""
+    errors = []
+    if not isinstance(scene, dict):
+        raise ValueError("Scene must be a mapping with a 'components' list")
+    unknown = set(scene) - {'mode', 'components'}
+    if unknown:
+        errors.append(f"unknown scene keys: {', '.join(sorted(unknown))}")
+    if scene.get('mode', 'TIRF') not in MODES:
+        errors.append(f"mode: expected one of {', '.join(MODES)}")
+    components = scene.get('components')
+    if not isinstance(components, list):
+        errors.append("components: expected a list")
+        components = []
+
+    detector_fields = set(inspect.signature(DetectorModel.__init__).parameters) - {'self'}
+    for index, entry in enumerate(components):
+        where = f"components[{index}]"
+        if not isinstance(entry, dict) or entry.get('type') not in COMPONENT_TYPES:
+            errors.append(f"{where}.type: expected one of {', '.join(COMPONENT_TYPES)}")
+            continue
+        fields = constructor_fields(entry['type'])
+        allowed = {name for name, _ in fields} | set(EXTRA_FIELDS.get(entry['type'], ())) | {'type', 'is_on'}
+        for name, required in fields:
+            if required and name not in entry:
+                errors.append(f"{where}.{name}: missing")
+        for name, value in entry.items():
+            if name == 'type':
+                continue
+            if name not in allowed:
+                errors.append(f"{where}.{name}: not a {entry['type']} field")
+                continue
+            check, expected = FIELD_CHECKS.get(name, (is_number, "a number"))
+            if not check(value):
+                errors.append(f"{where}.{name}: expected {expected}")
+            elif name == 'detector' and set(value) - detector_fields:
+                errors.append(f"{where}.detector: unknown fields {', '.join(sorted(set(value) - detector_fields))}")
+    if errors:
+        raise ValueError("Invalid scene: " + "; ".join(errors))
+
+def build_microscope(scene):
+    """Build a Microscope from a scene dict."""
+    microscope = Microscope()
+    microscope.set_mode(scene.get('mode', 'TIRF'))
+    for entry in scene['components']:
+        entry = dict(entry)
+        component_type = entry.pop('type')
+        if component_type not in COMPONENT_TYPES:
+            raise ValueError(f"Unknown component type: {component_type}")
+        is_on = entry.pop('is_on', True)
+        extras = {name: entry.pop(name) for name in EXTRA_FIELDS.get(component_type, ()) if name in entry}
+        component = COMPONENT_TYPES[component_type](**entry)
+        if 'angle_x' in extras or 'angle_y' in extras:
+            component.set_angles(np.radians(extras.pop('angle_x', 0)), np.radians(extras.pop('angle_y', 0)))
+        if 'detector' in extras:
+            component.detector = DetectorModel(**extras.pop('detector'))
+        for name, value in extras.items():
+            setattr(component, name, value)
+        if not is_on:
+            component.turn_off()
+        microscope.add_component(component)
+    return microscope
+
+def plain(value):
+    # numpy values to JSON/YAML/TOML friendly ones
+    if isinstance(value, (np.ndarray, tuple, list)):
+        return [plain(v) for v in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, TransmissionCurve):
+        return value.to_table()
+    return value
+
+def scene_from_microscope(microscope):
+    """The scene dict describing a Microscope's mode and components."""
+    components = []
+    for component in microscope.components:
+        component_type = type(component).__name__
+        if component_type not in COMPONENT_TYPES:
+            raise ValueError(f"Cannot save component type: {component_type}")
+        entry = {'type': component_type}
+        for name, _ in constructor_fields(component_type):
+            value = component.image.dtype.name if name == 'dtype' else getattr(component, name)
+            if value is not None:  # Optional fields left unset are omitted
+                entry[name] = plain(value)
+        if isinstance(component, Laser):
+            entry['angle_x'] = float(np.degrees(component.angle_x))
+            entry['angle_y'] = float(np.degrees(component.angle_y))
+        if isinstance(component, Camera):
+            for name in ('accumulate_mode', 'pixel_pitch', 'psf_sigma', 'psf_radius'):
+                entry[name] = plain(getattr(component, name))
+            if component.detector is not None:
+                entry['detector'] = {k: plain(v) for k, v in vars(component.detector).items()}
+        if not component.is_on:
+            entry['is_on'] = False
+        components.append(entry)
+    return {'mode': microscope.mode, 'components': components}
+
+def scene_format(path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in SCENE_FORMATS:
+        raise ValueError(f"Unknown scene file type: {extension or path}")
+    return SCENE_FORMATS[extension]
+
+def parse_scene(text, file_format):
+    if file_format == 'json':
+        return json.loads(text)
+    if file_format == 'yaml':
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Reading YAML scenes needs PyYAML")
+        return yaml.safe_load(text)
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        import tomli as tomllib
+    return tomllib.loads(text)
+
+def dump_scene(scene, file_format):
+    if file_format == 'json':
+        return json.dumps(scene, indent=2)
+    if file_format == 'yaml':
+        try:
+            import yaml
+        except ImportError:
+            raise ValueError("Writing YAML scenes needs PyYAML")
+        return yaml.safe_dump(scene, sort_keys=False)
+    return dump_toml(scene)
+
+def toml_value(value):
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, list):
+        return '[' + ', '.join(toml_value(v) for v in value) + ']'
+    if isinstance(value, str):
+        return json.dumps(value)
+    return repr(value)
+
+def dump_toml(scene):
+    # Enough TOML for scenes: top-level keys and [[components]] with one level of tables
+    lines = [f"mode = {toml_value(scene.get('mode', 'TIRF'))}"]
+    for entry in scene['components']:
+        lines += ['', '[[components]]']
+        tables = {k: v for k, v in entry.items() if isinstance(v, dict)}
+        lines += [f"{k} = {toml_value(v)}" for k, v in entry.items() if k not in tables]
+        for name, table in tables.items():
+            lines.append(f"[components.{name}]")
+            lines += [f"{k} = {toml_value(v)}" for k, v in table.items()]
+    return '\n'.join(lines) + '\n'
+
+def read_scene_file(path, cache_dir=None):
+    """Read and validate a scene file, returning the scene dict.
+
+    Each scene file is compiled once into a cache file under cache_dir
+    (default: default_cache_dir(), private to the user) holding the
+    validated scene and the pickled Microscope built from it. Unchanged
+    scenes then load without parsing, validating or constructing
+    components. The cache file is named by a digest of the file's
+    contents, CACHE_VERSION and the source of the classes it pickles, so
+    a changed scene or a changed package never opens an old pickle.
+    Loading a pickle can run code, so on POSIX a cache file is only read
+    if it belongs to the user and no one else can write to it.
+    cache_dir=False disables it.
+    """
+    return load_compiled_scene(path, cache_dir, with_microscope=False)[0]
+
+def load_scene(path, cache_dir=None):
+    return load_compiled_scene(path, cache_dir, with_microscope=True)[1]
+
+@functools.lru_cache(maxsize=4)
+def code_digest(packages=COMPILED_PACKAGES):
+    # sha1 of the modules in packages, by default those whose objects go into compiled scenes
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    h = hashlib.sha1()
+    for package in packages:
+        directory = os.path.join(root, package)
+        for name in sorted(os.listdir(directory)):
+            if name.endswith('.py'):
+                h.update(name.encode())
+                with open(os.path.join(directory, name), 'rb') as f:
+                    h.update(f.read())
+    return h.hexdigest()
+
+def default_cache_dir():
+    """Per-user directory for compiled scenes: $XDG_CACHE_HOME/tirf_sim/scenes, or ~/.cache/...
+
+    %LOCALAPPDATA% is used instead of ~/.cache on Windows. Compiled scenes
+    are pickles, so they are never kept next to a possibly shared scene.
+    """
+    base = os.environ.get('XDG_CACHE_HOME') or (os.name == 'nt' and os.environ.get('LOCALAPPDATA'))
+    return os.path.join(base or os.path.join(os.path.expanduser('~'), '.cache'), 'tirf_sim', 'scenes')
+
+def load_compiled_scene(path, cache_dir=None, with_microscope=True):
+    # (scene, microscope) from the cache, or compiled and cached
+    with open(path, 'rb') as f:
+        source = f.read()
+    cache_path = None
+    if cache_dir is not False:
+        cache_dir = cache_dir or default_cache_dir()
+        key = hashlib.sha1(f"{CACHE_VERSION}:{code_digest()}:".encode() + source).hexdigest()
+        # Scene files of the same name in different directories get their own entries
+        location = hashlib.sha1(os.path.abspath(path).encode()).hexdigest()
+        cache_path = os.path.join(cache_dir, f"{os.path.basename(path)}.{location[:8]}.{key[:16]}.pickle")
+        cached = read_compiled_scene(cache_path, with_microscope)
+        if cached is not None:
+            return cached
+
+    scene = parse_scene(source.decode('utf-8'), scene_format(path))
+    validate_scene(scene)
+    microscope = build_microscope(scene)
+    if cache_path is not None:
+        write_compiled_scene(cache_path, scene, microscope)
+    return scene, microscope
+
+def write_compiled_scene(cache_path, scene, microscope):
+    # Replace any earlier compiled versions of the same scene file
+    cache_dir, name = os.path.split(cache_path)
+    prefix = name.rsplit('.', 2)[0] + '.'
+    temporary = None
+    try:
+        os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+        for old in os.listdir(cache_dir):
+            if old.startswith(prefix) and old.endswith('.pickle') and len(old) == len(name) and old != name:
+                os.remove(os.path.join(cache_dir, old))
+        # A new file readable by this user only, renamed into place, so
+        # an existing file of someone else's is replaced, not written to
+        import tempfile
+        fd, temporary = tempfile.mkstemp(dir=cache_dir, suffix='.pickle.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            # The scene and microscope are separate pickles so that
+            # read_scene_file can stop after the first
+            pickle.dump(scene, f, protocol=pickle.HIGHEST_PROTOCOL)
+            pickle.dump(microscope, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, cache_path)
+    except OSError as e:
+        logger.warning("Could not cache scene %s: %s", cache_path, e)
+        if temporary is not None and os.path.exists(temporary):
+            os.remove(temporary)
+
+def read_compiled_scene(cache_path, with_microscope):
+    try:
+        with open(cache_path, 'rb') as f:
+            if not is_private(os.fstat(f.fileno())):
+                logger.warning("Ignoring scene cache %s: not owned by this user or writable by others",
+                               cache_path)
+                return None
+            scene = pickle.load(f)
+            return scene, pickle.load(f) if with_microscope else None
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        # A damaged cache is rebuilt from the scene file
+        logger.debug("Ignoring scene cache %s: %s", cache_path, e)
+        return None
+
+def is_private(stat):
+    # On POSIX: owned by this user and not writable by group or others
+    if not hasattr(os, 'getuid'):
+        return True
+    return stat.st_uid == os.getuid() and not stat.st_mode & 0o022
+
+def save_scene(scene, path):
+    """Write a scene dict or Microscope to path in the format its extension names."""
+    if isinstance(scene, Microscope):
+        scene = scene_from_microscope(scene)
+    validate_scene(scene)
+    with open(path, 'w') as f:
+        f.write(dump_scene(scene, scene_format(path)))
@@ -0,0 +1,226 @@
+# tirf_sim/microscope/tracer.py
+
+import numpy as np
+from ..optical_components import Laser, RayBatch
+from ..utils.bvh import BVH
+from ..logger import logger
+
+class SequentialTracer:
+    """Nearest-hit ray tracer over a set of optical components.
+
+    Each bounce finds the nearest component aperture along every ray,
+    moves the ray origins onto it and hands them to the component's
+    interact_with_light_batch; every ray a component emits, including both
+    BeamSplitter branches, is traced further. Component apertures are
+    indexed in a BVH so each bounce costs roughly O(log n) per ray in the
+    number of components. Lasers and components that are off are ignored.
+    """
+
+    def __init__(self, max_depth=32, max_rays=100000, use_bvh=True, leaf_size=4):
+        self.max_depth = max_depth
+        self.max_rays = max_rays
+        self.use_bvh = use_bvh
+        self.leaf_size = leaf_size
+        self.components = []
+        self.bvh = None
+        self._index_key = None
+        self.source = None
+        self.levels = []
+        self._versions = {}
+        self.retraced_from = None
+
+    def update_index(self, components):
+        # Rebuild only when the set of components or their geometry changed
+        components = [c for c in components if c.is_on and not isinstance(c, Laser)]
+        key = [(c, c.geometry, c.get_aperture_radius()) for c in components]
+        if self._index_key is not None and len(key) == len(self._index_key) and all(
+                a[0] is b[0] and a[1] is b[1] and a[2] == b[2] for a, b in zip(key, self._index_key)):
+            return
+        self.components = components
+        self._index_key = key
+        if self.use_bvh and components:
+            bounds = [c.get_aperture_bounds() for c in components]
+            # Pad so flat apertures still have a volume to hit
+            lower = np.array([b[0] for b in bounds]) - 1e-6
+            upper = np.array([b[1] for b in bounds]) + 1e-6
+            self.bvh = BVH(lower, upper, self.leaf_size)
+        else:
+            self.bvh = None
+
+    def nearest_hits(self, batch):
+        """Distance to and index of the nearest component for each ray.
+
+        Rays that hit nothing within their length get np.inf and -1.
+        """
+        # Start from the ray lengths so the BVH prunes beyond them
+        best_t = batch.lengths.astype(float)
+        best_component = np.full(len(batch), -1)
+
+        def visit(items, rays):
+            sub_batch = batch[rays]
+            for item in items:
+                t = self.components[item].intersect_batch(sub_batch)
+                closer = t < best_t[rays]
+                best_t[rays[closer]] = t[closer]
+                best_component[rays[closer]] = item
+
+        if self.bvh is not None:
+            self.bvh.traverse(batch.origins, batch.directions, best_t, visit)
+        elif self.components:
+            visit(range(len(self.components)), np.arange(len(batch)))
+        best_t[best_component < 0] = np.inf
+        return best_t, best_component
+
+    def trace(self, components, batch):
+        """Trace a RayBatch through the components.
+
+        Returns every traced segment as a RayBatch whose lengths run to the
+        next hit, or keep the ray's own length for rays that escape.
+
+        Results are kept between calls. If the source rays are the same and
+        no component's version changed, the previous segments are returned
+        as they are; otherwise tracing restarts at the first bounce whose
+        rays hit, or now reach, a changed component. Detector images are
+        cleared and rebuilt whenever anything is re-traced. retraced_from
+        holds the restart bounce, or None if nothing was re-traced.
+        """
+        self.update_index(components)
+        versions = {c: c.version for c in self.components}
+        start = self.first_affected_level(batch, versions)
+        self._versions = versions
+        self.retraced_from = start
+        if start is None:
+            return RayBatch.concatenate([level.segments for level in self.levels])
+
+        if start == 0:
+            self.source = batch[:]
+        self.levels = self.levels[:start]
+        for component in components:
+            if component.is_detector:
+                component.clear_image()
+        # Earlier bounces are unchanged; only redeliver their detector hits
+        for level in self.levels:
+            for component, rays in level.detector_hits:
+                component.interact_with_light_batch(rays)
+
+        active = self.levels[-1].emitted if self.levels else self.source
+        for depth in range(start, self.max_depth):
+            if not len(active):
+                break
+            level = self.trace_level(active)
+            self.levels.append(level)
+            active = level.emitted
+
+            if len(active) > self.max_rays:
+                logger.warning("Ray count %d exceeds max_rays; dropping %d rays",
+                               len(active), len(active) - self.max_rays)
+                active = level.emitted = active[:self.max_rays]
+        else:
+            if len(active):
+                logger.warning("Stopped tracing %d rays at max_depth %d", len(active), self.max_depth)
+
+        return RayBatch.concatenate([level.segments for level in self.levels])
+
+    def trace_level(self, active):
+        # One bounce: find the nearest hits and let each component respond
+        t, hit_component = self.nearest_hits(active)
+        hit = hit_component >= 0
+        level = TraceLevel(active, t, hit_component, self.components)
+        level.segments = RayBatch(active.origins, active.directions, active.wavelengths,
+                                  np.where(hit, t, active.lengths), active.intensities)
+
+        emitted = []
+        for component, rays in self.hits_by_component(active, t, hit_component):
+            emitted.append(component.interact_with_light_batch(rays))
+            if component.is_detector:
+                level.detector_hits.append((component, rays))
+        level.emitted = RayBatch.concatenate(emitted)
+        return level
+
+    def hits_by_component(self, active, t, hit_component):
+        # (component, rays moved onto their hit points) for each component hit
+        for item in np.unique(hit_component[hit_component >= 0]):
+            on_component = hit_component == item
+            rays = active[on_component]
+            hit_points = rays.origins + t[on_component][:, np.newaxis] * rays.directions
+            yield self.components[item], RayBatch(hit_points, rays.directions, rays.wavelengths, rays.lengths,
+                                                  rays.intensities)
+
+    def propagate(self, components, batch, on_detector, keep_segments=False):
+        """Trace a RayBatch without keeping results or changing detector images.
+
+        Rays reaching a detector are handed to on_detector(component, rays)
+        at their hit points instead of to the detector. Nothing is cached,
+        so memory use is bounded by the batch, which suits streaming Monte
+        Carlo photons through the path a chunk at a time. With
+        keep_segments, returns the traced segments as trace() does.
+        """
+        self.update_index(components)
+        active = batch
+        segments = []
+        for depth in range(self.max_depth):
+            if not len(active):
+                break
+            t, hit_component = self.nearest_hits(active)
+            if keep_segments:
+                segments.append(RayBatch(active.origins, active.directions, active.wavelengths,
+                                         np.where(hit_component >= 0, t, active.lengths), active.intensities))
+            emitted = []
+            for component, rays in self.hits_by_component(active, t, hit_component):
+                if component.is_detector:
+                    on_detector(component, rays)
+                else:
+                    emitted.append(component.interact_with_light_batch(rays))
+            active = RayBatch.concatenate(emitted)
+        else:
+            if len(active):
+                logger.warning("Stopped tracing %d rays at max_depth %d", len(active), self.max_depth)
+        return RayBatch.concatenate(segments) if keep_segments else None
+
+    def first_affected_level(self, batch, versions):
+        # Index of the first bounce that must be re-traced, None if none
+        if not self.levels or not self.same_source(batch):
+            return 0
+        changed = [c for c in set(versions) | set(self._versions)
+                   if versions.get(c) != self._versions.get(c)]
+        if not changed:
+            return None
+
+        for depth, level in enumerate(self.levels):
+            affected = np.zeros(len(level.rays), dtype=bool)
+            for component in changed:
+                # Rays that used to hit the component, or now reach it first
+                index = next((i for i, c in enumerate(level.components) if c is component), None)
+                if index is not None:
+                    affected |= level.hit_component == index
+                if component in versions:
+                    affected |= component.intersect_batch(level.rays) < level.t
+            if affected.any():
+                return depth
+        return None
+
+    def same_source(self, batch):
+        return (len(batch) == len(self.source) and
+                all(np.array_equal(getattr(batch, name), getattr(self.source, name))
+                    for name in ('origins', 'directions', 'wavelengths', 'lengths', 'intensities')))
+
+    def clear(self, components=()):
+        """Drop cached results and clear detector images."""
+        had_results = bool(self.levels)
+        self.levels = []
+        self._versions = {}
+        for component in components:
+            if component.is_detector:
+                component.clear_image()
+        return had_results
+
+class TraceLevel:
+    # Cached results of one bounce
+    def __init__(self, rays, t, hit_component, components):
+        self.rays = rays
+        self.t = t
+        self.hit_component = hit_component
+        self.components = components
+        self.segments = None
+        self.emitted = None
+        self.detector_hits = []
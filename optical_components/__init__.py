@@ -1,4 +1,4 @@
-from .base import OpticalComponent, Ray
+from .base import OpticalComponent, Ray, RayBatch
 from .laser import Laser
 from .mirror import Mirror
 from .lens import Lens
@@ -6,5 +6,8 @@ from .beam_splitter import BeamSplitter
 from .filter import Filter
 from .objective import Objective
 from .camera import Camera
+from .detector import DetectorModel
+from .spectrum import TransmissionCurve
 
-__all__ = ['OpticalComponent', 'Ray', 'Laser', 'Mirror', 'Lens', 'BeamSplitter', 'Filter', 'Objective', 'Camera']
+__all__ = ['OpticalComponent', 'Ray', 'RayBatch', 'Laser', 'Mirror', 'Lens', 'BeamSplitter', 'Filter', 'Objective',
+           'Camera', 'DetectorModel', 'TransmissionCurve']
@@ -1,16 +1,121 @@
 import numpy as np
-from ..utils.vector_math import normalize
+from ..utils.vector_math import normalize, normalize_rows, ray_plane_intersection
+
+class GeometryFrame:
+    """Constant geometry of a component, derived from position and orientation.
+
+    normal is the reflecting surface normal used by mirrors and beam
+    splitters; local_x, local_y and orientation form the local frame used
+    by sensors. rotation maps world offsets into that frame.
+    """
+
+    def __init__(self, position, orientation):
+        normal = np.cross(orientation, [0, 1, 0])
+        if np.allclose(normal, 0):
+            normal = np.array([0, 0, 1])  # Default normal if cross product is zero
+        else:
+            normal = normalize(normal)
+        self.normal = normal
+        self.local_x = np.cross(orientation, [0, 0, 1])
+        self.local_y = np.cross(self.local_x, orientation)
+        self.rotation = np.array([self.local_x, self.local_y, orientation])
+        self.position = position
+
+    def to_local(self, points):
+        # (N, 3) world points to (N, 3) local coordinates
+        return (points - self.position) @ self.rotation.T
 
 class OpticalComponent:
+    is_detector = False  # Detectors keep an image built up from the rays they receive
+
     def __init__(self, position, orientation):
-        self.position = np.array(position)
-        self.orientation = normalize(np.array(orientation))
+        self._version = 0
+        self._geometry = None
+        self.position = position
+        self.orientation = orientation
         self.is_on = True
         self.size = (20, 20)  # Default size for schematic view
 
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            # Any public attribute assignment marks the component as changed
+            super().__setattr__('_version', self._version + 1)
+
+    @property
+    def version(self):
+        # Increases whenever a public attribute is assigned, so callers can
+        # tell whether a component changed since they last looked at it
+        return self._version
+
+    # position and orientation are stored read-only so they can only be
+    # changed by assignment, which invalidates the cached geometry
+    @property
+    def position(self):
+        return self._position
+
+    @position.setter
+    def position(self, value):
+        position = np.array(value)
+        position.setflags(write=False)
+        self._position = position
+        self.invalidate_geometry()
+
+    @property
+    def orientation(self):
+        return self._orientation
+
+    @orientation.setter
+    def orientation(self, value):
+        orientation = normalize(np.array(value))
+        orientation.setflags(write=False)
+        self._orientation = orientation
+        self.invalidate_geometry()
+
+    @property
+    def geometry(self):
+        if self._geometry is None:
+            self._geometry = self.compute_geometry()
+        return self._geometry
+
+    def compute_geometry(self):
+        return GeometryFrame(self.position, self.orientation)
+
+    def invalidate_geometry(self):
+        self._geometry = None
+
     def interact_with_light(self, ray):
+        # Single-ray API is a thin wrapper over the batched path
+        return self.interact_with_light_batch(RayBatch.from_rays([ray])).to_rays()
+
+    def interact_with_light_batch(self, batch):
+        # Rays interact at their origins; the tracer moves each ray's origin
+        # to its hit point on the component before calling this
         raise NotImplementedError("Subclass must implement abstract method")
 
+    def get_aperture_radius(self):
+        return max(self.size) / 2
+
+    def get_aperture_normal(self):
+        return self.orientation
+
+    def get_aperture_bounds(self):
+        # Axis-aligned bounding box of the aperture disc
+        normal = self.get_aperture_normal()
+        extent = self.get_aperture_radius() * np.sqrt(np.clip(1 - normal**2, 0, 1))
+        return self.position - extent, self.position + extent
+
+    def intersect_batch(self, batch, min_t=1e-6):
+        """Distance along each ray to the aperture disc, np.inf where it misses.
+
+        min_t skips the surface a ray has just left.
+        """
+        t = ray_plane_intersection(batch.origins, batch.directions, self.position, self.get_aperture_normal())
+        hit = (t > min_t) & (t <= batch.lengths)
+        points = batch.origins + np.where(hit, t, 0)[:, np.newaxis] * batch.directions
+        hit &= np.sum((points - self.position)**2, axis=1) <= self.get_aperture_radius()**2
+        return np.where(hit, t, np.inf)
+
     def get_schematic_representation(self):
         return ('rectangle', self.position[:2], self.orientation[:2], self.size)
 
@@ -21,8 +126,86 @@ class OpticalComponent:
         self.is_on = False
 
 class Ray:
-    def __init__(self, origin, direction, wavelength, length=1000):
+    def __init__(self, origin, direction, wavelength, length=1000, intensity=1.0):
         self.origin = np.array(origin)
         self.direction = normalize(np.array(direction))
         self.wavelength = wavelength
         self.length = length
+        self.intensity = intensity
+
+class RayBatch:
+    """N rays stored as contiguous arrays (struct-of-arrays).
+
+    origins and directions are (N, 3); wavelengths, lengths and
+    intensities are (N,). A single origin/direction or scalar
+    values are broadcast to N.
+    """
+
+    def __init__(self, origins, directions, wavelengths, lengths=1000, intensities=1.0):
+        origins = np.asarray(origins, dtype=float)
+        directions = np.asarray(directions, dtype=float)
+        n = len(origins) if origins.ndim == 2 else len(np.atleast_2d(directions))
+        self.origins = np.ascontiguousarray(np.broadcast_to(origins, (n, 3)))
+        directions = np.broadcast_to(directions, (n, 3))
+        self.directions = np.ascontiguousarray(normalize_rows(directions))
+        self.wavelengths = np.ascontiguousarray(np.broadcast_to(np.asarray(wavelengths, dtype=float), (n,)))
+        self.lengths = np.ascontiguousarray(np.broadcast_to(np.asarray(lengths, dtype=float), (n,)))
+        self.intensities = np.ascontiguousarray(np.broadcast_to(np.asarray(intensities, dtype=float), (n,)))
+
+    def __len__(self):
+        return len(self.origins)
+
+    def __getitem__(self, index):
+        # Index or boolean mask; always returns a RayBatch. The arrays are
+        # already validated, so skip __init__
+        index = np.atleast_1d(np.arange(len(self))[index])
+        batch = RayBatch.__new__(RayBatch)
+        batch.origins = self.origins[index]
+        batch.directions = self.directions[index]
+        batch.wavelengths = self.wavelengths[index]
+        batch.lengths = self.lengths[index]
+        batch.intensities = self.intensities[index]
+        return batch
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0))
+
+    @classmethod
+    def from_rays(cls, rays):
+        if not rays:
+            return cls.empty()
+        return cls(np.array([ray.origin for ray in rays], dtype=float),
+                   np.array([ray.direction for ray in rays], dtype=float),
+                   np.array([ray.wavelength for ray in rays], dtype=float),
+                   np.array([ray.length for ray in rays], dtype=float),
+                   np.array([getattr(ray, 'intensity', 1.0) for ray in rays], dtype=float))
+
+    @classmethod
+    def concatenate(cls, batches):
+        batches = [batch for batch in batches if len(batch)]
+        if not batches:
+            return cls.empty()
+        return cls(np.concatenate([b.origins for b in batches]),
+                   np.concatenate([b.directions for b in batches]),
+                   np.concatenate([b.wavelengths for b in batches]),
+                   np.concatenate([b.lengths for b in batches]),
+                   np.concatenate([b.intensities for b in batches]))
+
+    def with_spectrum(self, wavelengths, weights=None):
+        """Spectral bundle: every ray repeated once per wavelength.
+
+        Rays stay in order, each followed by its copies at the other
+        wavelengths; intensities are multiplied by the matching weights.
+        """
+        wavelengths = np.asarray(wavelengths, dtype=float).ravel()
+        weights = np.broadcast_to(1.0 if weights is None else np.asarray(weights, dtype=float), wavelengths.shape)
+        count = len(wavelengths)
+        return RayBatch(np.repeat(self.origins, count, axis=0), np.repeat(self.directions, count, axis=0),
+                        np.tile(wavelengths, len(self)), np.repeat(self.lengths, count),
+                        np.repeat(self.intensities, count) * np.tile(weights, len(self)))
+
+    def to_rays(self):
+        return [Ray(self.origins[i], self.directions[i], self.wavelengths[i].item(),
+                    self.lengths[i].item(), self.intensities[i].item())
+                for i in range(len(self))]
@@ -1,22 +1,35 @@
-from .base import OpticalComponent, Ray
-from typing import List, Tuple
+from .base import OpticalComponent, RayBatch
+from .spectrum import TransmissionCurve
+from typing import Tuple
 import numpy as np
-from ..utils.vector_math import reflect, normalize
+from ..utils.vector_math import reflect_rows
 
 class BeamSplitter(OpticalComponent):
     def __init__(self, position: Tuple[float, float, float], orientation: Tuple[float, float, float],
-                 split_ratio: float):
+                 split_ratio: float, reflection=None):
         super().__init__(position, orientation)
-        self.split_ratio = split_ratio
+        self.split_ratio = split_ratio  # Fraction of the intensity reflected
+        # A TransmissionCurve of reflectance against wavelength makes this a dichroic
+        self.reflection = TransmissionCurve.as_curve(reflection)
 
-    def interact_with_light(self, ray: Ray) -> List[Ray]:
-        normal = np.cross(self.orientation, [0, 1, 0])
-        normal = normalize(normal)
+    def get_aperture_normal(self):
+        return self.geometry.normal
 
-        reflected_direction = reflect(ray.direction, normal)
-        transmitted_direction = ray.direction
+    def get_reflectance(self, wavelengths):
+        if self.reflection is None:
+            return np.full(len(wavelengths), float(self.split_ratio))
+        return self.reflection(wavelengths)
 
-        return [
-            Ray(self.position, reflected_direction, ray.wavelength),
-            Ray(self.position, transmitted_direction, ray.wavelength)
-        ]
+    def interact_with_light_batch(self, batch: RayBatch) -> RayBatch:
+        reflectance = self.get_reflectance(batch.wavelengths)
+        reflected = batch.intensities * reflectance
+        transmitted = batch.intensities * (1 - reflectance)
+        r = reflected > 0
+        t = transmitted > 0
+
+        # Reflected rays first, then transmitted rays; branches carrying no light are dropped
+        return RayBatch.concatenate([
+            RayBatch(batch.origins[r], reflect_rows(batch.directions[r], self.geometry.normal),
+                     batch.wavelengths[r], intensities=reflected[r]),
+            RayBatch(batch.origins[t], batch.directions[t], batch.wavelengths[t], intensities=transmitted[t])
+        ])
@@ -1,88 +1,445 @@
 # tirf_sim/optical_components/camera.py
 
-from .base import OpticalComponent
+from .base import OpticalComponent, RayBatch
+import math
+import time
+from collections import OrderedDict
 import numpy as np
-from scipy.stats import multivariate_normal
-from ..logger import logger
+from ..utils.vector_math import ray_plane_intersection
+from ..logger import logger, debug_enabled
 
 class Camera(OpticalComponent):
-    def __init__(self, position, orientation, sensor_size=(1000, 1000)):  # Increased from (100, 100)
+    is_detector = True
+    ACCUMULATE_MODES = ('max', 'add')
+    IMAGE_DTYPES = (np.float32, np.float64, np.uint16)
+    SPLAT_CHUNK_ELEMENTS = 2**21  # Spot pixels rendered per vectorized pass
+    IMAGING_METHODS = ('auto', 'direct', 'fft')
+    FFT_MAX_SUPERSAMPLE = 4  # Grid nodes per pixel along each axis for the FFT path
+    # Relative cost of the FFT path: per emitter, and per grid node and
+    # log2(node count), in units of one splatted spot pixel
+    FFT_EMITTER_COST = 3
+    FFT_NODE_COST = 0.15
+    # PSF settings kept per camera; sweeping NA or wavelength evicts the
+    # least recently used. A transfer function is the size of the padded,
+    # supersampled sensor, so only a couple are kept.
+    MAX_PSF_KERNEL_TABLES = 16
+    MAX_PSF_TRANSFER_FUNCTIONS = 2
+
+    def __init__(self, position, orientation, sensor_size=(1000, 1000), dtype=np.float32):  # Increased from (100, 100)
         super().__init__(position, orientation)
+        if np.dtype(dtype) not in [np.dtype(t) for t in self.IMAGE_DTYPES]:
+            raise ValueError("Invalid camera image dtype")
         self.sensor_size = sensor_size
         self.size = (100, 100)  # Size for schematic representation
-        self.image = np.zeros(sensor_size)
+        self.image = np.zeros(sensor_size, dtype=dtype)  # Integer images saturate instead of wrapping
+        self._blank_image = None
         self.pixel_size = 1  # Increased from 0.1
+        self.psf_sigma = 5  # Increased from 1
+        self.psf_radius = 20  # Spot half-width in pixels
+        self.psf_subpixel = 8  # Sub-pixel shifts per pixel in the kernel table
+        self.accumulate_mode = 'max'
+        self.pixel_pitch = 16000  # Physical pixel size in nm, used when imaging a sample
+        self.detector = None  # DetectorModel applied by read_out
+        self._psf_kernel_tables = OrderedDict()
+        self._psf_transfer_functions = OrderedDict()
+        self._hit_count = 0  # Rays deposited and time spent, since take_deposit_stats
+        self._deposit_seconds = 0.0
+
+    def __getstate__(self):
+        # Pickle the settings only; the image and PSF caches are rebuilt
+        state = self.__dict__.copy()
+        image = state.pop('image')
+        state['_image_layout'] = (image.shape, image.dtype.str)
+        for name in ('_psf_kernel_tables', '_psf_transfer_functions', '_blank_image'):
+            state.pop(name, None)
+        return state
 
-    def interact_with_light(self, ray):
+    def __setstate__(self, state):
+        shape, dtype = state.pop('_image_layout')
+        self.__dict__.update(state)
+        self.__dict__['image'] = np.zeros(shape, dtype=dtype)
+        self.__dict__.update(_psf_kernel_tables=OrderedDict(), _psf_transfer_functions=OrderedDict(),
+                             _blank_image=None)
+
+    def interact_with_light_batch(self, batch):
         if not self.is_on:
-            return []
+            return RayBatch.empty()
 
-        intersection = self.ray_intersection(ray)
-        if intersection is not None:
-            x, y = intersection
-            logger.debug(f"Ray intersected camera at pixel coordinates: ({x:.2f}, {y:.2f})")
-            self.add_diffraction_spot(x, y)
-        else:
-            logger.debug("Ray did not intersect with camera sensor")
-        return []
+        hit, pixel_x, pixel_y = self.ray_intersection_batch(batch)
+        if debug_enabled():
+            logger.debug("%d of %d rays intersected camera sensor", int(hit.sum()), len(batch))
+        start = time.perf_counter()
+        self.add_diffraction_spots(pixel_x, pixel_y, batch.intensities[hit])
+        self._deposit_seconds += time.perf_counter() - start
+        self._hit_count += len(pixel_x)
+        return RayBatch.empty()
+
+    def take_deposit_stats(self):
+        """Rays deposited and seconds spent depositing since the last call."""
+        stats = (self._hit_count, self._deposit_seconds)
+        self._hit_count, self._deposit_seconds = 0, 0.0
+        return stats
+
+    def count_photons(self, batch, counts, scale=1):
+        """Add the intensities of rays hitting the sensor to counts, by pixel.
+
+        counts is a float array shaped like the image, or like the image
+        binned by scale x scale pixels (see binned_shape). Unlike
+        interact_with_light_batch no PSF is drawn: each ray lands in the
+        pixel it hits, as photons do.
+        """
+        hit, pixel_x, pixel_y = self.ray_intersection_batch(batch)
+        rows, cols = counts.shape
+        ix = np.floor(pixel_x / scale).astype(np.intp)
+        iy = np.floor(pixel_y / scale).astype(np.intp)
+        inside = (ix < cols) & (iy < rows)
+        counts += np.bincount(iy[inside] * cols + ix[inside], batch.intensities[hit][inside],
+                              minlength=rows * cols).reshape(rows, cols)
+
+    def sample_diffraction_spots(self, xs, ys, weights, photons, rng, counts, scale=1):
+        """Add a Monte Carlo estimate of diffraction spots to counts.
+
+        Each spot is photons samples from its Gaussian PSF, weighted so
+        the expected value of every pixel is the spot add_diffraction_spots
+        draws, 255 * weight at its centre. Overlapping spots add. counts is
+        shaped like binned_shape(scale) and gets the sum of each block.
+        """
+        rows, cols = self.image.shape
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), np.shape(xs))
+        if not len(weights) or photons < 1:
+            return
+        sigma = math.sqrt(self.psf_sigma)  # psf_sigma is the variance of the spot
+        dx = rng.normal(0, sigma, (len(weights), photons))
+        dy = rng.normal(0, sigma, (len(weights), photons))
+        # Pixel k is centred on coordinate k, as in the kernel table
+        px = np.floor(np.asarray(xs, dtype=float)[:, np.newaxis] + dx + 0.5).astype(np.intp)
+        py = np.floor(np.asarray(ys, dtype=float)[:, np.newaxis] + dy + 0.5).astype(np.intp)
+        keep = ((np.abs(dx) <= self.psf_radius) & (np.abs(dy) <= self.psf_radius) &
+                (px >= 0) & (px < cols) & (py >= 0) & (py < rows))
+        photon_weight = np.broadcast_to((255 * 2 * np.pi * self.psf_sigma / photons * weights)[:, np.newaxis],
+                                        keep.shape)
+        binned_rows, binned_cols = counts.shape
+        counts += np.bincount(py[keep] // scale * binned_cols + px[keep] // scale, photon_weight[keep],
+                              minlength=binned_rows * binned_cols).reshape(binned_rows, binned_cols)
+
+    def binned_shape(self, scale):
+        # Image shape with scale x scale pixels merged, keeping partial edge pixels
+        return tuple(-(-n // scale) for n in self.image.shape)
 
     def ray_intersection(self, ray):
-        plane_normal = self.orientation
-        plane_point = self.position
-
-        logger.debug(f"Camera position: {self.position}, orientation: {self.orientation}")
-        logger.debug(f"Ray origin: {ray.origin}, direction: {ray.direction}, length: {ray.length}")
-
-        denominator = np.dot(plane_normal, ray.direction)
-        if abs(denominator) > 1e-6:
-            t = np.dot(plane_normal, plane_point - ray.origin) / denominator
-            logger.debug(f"Intersection parameter t: {t}")
-            if 0 <= t <= ray.length:
-                intersection_point = ray.origin + t * ray.direction
-                logger.debug(f"Intersection point: {intersection_point}")
-                local_x = np.dot(intersection_point - self.position, self.get_local_x())
-                local_y = np.dot(intersection_point - self.position, self.get_local_y())
-                logger.debug(f"Local coordinates: x={local_x}, y={local_y}")
-                logger.debug(f"Sensor size: {self.sensor_size}, Pixel size: {self.pixel_size}")
-
-                if (0 <= local_x < self.sensor_size[0] * self.pixel_size and
-                    0 <= local_y < self.sensor_size[1] * self.pixel_size):
-                    pixel_x = local_x / self.pixel_size
-                    pixel_y = local_y / self.pixel_size
-                    logger.debug(f"Intersection at pixel: ({pixel_x}, {pixel_y})")
-                    return pixel_x, pixel_y
-                else:
-                    logger.debug("Intersection outside sensor area")
-            else:
-                logger.debug("Intersection beyond ray length")
-        else:
-            logger.debug("Ray is parallel to camera plane")
+        logger.debug("Camera position: %s, orientation: %s", self.position, self.orientation)
+        logger.debug("Ray origin: %s, direction: %s, length: %s", ray.origin, ray.direction, ray.length)
+
+        hit, pixel_x, pixel_y = self.ray_intersection_batch(RayBatch.from_rays([ray]))
+        if hit[0]:
+            logger.debug("Intersection at pixel: (%s, %s)", pixel_x[0], pixel_y[0])
+            return pixel_x[0], pixel_y[0]
+        logger.debug("Ray did not intersect with camera sensor")
         return None
 
+    def ray_intersection_batch(self, batch):
+        """Intersect a RayBatch with the sensor plane.
+
+        Returns a boolean hit mask over the batch and the pixel
+        coordinates of the rays that hit the sensor.
+        """
+        t, hit, local_x, local_y = self.sensor_intersection(batch)
+        return hit, local_x[hit] / self.pixel_size, local_y[hit] / self.pixel_size
+
+    def sensor_intersection(self, batch):
+        # Distance to the sensor plane, sensor hit mask and local coordinates
+        t = ray_plane_intersection(batch.origins, batch.directions, self.position, self.orientation)
+        # Allow for rounding when the tracer has moved origins onto the sensor
+        hit = (-1e-6 <= t) & (t <= batch.lengths)
+
+        intersection_points = batch.origins + np.where(hit, t, 0)[:, np.newaxis] * batch.directions
+        local_x, local_y = ((intersection_points - self.position) @ self.geometry.rotation[:2].T).T
+
+        hit &= ((0 <= local_x) & (local_x < self.sensor_size[0] * self.pixel_size) &
+                (0 <= local_y) & (local_y < self.sensor_size[1] * self.pixel_size))
+        return t, hit, local_x, local_y
+
+    def intersect_batch(self, batch, min_t=1e-6):
+        t, hit, _, _ = self.sensor_intersection(batch)
+        return np.where(hit & (t > min_t), t, np.inf)
+
+    def get_aperture_bounds(self):
+        # The sensor spans local x and y from the camera position
+        width = self.sensor_size[0] * self.pixel_size
+        height = self.sensor_size[1] * self.pixel_size
+        corners = np.array([self.position + a * width * self.get_local_x() + b * height * self.get_local_y()
+                            for a in (0, 1) for b in (0, 1)])
+        return corners.min(axis=0), corners.max(axis=0)
+
     def get_local_x(self):
-        return np.cross(self.orientation, [0, 0, 1])
+        return self.geometry.local_x
 
     def get_local_y(self):
-        return np.cross(self.get_local_x(), self.orientation)
+        return self.geometry.local_y
 
     def add_diffraction_spot(self, x, y):
-        # Create a 2D Gaussian to represent the diffraction-limited spot
-        sigma = 5  # Increased from 1
-        x_range = np.arange(max(0, int(x)-20), min(self.sensor_size[0], int(x)+21))
-        y_range = np.arange(max(0, int(y)-20), min(self.sensor_size[1], int(y)+21))
-        xx, yy = np.meshgrid(x_range, y_range)
-        gaussian = multivariate_normal.pdf(np.dstack((xx, yy)), mean=[x, y], cov=[[sigma, 0], [0, sigma]])
-
-        # Normalize and add to the image
-        gaussian_normalized = gaussian / gaussian.max() * 255
-        self.image[y_range[0]:y_range[-1]+1, x_range[0]:x_range[-1]+1] = np.maximum(
-            self.image[y_range[0]:y_range[-1]+1, x_range[0]:x_range[-1]+1],
-            gaussian_normalized
-        )
-        logger.debug(f"Added diffraction spot at ({x:.2f}, {y:.2f})")
+        self.add_diffraction_spots([x], [y])
+        logger.debug("Added diffraction spot at (%.2f, %.2f)", x, y)
+
+    def add_diffraction_spots(self, xs, ys, weights=None, mode=None, variance=None, radius=None,
+                              normalize='peak'):
+        """Deposit Gaussian diffraction-limited spots for arrays of hits.
+
+        With normalize='peak' each spot peaks at 255 * weight; with 'sum'
+        its pixels sum to weight, e.g. a photon count. mode is 'max' (keep
+        the brightest spot per pixel) or 'add' (accumulate); it defaults to
+        self.accumulate_mode. variance (pixels squared) and radius override
+        psf_sigma and psf_radius.
+        """
+        mode = mode or self.accumulate_mode
+        if mode not in self.ACCUMULATE_MODES:
+            raise ValueError("Invalid accumulate mode")
+        radius = self.psf_radius if radius is None else radius
+
+        xs = np.asarray(xs, dtype=float).ravel()
+        ys = np.asarray(ys, dtype=float).ravel()
+        weights = np.broadcast_to(1.0 if weights is None else np.asarray(weights, dtype=float), xs.shape)
+        if normalize == 'peak':
+            weights = 255 * weights
+
+        ix = np.floor(xs).astype(np.intp)
+        iy = np.floor(ys).astype(np.intp)
+        rows, cols = self.image.shape
+        # Spots more than a radius off the sensor touch no pixel
+        keep = (ix >= -radius) & (ix < cols + radius) & (iy >= -radius) & (iy < rows + radius)
+        if not keep.all():
+            xs, ys, ix, iy, weights = xs[keep], ys[keep], ix[keep], iy[keep], weights[keep]
+        if not len(xs):
+            return
+
+        # Splat onto a canvas over the spots' bounding box, padded by the
+        # radius so no spot needs clipping, then merge its on-sensor part
+        x0, y0 = ix.min() - radius, iy.min() - radius
+        width = ix.max() + radius + 1 - x0
+        height = iy.max() + radius + 1 - y0
+        canvas = np.zeros(height * width)
+        offsets = np.arange(-radius, radius + 1)
+        spot_index = (offsets[:, np.newaxis] * width + offsets).ravel()
+        corner_index = (iy - y0) * width + (ix - x0)
+
+        table = self.get_psf_kernel_table(variance, radius, normalize)
+        chunk_size = max(1, self.SPLAT_CHUNK_ELEMENTS // len(spot_index))
+        for start in range(0, len(xs), chunk_size):
+            chunk = slice(start, start + chunk_size)
+            # Pick the precomputed kernel for each sub-pixel shift
+            kx = table[np.rint((xs[chunk] - ix[chunk]) * self.psf_subpixel).astype(np.intp)]
+            ky = table[np.rint((ys[chunk] - iy[chunk]) * self.psf_subpixel).astype(np.intp)]
+            spots = ky[:, :, np.newaxis] * (kx * weights[chunk][:, np.newaxis])[:, np.newaxis, :]
+            flat_index = (corner_index[chunk][:, np.newaxis] + spot_index).ravel()
+            if mode == 'add':
+                canvas += np.bincount(flat_index, weights=spots.ravel(), minlength=canvas.size)
+            else:
+                np.maximum.at(canvas, flat_index, spots.ravel())
+
+        sx0, sy0 = max(x0, 0), max(y0, 0)
+        sx1, sy1 = min(x0 + width, cols), min(y0 + height, rows)
+        on_sensor = canvas.reshape(height, width)[sy0 - y0:sy1 - y0, sx0 - x0:sx1 - x0]
+        self.accumulate(self.image[sy0:sy1, sx0:sx1], on_sensor, mode)
+
+    def get_psf_kernel_table(self, variance=None, radius=None, normalize='peak'):
+        """1-D Gaussian kernels for every quantized sub-pixel shift.
+
+        Row k holds the kernel for a spot centred k / psf_subpixel pixels
+        past an integer position, normalized to a peak of 1, or integrated
+        over each pixel and normalized to a sum of 1 for normalize='sum'.
+        A 2-D spot is the outer product of two rows. Tables are cached per
+        PSF setting.
+        """
+        # psf_sigma is the variance of the spot, matching the original
+        # multivariate_normal covariance
+        variance = self.psf_sigma if variance is None else variance
+        radius = self.psf_radius if radius is None else radius
+        key = (variance, radius, self.psf_subpixel, normalize)
+        table = lru_get(self._psf_kernel_tables, key)
+        if table is None:
+            offsets = np.arange(-radius, radius + 1)
+            shifts = np.arange(self.psf_subpixel + 1) / self.psf_subpixel
+            distances = offsets[np.newaxis, :] - shifts[:, np.newaxis]
+            if normalize == 'peak':
+                table = np.exp(-distances ** 2 / (2 * variance))
+                table /= table.max(axis=1, keepdims=True)
+            else:
+                # Integrate over each pixel so narrow spots keep their flux
+                edges = np.vectorize(math.erf)((distances[..., np.newaxis] + [-0.5, 0.5]) /
+                                               np.sqrt(2 * variance))
+                table = edges[..., 1] - edges[..., 0]
+                table /= table.sum(axis=1, keepdims=True)
+            lru_put(self._psf_kernel_tables, key, table, self.MAX_PSF_KERNEL_TABLES)
+        return table
+
+    def render_spots(self, xs, ys, weights, variance, radius, method='auto', supersample=None):
+        """Add pixel-integrated Gaussian spots summing to weights, for imaging a sample.
+
+        method='direct' splats every spot with add_diffraction_spots;
+        method='fft' bins the emitters onto a grid and convolves it once
+        with the PSF (see convolve_spots). 'auto' picks whichever is
+        estimated to be cheaper for this many emitters.
+        """
+        if method not in self.IMAGING_METHODS:
+            raise ValueError("Invalid imaging method")
+        supersample = supersample or self.get_fft_supersample(variance)
+        if method == 'auto':
+            method = 'fft' if self.fft_is_faster(len(xs), radius, supersample) else 'direct'
+        if method == 'fft':
+            self.convolve_spots(xs, ys, weights, variance, radius, supersample)
+        else:
+            self.add_diffraction_spots(xs, ys, weights, mode='add', variance=variance, radius=radius,
+                                       normalize='sum')
+        return method
+
+    def get_fft_supersample(self, variance):
+        # About one grid node per PSF sigma, at least two per pixel
+        return int(min(self.FFT_MAX_SUPERSAMPLE, max(2, np.ceil(1 / np.sqrt(variance)))))
+
+    def fft_is_faster(self, count, radius, supersample):
+        nodes = np.prod(self.get_fft_grid_shape(radius, supersample))
+        direct_cost = count * (2 * radius + 1) ** 2
+        fft_cost = count * self.FFT_EMITTER_COST + self.FFT_NODE_COST * nodes * np.log2(nodes)
+        return fft_cost < direct_cost
+
+    def get_fft_grid_shape(self, radius, supersample):
+        # Padded by the spot radius on every side so the circular
+        # convolution never wraps a spot onto the sensor
+        rows, cols = self.image.shape
+        return tuple(next_fast_length((n + 2 * radius) * supersample) for n in (rows, cols))
+
+    def convolve_spots(self, xs, ys, weights, variance, radius, supersample=None):
+        """Add pixel-integrated Gaussian spots by FFT convolution.
+
+        Emitters are binned with linear weights onto a grid with
+        supersample nodes per pixel, convolved once with the PSF and summed
+        back into pixels, so the cost depends on the sensor size rather
+        than the number of emitters.
+        """
+        supersample = supersample or self.get_fft_supersample(variance)
+        rows, cols = self.image.shape
+        height, width = self.get_fft_grid_shape(radius, supersample)
+
+        # Node i sits at pixel coordinate (i + 0.5) / supersample - 0.5 - radius,
+        # so each pixel is covered by supersample nodes along each axis
+        grid_x = (np.asarray(xs, dtype=float).ravel() + 0.5 + radius) * supersample - 0.5
+        grid_y = (np.asarray(ys, dtype=float).ravel() + 0.5 + radius) * supersample - 0.5
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), grid_x.shape)
+        keep = (grid_x >= 0) & (grid_x < width - 1) & (grid_y >= 0) & (grid_y < height - 1)
+        grid_x, grid_y, weights = grid_x[keep], grid_y[keep], weights[keep]
+
+        x0 = grid_x.astype(np.intp)
+        y0 = grid_y.astype(np.intp)
+        fx = grid_x - x0
+        fy = grid_y - y0
+        index = y0 * width + x0
+        corners = np.concatenate([index, index + 1, index + width, index + width + 1])
+        corner_weights = np.concatenate([weights * (1 - fx) * (1 - fy), weights * fx * (1 - fy),
+                                         weights * (1 - fx) * fy, weights * fx * fy])
+        grid = np.bincount(corners, weights=corner_weights, minlength=height * width).reshape(height, width)
+
+        transfer = self.get_psf_transfer_function((height, width), variance, radius, supersample)
+        grid = np.fft.irfft2(np.fft.rfft2(grid) * transfer, s=(height, width))
+        start = radius * supersample
+        grid = grid[start:start + rows * supersample, start:start + cols * supersample]
+        self.accumulate(self.image, grid.reshape(rows, supersample, cols, supersample).sum(axis=(1, 3)), 'add')
+
+    def get_psf_transfer_function(self, shape, variance, radius, supersample):
+        """rfft2 of the PSF on the supersampled grid, cached per configuration.
+
+        The kernel is a Gaussian (variance in pixels squared) truncated at
+        radius pixels and normalized to sum to 1.
+        """
+        key = (shape, variance, radius, supersample)
+        transfer = lru_get(self._psf_transfer_functions, key)
+        if transfer is None:
+            # Linear binning spreads each emitter with a variance of
+            # 1 / (6 supersample^2) pixels squared; narrow the PSF to match
+            width = max(variance - 1 / (6 * supersample ** 2), 1e-6)
+            offsets = np.arange(-radius * supersample, radius * supersample + 1)
+            profile = np.exp(-(offsets / supersample) ** 2 / (2 * width))
+            profile /= profile.sum()
+            kernel = np.zeros(shape)
+            # Centre the kernel on node (0, 0), wrapping negative offsets
+            kernel[np.ix_(offsets % shape[0], offsets % shape[1])] = np.outer(profile, profile)
+            transfer = np.fft.rfft2(kernel)
+            lru_put(self._psf_transfer_functions, key, transfer, self.MAX_PSF_TRANSFER_FUNCTIONS)
+        return transfer
+
+    def set_accumulate_mode(self, mode):
+        if mode in self.ACCUMULATE_MODES:
+            self.accumulate_mode = mode
+        else:
+            raise ValueError("Invalid accumulate mode")
+
+    @staticmethod
+    def accumulate(target, values, mode):
+        # Merge float values into part of the image in place
+        if np.issubdtype(target.dtype, np.integer):
+            values = np.rint(values)
+            if mode == 'add':
+                values += target
+            np.clip(values, 0, np.iinfo(target.dtype).max, out=values)
+            if mode == 'add':
+                target[...] = values
+            else:
+                np.maximum(target, values, out=target, casting='unsafe')
+        elif mode == 'add':
+            target += values
+        else:
+            np.maximum(target, values, out=target)
 
     def get_image(self):
-        return self.image if self.is_on else np.zeros_like(self.image)
+        if self.is_on:
+            return self.image
+        # Shared read-only zeros instead of a new array per call
+        if self._blank_image is None or self._blank_image.shape != self.image.shape:
+            self._blank_image = np.zeros_like(self.image)
+            self._blank_image.flags.writeable = False
+        return self._blank_image
+
+    def get_display_image(self, out=None):
+        """The image clipped to 0..255 as a C-contiguous uint8 array.
+
+        Written into out when given, so callers can reuse a buffer.
+        """
+        if out is None:
+            out = np.empty(self.image.shape, dtype=np.uint8)
+        return np.clip(self.get_image(), 0, 255, out=out, casting='unsafe')
+
+    def read_out(self, seed=None, frame=0):
+        """Digitize the image, taken as expected photons per pixel.
+
+        Returns the image itself if no detector model is set.
+        """
+        if self.detector is None:
+            return self.get_image()
+        return self.detector.apply(self.get_image(), seed, frame)
 
     def clear_image(self):
         self.image.fill(0)
+
+def next_fast_length(n):
+    # Smallest 2^a 3^b 5^c >= n, a size numpy's FFT handles quickly
+    best = 2 ** int(np.ceil(np.log2(max(n, 1))))
+    power5 = 1
+    while power5 < best:
+        power35 = power5
+        while power35 < best:
+            size = power35 * 2 ** max(0, int(np.ceil(np.log2(n / power35))))
+            best = min(best, size)
+            power35 *= 3
+        power5 *= 5
+    return best
+
+def lru_get(cache, key):
+    # Entry of an OrderedDict used as an LRU, marked as most recently used; None if missing
+    value = cache.get(key)
+    if value is not None:
+        cache.move_to_end(key)
+    return value
+
+def lru_put(cache, key, value, max_entries):
+    cache[key] = value
+    while len(cache) > max_entries:
+        cache.popitem(last=False)
@@ -1,14 +1,23 @@
-from .base import OpticalComponent, Ray
-from typing import List, Tuple
+from .base import OpticalComponent, RayBatch
+from .spectrum import TransmissionCurve
+from typing import Tuple
 
 class Filter(OpticalComponent):
     def __init__(self, position: Tuple[float, float, float], orientation: Tuple[float, float, float],
-                 pass_band: Tuple[float, float]):
+                 pass_band: Tuple[float, float], transmission=None):
         super().__init__(position, orientation)
         self.pass_band = pass_band
+        # A TransmissionCurve (or [wavelengths, values] table) replaces the hard pass_band edges
+        self.transmission = TransmissionCurve.as_curve(transmission)
 
-    def interact_with_light(self, ray: Ray) -> List[Ray]:
-        if self.pass_band[0] <= ray.wavelength <= self.pass_band[1]:
-            return [Ray(self.position, ray.direction, ray.wavelength)]
-        else:
-            return []
+    def get_transmission(self, wavelengths):
+        if self.transmission is None:
+            return ((self.pass_band[0] <= wavelengths) & (wavelengths <= self.pass_band[1])).astype(float)
+        return self.transmission(wavelengths)
+
+    def interact_with_light_batch(self, batch: RayBatch) -> RayBatch:
+        # Rays keep their intensity scaled by the transmission; blocked rays are dropped
+        intensities = batch.intensities * self.get_transmission(batch.wavelengths)
+        passed = intensities > 0
+        return RayBatch(batch.origins[passed], batch.directions[passed], batch.wavelengths[passed],
+                        intensities=intensities[passed])
@@ -1,23 +1,48 @@
 # tirf_sim/optical_components/laser.py
 
-from .base import OpticalComponent, Ray
+from .base import OpticalComponent, Ray, RayBatch
 import numpy as np
 from ..logger import logger
 
+PLANCK_CONSTANT = 6.62607015e-34  # J s
+SPEED_OF_LIGHT = 299792458.0  # m/s
+
 class Laser(OpticalComponent):
-    def __init__(self, position, orientation, wavelength, power):
+    def __init__(self, position, orientation, wavelength, power, beam_waist=2.0):
         super().__init__(position, orientation)
         self.wavelength = wavelength
-        self.power = power
+        self.power = power  # mW
+        self.beam_waist = beam_waist  # 1/e^2 intensity radius, in table units
         self.angle_x = 0
         self.angle_y = 0
 
     def emit_light(self):
         direction = self.calculate_direction()
-        logger.debug(f"Laser emitting light from {self.position} in direction {direction}")
+        logger.debug("Laser emitting light from %s in direction %s", self.position, direction)
         return Ray(self.position, direction, self.wavelength)
 
 
+    def photon_rate(self):
+        # Photons per second emitted at the current power
+        return self.power * 1e-3 * self.wavelength * 1e-9 / (PLANCK_CONSTANT * SPEED_OF_LIGHT)
+
+    def emit_photons(self, count, rng, weight=1.0, length=1000):
+        """RayBatch of count photons sampled from the Gaussian beam profile.
+
+        Origins are spread across the beam with a standard deviation of
+        beam_waist / 2 along each axis perpendicular to the beam. Each
+        photon's intensity is weight, the number of real photons it stands for.
+        """
+        direction = self.calculate_direction()
+        # Two unit vectors spanning the plane across the beam
+        helper = np.array([1.0, 0, 0]) if abs(direction[0]) < 0.9 else np.array([0, 1.0, 0])
+        u = np.cross(direction, helper)
+        u /= np.linalg.norm(u)
+        v = np.cross(direction, u)
+        offsets = rng.normal(0, self.beam_waist / 2, (count, 2))
+        origins = self.position + offsets[:, :1] * u + offsets[:, 1:] * v
+        return RayBatch(origins, direction, self.wavelength, length, weight)
+
     def calculate_direction(self):
         # Calculate direction based on angles
         direction = np.array([
@@ -1,7 +1,6 @@
-from .base import OpticalComponent, Ray
-from typing import List, Tuple
-import numpy as np
-from ..utils.vector_math import normalize
+from .base import OpticalComponent, RayBatch
+from typing import Tuple
+from ..utils.vector_math import normalize_rows
 
 class Lens(OpticalComponent):
     def __init__(self, position: Tuple[float, float, float], orientation: Tuple[float, float, float],
@@ -10,11 +9,27 @@ class Lens(OpticalComponent):
         self.focal_length = focal_length
         self.diameter = diameter
 
-    def interact_with_light(self, ray: Ray) -> List[Ray]:
-        focal_point = self.position + self.orientation * self.focal_length
-        to_focal = focal_point - ray.origin
-        new_direction = normalize(ray.direction + to_focal * 0.1)
-        return [Ray(self.position, new_direction, ray.wavelength)]
+    @property
+    def focal_length(self) -> float:
+        return self._focal_length
+
+    @focal_length.setter
+    def focal_length(self, value: float):
+        self._focal_length = value
+        self.invalidate_geometry()
+
+    def compute_geometry(self):
+        geometry = super().compute_geometry()
+        geometry.focal_point = self.position + self.orientation * self.focal_length
+        return geometry
+
+    def interact_with_light_batch(self, batch: RayBatch) -> RayBatch:
+        to_focal = self.geometry.focal_point - batch.origins
+        new_directions = normalize_rows(batch.directions + to_focal * 0.1)
+        return RayBatch(batch.origins, new_directions, batch.wavelengths, intensities=batch.intensities)
+
+    def get_aperture_radius(self):
+        return self.diameter / 2
 
     def get_schematic_representation(self):
         return ('circle', self.position[:2], self.orientation[:2], (self.diameter, self.diameter))
@@ -1,21 +1,24 @@
-from .base import OpticalComponent, Ray
-from typing import List, Tuple
-import numpy as np
-from ..utils.vector_math import normalize
+from .base import OpticalComponent, RayBatch
+from typing import Tuple
+from ..utils.vector_math import normalize_rows
 
 class Objective(OpticalComponent):
     def __init__(self, position: Tuple[float, float, float], orientation: Tuple[float, float, float],
-                 magnification: float, numerical_aperture: float):
+                 magnification: float, numerical_aperture: float, immersion_index: float = 1.518):
         super().__init__(position, orientation)
         self.magnification = magnification
         self.numerical_aperture = numerical_aperture
+        self.immersion_index = immersion_index  # Oil immersion by default
 
-    def interact_with_light(self, ray: Ray) -> List[Ray]:
+    def interact_with_light_batch(self, batch: RayBatch) -> RayBatch:
         # Simplified interaction: bending light towards optical axis
         optical_axis = self.orientation
         bend_factor = 0.1 * self.numerical_aperture
-        new_direction = normalize(ray.direction + optical_axis * bend_factor)
-        return [Ray(self.position, new_direction, ray.wavelength)]
+        new_directions = normalize_rows(batch.directions + optical_axis * bend_factor)
+        return RayBatch(batch.origins, new_directions, batch.wavelengths, intensities=batch.intensities)
+
+    def get_aperture_radius(self):
+        return 15  # Matches the schematic size
 
     def get_schematic_representation(self):
         return ('circle', self.position[:2], self.orientation[:2], (30, 30))  # Fixed size for visibility
@@ -0,0 +1,85 @@
+# tirf_sim/optical_components/spectrum.py
+
+import numpy as np
+
+class TransmissionCurve:
+    """Tabulated transmission (or reflectance) against wavelength in nm.
+
+    Values between the tabulated points are linearly interpolated and held
+    constant beyond the ends, as np.interp does. Evaluation goes through a
+    lookup table resampled every LUT_STEP nm, built on first use, so a
+    batch of N wavelengths costs O(N) index arithmetic however many points
+    the curve has.
+    """
+    LUT_STEP = 0.1  # nm
+
+    def __init__(self, wavelengths, values):
+        wavelengths = np.array(wavelengths, dtype=float)
+        values = np.array(values, dtype=float)
+        if wavelengths.ndim != 1 or wavelengths.shape != values.shape or len(wavelengths) < 2:
+            raise ValueError("Transmission curve needs matching wavelength and value lists of 2 or more points")
+        if np.any(np.diff(wavelengths) < 0):
+            raise ValueError("Transmission curve wavelengths must be increasing")
+        if np.any((values < 0) | (values > 1)):
+            raise ValueError("Transmission curve values must be between 0 and 1")
+        wavelengths.setflags(write=False)
+        values.setflags(write=False)
+        self.wavelengths = wavelengths
+        self.values = values
+        self._lut = None
+
+    @classmethod
+    def as_curve(cls, curve):
+        # Accept a curve or a [wavelengths, values] table; None stays None
+        if curve is None or isinstance(curve, cls):
+            return curve
+        return cls(*curve)
+
+    @classmethod
+    def band_pass(cls, low, high, edge_width=2.0, peak=1.0):
+        """Flat-topped band with linear edges edge_width nm wide."""
+        half = edge_width / 2
+        return cls([low - half, low + half, high - half, high + half], [0, peak, peak, 0])
+
+    @classmethod
+    def long_pass(cls, cut_on, edge_width=2.0, peak=1.0):
+        half = edge_width / 2
+        return cls([cut_on - half, cut_on + half], [0, peak])
+
+    @classmethod
+    def short_pass(cls, cut_off, edge_width=2.0, peak=1.0):
+        half = edge_width / 2
+        return cls([cut_off - half, cut_off + half], [peak, 0])
+
+    def get_lut(self):
+        # (values, slopes) on the LUT_STEP grid; the last slope is 0 so the end value holds
+        if self._lut is None:
+            start, stop = self.wavelengths[0], self.wavelengths[-1]
+            grid = start + self.LUT_STEP * np.arange(int(np.ceil((stop - start) / self.LUT_STEP)) + 1)
+            values = np.interp(grid, self.wavelengths, self.values)
+            self._lut = (values, np.append(np.diff(values), 0))
+        return self._lut
+
+    def __call__(self, wavelengths):
+        values, slopes = self.get_lut()
+        position = np.array(wavelengths, dtype=float, ndmin=1)
+        position -= self.wavelengths[0]
+        position *= 1 / self.LUT_STEP
+        np.clip(position, 0, len(values) - 1, out=position)
+        index = position.astype(np.intp)
+        # Interpolate in place: values[index] + fraction * slopes[index]
+        position -= index
+        position *= slopes[index]
+        position += values[index]
+        return position
+
+    def to_table(self):
+        return [self.wavelengths.tolist(), self.values.tolist()]
+
+    def __eq__(self, other):
+        return (isinstance(other, TransmissionCurve) and np.array_equal(self.wavelengths, other.wavelengths)
+                and np.array_equal(self.values, other.values))
+
+    def __getstate__(self):
+        # The lookup table is rebuilt on first use after unpickling
+        return {**self.__dict__, '_lut': None}
@@ -0,0 +1,9 @@
+from .fluorophores import FluorophoreSample
+from .dynamics import FluorophoreDynamics
+from .tirf import (GLASS_INDEX, WATER_INDEX, critical_angle, max_incidence_angle,
+                   penetration_depth, interface_intensity, incidence_angle, TIRFTable, TIRFProfile,
+                   get_tirf_table)
+
+__all__ = ['FluorophoreSample', 'FluorophoreDynamics', 'GLASS_INDEX', 'WATER_INDEX', 'critical_angle',
+           'max_incidence_angle', 'penetration_depth', 'interface_intensity', 'incidence_angle', 'TIRFTable',
+           'TIRFProfile', 'get_tirf_table']
@@ -0,0 +1,43 @@
+# tirf_sim/sample/dynamics.py
+
+import numpy as np
+
+class FluorophoreDynamics:
+    """Frame-to-frame blinking, bleaching and diffusion of a FluorophoreSample.
+
+    Rates are per second: on_rate (DARK -> ACTIVE), off_rate (ACTIVE ->
+    DARK) and bleach_rate (ACTIVE -> BLEACHED per unit of excitation, so
+    brightly lit emitters bleach first). diffusion is in nm^2/s; emitters
+    reflect off the coverslip at z = 0.
+    """
+
+    def __init__(self, on_rate=0.5, off_rate=2.0, bleach_rate=1e-3, diffusion=0.0):
+        self.on_rate = on_rate
+        self.off_rate = off_rate
+        self.bleach_rate = bleach_rate
+        self.diffusion = diffusion
+
+    def step(self, sample, dt, excitation=None, rng=None):
+        """Advance the sample in place by dt seconds."""
+        rng = rng if rng is not None else np.random.default_rng()
+        states = sample.states
+        draws = rng.random(len(sample), dtype=np.float32)
+
+        active = states == sample.ACTIVE
+        dark = states == sample.DARK
+        # Each active emitter blinks off or bleaches with the combined
+        # probability, split in proportion to the two rates
+        bleach = self.bleach_rate * (1.0 if excitation is None else excitation)
+        leave = np.float32(1) - np.exp(np.float32(-dt) * (np.float32(self.off_rate) + bleach))
+        bleached = active & (draws < leave * bleach / (self.off_rate + bleach + 1e-30))
+        blinked = active & ~bleached & (draws < leave)
+        woke = dark & (draws < 1 - np.exp(-self.on_rate * dt))
+
+        states[blinked] = sample.DARK
+        states[bleached] = sample.BLEACHED
+        states[woke] = sample.ACTIVE
+
+        if self.diffusion:
+            step = np.float32(np.sqrt(2 * self.diffusion * dt))
+            sample.positions += rng.standard_normal(sample.positions.shape, dtype=np.float32) * step
+            np.abs(sample.positions[:, 2], out=sample.positions[:, 2])
@@ -0,0 +1,55 @@
+# tirf_sim/sample/fluorophores.py
+
+import numpy as np
+from .tirf import GLASS_INDEX, WATER_INDEX, penetration_depth, interface_intensity
+
+class FluorophoreSample:
+    """A population of point emitters above the coverslip.
+
+    Emitters are stored as parallel arrays: positions (N, 3) in nm with z
+    the height above the glass, brightness (relative photon yield) and a
+    uint8 state. Only ACTIVE emitters fluoresce.
+    """
+    DARK = 0
+    ACTIVE = 1
+    BLEACHED = 2
+
+    def __init__(self, positions, brightness=1.0, states=None, emission_wavelength=520,
+                 refractive_index=WATER_INDEX):
+        self.positions = np.ascontiguousarray(positions, dtype=np.float32).reshape(-1, 3)
+        count = len(self.positions)
+        self.brightness = np.array(np.broadcast_to(np.asarray(brightness, dtype=np.float32), (count,)))
+        if states is None:
+            self.states = np.full(count, self.ACTIVE, dtype=np.uint8)
+        else:
+            self.states = np.array(np.broadcast_to(np.asarray(states, dtype=np.uint8), (count,)))
+        self.emission_wavelength = emission_wavelength
+        self.refractive_index = refractive_index
+
+    @classmethod
+    def random(cls, count, extent=(50000, 50000), depth=1000, seed=None, **kwargs):
+        # Emitters spread uniformly over extent (nm, centred on the axis) and 0..depth in z
+        rng = np.random.default_rng(seed)
+        positions = np.empty((count, 3), dtype=np.float32)
+        positions[:, 0] = rng.uniform(-extent[0] / 2, extent[0] / 2, count)
+        positions[:, 1] = rng.uniform(-extent[1] / 2, extent[1] / 2, count)
+        positions[:, 2] = rng.uniform(0, depth, count)
+        return cls(positions, **kwargs)
+
+    def __len__(self):
+        return len(self.positions)
+
+    def excitation(self, theta, wavelength, immersion_index=GLASS_INDEX, power=1.0):
+        """Excitation intensity at every emitter for a beam incident at theta.
+
+        Above the critical angle the field decays as exp(-z / d) with the
+        evanescent penetration depth d; below it the sample is lit through
+        its whole depth.
+        """
+        depth = penetration_depth(theta, wavelength, immersion_index, self.refractive_index)
+        surface = power * interface_intensity(theta, immersion_index, self.refractive_index)
+        intensity = np.float32(surface) * self.brightness
+        if np.isfinite(depth):
+            intensity *= np.exp(self.positions[:, 2] * np.float32(-1 / depth))
+        intensity[self.states != self.ACTIVE] = 0
+        return intensity
@@ -0,0 +1,128 @@
+# tirf_sim/sample/tirf.py
+
+import functools
+from collections import namedtuple
+
+import numpy as np
+
+# Refractive indices of the coverslip/immersion glass and the aqueous sample
+GLASS_INDEX = 1.518
+WATER_INDEX = 1.33
+
+# depth and intensity as from penetration_depth and interface_intensity;
+# total_reflection is True above the critical angle and in_aperture where
+# the objective can deliver the angle (intensity is 0 elsewhere)
+TIRFProfile = namedtuple('TIRFProfile', ['depth', 'intensity', 'total_reflection', 'in_aperture'])
+
+def incidence_angle(angle_x, angle_y):
+    """Angle of incidence (radians) at the coverslip for a beam tilted by angle_x and angle_y."""
+    return np.arccos(np.cos(angle_x) * np.cos(angle_y))
+
+def critical_angle(n1=GLASS_INDEX, n2=WATER_INDEX):
+    """Angle of incidence (radians) above which light is totally reflected."""
+    return np.arcsin(np.minimum(np.asarray(n2, dtype=float) / n1, 1.0))
+
+def max_incidence_angle(numerical_aperture, n1=GLASS_INDEX):
+    """Steepest angle of incidence an objective of the given NA can deliver."""
+    return np.arcsin(np.minimum(np.asarray(numerical_aperture, dtype=float) / n1, 1.0))
+
+def penetration_depth(theta, wavelength, n1=GLASS_INDEX, n2=WATER_INDEX):
+    """1/e intensity depth of the evanescent field, in the units of wavelength.
+
+    np.inf at or below the critical angle, where the beam propagates into
+    the sample.
+    """
+    theta = np.asarray(theta, dtype=float)
+    excess = (n1 * np.sin(theta)) ** 2 - n2 ** 2
+    with np.errstate(divide='ignore', invalid='ignore'):
+        depth = wavelength / (4 * np.pi * np.sqrt(excess))
+    return np.where(excess > 0, depth, np.inf)
+
+def interface_intensity(theta, n1=GLASS_INDEX, n2=WATER_INDEX):
+    """Intensity just past the interface relative to the incident beam.
+
+    Averages s and p polarization. Above the critical angle this is the
+    evanescent intensity at z = 0 (Axelrod, Traffic 2001); below it the
+    Fresnel transmission |t|^2. Both agree at the critical angle.
+    """
+    return intensity_from_sin2(np.sin(np.asarray(theta, dtype=float)) ** 2, n1, n2)
+
+def intensity_from_sin2(sin2, n1=GLASS_INDEX, n2=WATER_INDEX):
+    # interface_intensity in terms of sin^2(theta); above the critical angle
+    # it also extends smoothly past sin^2 = 1, which TIRFTable relies on
+    n = n2 / n1
+    cos2 = 1 - sin2
+    total = sin2 >= n ** 2
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        evanescent_s = 4 * cos2 / (1 - n ** 2)
+        evanescent_p = 4 * cos2 * (2 * sin2 - n ** 2) / (n ** 4 * cos2 + sin2 - n ** 2)
+
+        cos_t = np.sqrt(np.maximum(1 - sin2 / n ** 2, 0))
+        cos_i = np.sqrt(cos2)
+        transmitted_s = (2 * cos_i / (cos_i + n * cos_t)) ** 2
+        transmitted_p = (2 * cos_i / (n * cos_i + cos_t)) ** 2
+
+    return np.where(total, (evanescent_s + evanescent_p) / 2, (transmitted_s + transmitted_p) / 2)
+
+class TIRFTable:
+    """Evanescent field over the angle of incidence, for one wavelength, index pair and NA.
+
+    The interface intensity is sampled once, and lookup() then costs a
+    few array operations per angle however many angles are asked for.
+    Samples are uniform in w = +-sqrt(|n1^2 sin^2(theta) - n2^2|), signed
+    by which side of the critical angle theta is on, rather than in theta:
+    the intensity is smooth in w on both sides of the critical angle
+    (w = 0, a node), and the penetration depth is exactly
+    wavelength / (4 pi w).
+    """
+
+    def __init__(self, wavelength, n1=GLASS_INDEX, n2=WATER_INDEX, numerical_aperture=None, samples=4096):
+        if n1 <= n2:
+            raise ValueError("Total internal reflection needs n1 > n2")
+        self.wavelength = wavelength
+        self.n1 = n1
+        self.n2 = n2
+        self.numerical_aperture = numerical_aperture
+        self.critical_angle = float(critical_angle(n1, n2))
+        self.max_angle = np.pi / 2 if numerical_aperture is None else float(max_incidence_angle(numerical_aperture, n1))
+
+        # Nodes every step in w from normal incidence (w = -n2) through the
+        # critical angle (w = 0) to just past 90 degrees
+        self.step = n2 / samples
+        w = np.arange(-samples, int(np.ceil(np.sqrt(n1 ** 2 - n2 ** 2) / self.step)) + 1) * self.step
+        self.intensity = intensity_from_sin2((n2 ** 2 + np.sign(w) * w ** 2) / n1 ** 2, n1, n2)
+        self.slopes = np.append(np.diff(self.intensity), 0)
+        for array in (self.intensity, self.slopes):
+            array.setflags(write=False)
+
+    def lookup(self, theta):
+        """TIRFProfile at each angle of incidence (radians, between 0 and pi/2)."""
+        shape = np.shape(theta)
+        theta = np.clip(np.array(theta, dtype=float, ndmin=1), 0, np.pi / 2)
+        excess = np.sin(theta)
+        excess *= self.n1
+        np.square(excess, out=excess)
+        excess -= self.n2 ** 2
+        total = excess > 0
+        w = np.sqrt(np.abs(excess))
+        np.copysign(w, excess, out=w)
+
+        position = w + self.n2
+        position /= self.step
+        index = np.minimum(position.astype(np.intp), len(self.intensity) - 1)
+        position -= index
+        intensity = self.slopes[index]
+        intensity *= position
+        intensity += self.intensity[index]
+        in_aperture = theta <= self.max_angle
+        intensity[~in_aperture] = 0
+
+        depth = np.full(theta.shape, np.inf)
+        np.divide(self.wavelength / (4 * np.pi), w, out=depth, where=total)
+        return TIRFProfile(*(array.reshape(shape) for array in (depth, intensity, total, in_aperture)))
+
+@functools.lru_cache(maxsize=32)
+def get_tirf_table(wavelength, n1=GLASS_INDEX, n2=WATER_INDEX, numerical_aperture=None):
+    """TIRFTable for these settings, built on first use and shared afterwards."""
+    return TIRFTable(wavelength, n1, n2, numerical_aperture)
@@ -1,3 +1,11 @@
 from .engine import SimulationEngine
+from .sweep import run_sweep, parameter_grid, SweepResult
+from .worker import SimulationWorker, Frame
+from .movie import render_movie, iter_movie
+from .profiling import FrameProfiler
+from .monte_carlo import simulate_photons
+from .cache import ResultCache, StateHasher
 
-__all__ = ['SimulationEngine']
+__all__ = ['SimulationEngine', 'run_sweep', 'parameter_grid', 'SweepResult', 'SimulationWorker', 'Frame',
+           'render_movie', 'iter_movie', 'FrameProfiler',
+           'simulate_photons', 'ResultCache', 'StateHasher']
@@ -0,0 +1,230 @@
+# tirf_sim/simulation/cache.py
+
+import hashlib
+import os
+import re
+from collections import OrderedDict
+
+import numpy as np
+
+from ..microscope.scene import COMPILED_PACKAGES, code_digest
+from ..logger import logger
+
+CACHE_VERSION = 1  # Bump when the meaning of cached results changes
+# Code that results depend on; editing it starts a fresh set of cache files
+RESULT_PACKAGES = COMPILED_PACKAGES + ('simulation',)
+# Names of the files ResultCache writes, of any version: <key>.v<CACHE_VERSION>-<code hash>.npy
+CACHE_FILE = re.compile(r'.+\.v\d+-[0-9a-f]{12}\.npy')
+
+class StateHasher:
+    """Stable digests of a microscope's state, for use as cache keys.
+
+    A component's digest covers its type and every public setting,
+    including properties such as position, orientation and focal_length,
+    is_on, laser angles, wavelength and camera settings, but not the
+    camera image itself. Digests are sha1 of
+    a canonical byte encoding, so they match across processes and runs.
+    Each component's digest is kept until its version changes.
+    """
+
+    def __init__(self):
+        self._digests = {}  # component -> (version, digest)
+
+    def component_digest(self, component):
+        cached = self._digests.get(component)
+        if cached is not None and cached[0] == component.version:
+            return cached[1]
+        h = hashlib.sha1(type(component).__name__.encode())
+        for name, value in sorted(settings(component).items()):
+            if name == 'image':
+                value = (value.shape, value.dtype.str)
+            h.update(name.encode())
+            encode(h, value)
+        digest = h.digest()
+        self._digests[component] = (component.version, digest)
+        return digest
+
+    def digest(self, microscope, *extra):
+        """Hex digest of the microscope's mode, components and any extra values."""
+        h = hashlib.sha1(microscope.mode.encode())
+        for component in microscope.components:
+            h.update(self.component_digest(component))
+        for value in extra:
+            encode(h, value)
+        return h.hexdigest()
+
+def settings(obj):
+    # Public attributes, plus private ones behind a settable property
+    # under the property's name (e.g. Lens._focal_length as focal_length)
+    result = {}
+    for name, value in vars(obj).items():
+        if name.startswith('_'):
+            prop = getattr(type(obj), name[1:], None)
+            if not isinstance(prop, property) or prop.fset is None:
+                continue
+            name = name[1:]
+        result[name] = value
+    return result
+
+def encode(h, value):
+    # Feed a setting to the hash with its type, so e.g. 1 and '1' differ
+    if value is None or isinstance(value, (bool, np.bool_, str)):
+        h.update(f"{type(value).__name__}:{value};".encode())
+    elif isinstance(value, (int, float, np.number)) or (
+            isinstance(value, np.ndarray) and value.dtype.kind in 'biuf'):
+        array = np.ascontiguousarray(value)
+        h.update(f"array:{array.dtype.str}:{array.shape};".encode())
+        h.update(array.tobytes())
+    elif isinstance(value, (list, tuple)):
+        h.update(f"seq:{len(value)};".encode())
+        for item in value:
+            encode(h, item)
+    elif isinstance(value, dict):
+        h.update(f"dict:{len(value)};".encode())
+        for key in sorted(value):
+            encode(h, key)
+            encode(h, value[key])
+    else:
+        # Settings objects such as DetectorModel or TransmissionCurve
+        h.update(f"object:{type(value).__name__};".encode())
+        encode(h, settings(value))
+
+class ResultCache:
+    """Simulated images by state digest: an LRU in memory, optionally backed by disk.
+
+    The memory tier holds at most max_bytes of arrays and evicts the least
+    recently used ones first. With a directory, every result is also
+    written there as <key>.<version>.npy (atomically, via a temporary file
+    and a rename), and misses in memory are looked up on disk and
+    memory-mapped, so sweep worker processes sharing the directory reuse
+    each other's results. The version combines CACHE_VERSION and a hash
+    of the package code, so results from older code are never served.
+    Once the cache files in the directory exceed max_disk_bytes, the
+    least recently used are removed, which also clears out old versions;
+    other files there are never touched.
+    Cached arrays are read-only.
+    """
+
+    def __init__(self, max_bytes=256 * 2**20, directory=None, max_disk_bytes=4 * 2**30):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_bytes = None  # Size of the directory's cache files, measured on the first write
+        self.entries = OrderedDict()
+        self.nbytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+            self.version = f"v{CACHE_VERSION}-{code_digest(RESULT_PACKAGES)[:12]}"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, key):
+        return key in self.entries or (self.directory is not None and os.path.exists(self.path(key)))
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.{self.version}.npy")
+
+    def get(self, key):
+        """Cached array for key, or None."""
+        array = self.entries.get(key)
+        if array is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return array
+        if self.directory is not None:
+            try:
+                array = np.load(self.path(key), mmap_mode='r')
+            except FileNotFoundError:
+                array = None
+            except (OSError, ValueError) as e:
+                logger.warning("Ignoring unreadable cache file for %s: %s", key, e)
+                array = None
+            if array is not None:
+                self.disk_hits += 1
+                touch(self.path(key))  # Recently used files are removed last
+                self.remember(key, array)
+                return array
+        self.misses += 1
+        return None
+
+    def put(self, key, array):
+        array = np.array(array)
+        array.setflags(write=False)
+        if self.directory is not None and not os.path.exists(self.path(key)):
+            import tempfile
+            fd, temporary = tempfile.mkstemp(dir=self.directory, suffix='.npy.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    np.save(f, array)
+                os.replace(temporary, self.path(key))
+                size = os.path.getsize(self.path(key))
+            except OSError as e:
+                logger.warning("Could not write cache file for %s: %s", key, e)
+                if os.path.exists(temporary):
+                    os.remove(temporary)
+            else:
+                if self.disk_bytes is None or self.disk_bytes + size > self.max_disk_bytes:
+                    self.trim_disk()
+                else:
+                    self.disk_bytes += size
+        self.remember(key, array)
+        return array
+
+    def remember(self, key, array):
+        # Add to the memory tier, evicting the least recently used entries
+        if key in self.entries:
+            self.nbytes -= self.entries.pop(key).nbytes
+        if array.nbytes > self.max_bytes:
+            return
+        self.entries[key] = array
+        self.nbytes += array.nbytes
+        while self.nbytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.nbytes -= evicted.nbytes
+
+    def trim_disk(self):
+        """Remove the least recently used cache files until they fit in max_disk_bytes.
+
+        Only files named like CACHE_FILE count; anything else in the
+        directory is left alone. Other processes may write to the
+        directory too, so it is measured afresh; in between, disk_bytes
+        counts this cache's own writes.
+        """
+        files = []
+        for entry in os.scandir(self.directory):
+            if CACHE_FILE.fullmatch(entry.name):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue  # Removed by another process
+                files.append((stat.st_mtime, stat.st_size, entry.path))
+        files.sort()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in files:
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning("Could not remove cache file %s: %s", path, e)
+                continue
+            total -= size
+        self.disk_bytes = total
+
+    def clear(self):
+        # Empty the memory tier; files on disk are kept
+        self.entries.clear()
+        self.nbytes = 0
+
+def touch(path):
+    # Mark a cache file as just used; it may already have been removed
+    try:
+        os.utime(path)
+    except OSError:
+        pass
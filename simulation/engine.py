@@ -1,14 +1,33 @@
 # tirf_sim/simulation/engine.py
 
+import time
+from collections import OrderedDict
+
 import numpy as np
 from .light_table import LightTable
+from .profiling import FrameProfiler
+from .lod import ProgressiveRenderer
+from .cache import StateHasher
+from ..optical_components import Camera
+from ..optical_components.camera import lru_get, lru_put
 from ..logger import logger
 
 class SimulationEngine:
-    def __init__(self, microscope):
+    # Traced ray segments remembered per state, so a cache hit can show
+    # them without tracing; they are a few segments each
+    MAX_TRACED_STATES = 64
+
+    def __init__(self, microscope, cache=None):
         self.microscope = microscope
+        # Optional ResultCache of images keyed on the microscope state
+        self.cache = cache
+        self.traced_states = OrderedDict()  # state key -> (ray batch, hits)
+        self.hasher = StateHasher()
         self.light_table = LightTable()
         self.is_running = False
+        self.hits = 0  # Rays deposited on the camera by the last trace
+        self.profiler = FrameProfiler()
+        self.lod = None  # ProgressiveRenderer while level-of-detail rendering is on
         self.setup_light_table()
 
     def setup_light_table(self):
@@ -19,21 +38,114 @@ class SimulationEngine:
     def get_image(self):
         if self.is_running:
             try:
-                self.light_table.simulate_light_path()
-                image = self.light_table.get_image()
-                logger.debug(f"Generated image with shape {image.shape}")
+                image = self.cached(self.render_light_table_image, 'light_table')
+                logger.debug("Generated image with shape %s", image.shape)
                 return image
             except Exception as e:
                 logger.error(f"Error generating image: {str(e)}")
                 return np.zeros((100, 100), dtype=np.uint8)
         return np.zeros((100, 100), dtype=np.uint8)
 
+    def render_light_table_image(self):
+        self.trace_frame()
+        with self.profiler.stage('render'):
+            return self.light_table.get_image()
+
+    def get_camera_image(self):
+        # Trace the current frame (reusing the last one if nothing changed)
+        # and return a copy of the camera image; read-only if it came from the cache
+        camera = next((c for c in self.microscope.components if isinstance(c, Camera)), None)
+        if camera is None:
+            return None
+        return self.cached(lambda: self.render_camera_image(camera), 'camera')
+
+    def render_camera_image(self, camera):
+        self.trace_frame()
+        return camera.get_image().copy()
+
+    def cached(self, render, *tag):
+        # render() for the current state, or its cached result
+        if self.cache is None:
+            return render()
+        key = self.state_key(*tag)
+        image = self.cache.get(key)
+        if image is None:
+            image = self.cache.put(key, render())
+        else:
+            self.restore_traced_state(image if tag == ('camera',) else None)
+        return image
+
+    def restore_traced_state(self, camera_image=None):
+        """Bring the light table and camera up to the current state after a cache hit.
+
+        If the state's rays are remembered and its camera image is given,
+        they are put back without tracing, and the next change is traced
+        from scratch; otherwise the state is traced.
+        """
+        if self.light_table.is_current():
+            return
+        camera = self.microscope.get_component(Camera)
+        traced = lru_get(self.traced_states, self.state_key())
+        if traced is None or camera is None or camera_image is None:
+            self.trace_frame()
+            return
+        self.light_table.restore(traced[0])
+        np.copyto(camera.image, camera_image)
+        self.hits = traced[1]
+
+    def state_key(self, *extra):
+        """Stable hash of every component setting and the mode, plus extra values."""
+        return self.hasher.digest(self.microscope, *extra)
+
+    def trace_frame(self):
+        """Trace the current state; True if the frame changed.
+
+        Records the 'trace' and 'deposit' stages of a changed frame, with
+        the camera's spot deposition split out of the trace time.
+        """
+        camera = self.microscope.get_component(Camera)
+        start = time.perf_counter()
+        changed = self.light_table.simulate_light_path()
+        elapsed = time.perf_counter() - start
+        hits, deposit = camera.take_deposit_stats() if camera is not None else (0, 0.0)
+        if changed:
+            self.profiler.record('trace', (elapsed - deposit) * 1000)
+            self.profiler.record('deposit', deposit * 1000)
+            if self.cache is not None:
+                lru_put(self.traced_states, self.state_key(), (self.light_table.ray_batch, hits),
+                        self.MAX_TRACED_STATES)
+        self.hits = hits
+        return changed
+
+    def is_current(self):
+        # True if the light table and camera show the current state
+        return self.light_table.is_current()
+
+    def set_lod(self, enabled, **options):
+        """Switch level-of-detail rendering on or off; options go to ProgressiveRenderer."""
+        self.lod = (ProgressiveRenderer(self.microscope, self.light_table, cache=self.cache, **options)
+                    if enabled else None)
+
+    def needs_refinement(self):
+        # True while an idle level-of-detail image can still be improved
+        lod = self.lod  # set_lod may swap it from another thread
+        return self.is_running and lod is not None and lod.is_refining()
+
+    def render_lod_frame(self):
+        """Next level-of-detail image, None if nothing changed; the full trace is skipped."""
+        lod = self.lod
+        with self.profiler.stage('trace'):
+            return lod.render()
+
     def get_schematic_representation(self):
         return self.light_table.get_schematic_representation()
 
     def get_rays(self):
         return self.light_table.rays
 
+    def get_ray_batch(self):
+        return self.light_table.ray_batch
+
     def start(self):
         self.is_running = True
         logger.info("Simulation started")
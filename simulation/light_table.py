@@ -1,43 +1,85 @@
 # tirf_sim/simulation/light_table.py
 
 import numpy as np
-from ..optical_components import Laser, Mirror, Lens, BeamSplitter, Filter, Objective, Camera, Ray
+from ..optical_components import Laser, Mirror, Lens, BeamSplitter, Filter, Objective, Camera, Ray, RayBatch
+from ..microscope.tracer import SequentialTracer
 from ..logger import logger
 
+IMAGE_SIZE = (100, 100)  # Default light table image, in pixels
+
 class LightTable:
     def __init__(self, size=(1000, 1000)):
         self.size = size
         self.components = []
         self.rays = []
+        self.ray_batch = RayBatch.empty()
+        self.tracer = SequentialTracer()
+        self._state = None
 
     def add_component(self, component):
         self.components.append(component)
         logger.info(f"Added component: {type(component).__name__}")
 
     def simulate_light_path(self):
-        try:
-            self.rays = []
-            laser = next((comp for comp in self.components if isinstance(comp, Laser)), None)
-            camera = next((comp for comp in self.components if isinstance(comp, Camera)), None)
+        """Trace the laser through the table; returns True if the frame changed.
 
-            if laser and laser.is_on and camera:
-                # Create a ray that extends far beyond the camera
-                initial_ray = laser.emit_light()
-                extended_ray = self.extend_ray(initial_ray, camera.position)
-                self.rays = [extended_ray]
+        Nothing is recomputed while no component (including the laser's
+        angles, power and on/off state) has changed since the last call.
+        """
+        try:
+            state = [(component, component.version) for component in self.components]
+            if state == self._state:
+                return False
+            self._state = state
 
-                for component in self.components:
-                    if not isinstance(component, Laser):
-                        component.interact_with_light(extended_ray)
+            source = self.source_batch()
+            if source is not None:
+                self.ray_batch = self.tracer.trace(self.components, source)
+                self.rays = self.ray_batch.to_rays()
+            else:
+                self.rays = []
+                self.ray_batch = RayBatch.empty()
+                self.tracer.clear(self.components)
 
-            logger.debug(f"Simulated light path with {len(self.rays)} rays")
+            logger.debug("Simulated light path with %d rays", len(self.rays))
+            return True
         except Exception as e:
             logger.error(f"Error simulating light path: {str(e)}")
+            return False
+
+    def is_current(self):
+        # True if the last trace was of the components as they are now
+        return [(component, component.version) for component in self.components] == self._state
+
+    def restore(self, ray_batch):
+        """Take ray_batch as the trace of the current state without tracing it.
+
+        For a state traced before, e.g. served from a cache; the tracer's
+        results are dropped, so the next change is traced from scratch.
+        """
+        self.tracer.clear()
+        self._state = [(component, component.version) for component in self.components]
+        self.ray_batch = ray_batch
+        self.rays = ray_batch.to_rays()
+
+    def source_batch(self):
+        """Every laser's ray, extended far beyond the camera, as one batch; None without both."""
+        lasers = [comp for comp in self.components if isinstance(comp, Laser) and comp.is_on]
+        camera = next((comp for comp in self.components if isinstance(comp, Camera)), None)
+        if not lasers or camera is None:
+            return None
+        return RayBatch.from_rays([self.extend_ray(laser.emit_light(), camera.position) for laser in lasers])
+
+    def invalidate(self):
+        # Force the next simulate_light_path to trace from scratch
+        self._state = None
+        self.tracer.clear(self.components)
 
     def extend_ray(self, ray, target_position):
         distance = np.linalg.norm(target_position - ray.origin)
         extended_ray = Ray(ray.origin, ray.direction, ray.wavelength, distance * 3)  # Increased from 2 to 3
-        logger.debug(f"Extended ray: origin={extended_ray.origin}, direction={extended_ray.direction}, length={extended_ray.length}")
+        logger.debug("Extended ray: origin=%s, direction=%s, length=%s",
+                     extended_ray.origin, extended_ray.direction, extended_ray.length)
         return extended_ray
 
     def get_schematic_representation(self):
@@ -46,9 +88,12 @@ class LightTable:
     def get_rays(self):
         return self.rays
 
-    def get_image(self, size=(100, 100)):
+    def get_ray_batch(self):
+        return self.ray_batch
+
+    def get_image(self, size=IMAGE_SIZE):
         try:
-            image = np.zeros(size)
+            image = np.zeros(size, dtype=np.uint8)
             objective = next((comp for comp in self.components if isinstance(comp, Objective)), None)
             if objective and self.rays:
                 # Project the last ray onto the image plane
@@ -56,14 +101,21 @@ class LightTable:
                 x = int(size[0] / 2 + last_ray.direction[0] * 20)
                 y = int(size[1] / 2 + last_ray.direction[1] * 20)
 
-                # Create a Gaussian spot
-                for i in range(size[0]):
-                    for j in range(size[1]):
-                        distance = np.sqrt((i - x)**2 + (j - y)**2)
-                        image[j, i] = 255 * np.exp(-distance**2 / (2 * 5**2))  # 5 is the standard deviation
+                # Create a Gaussian spot as the outer product of two 1-D
+                # Gaussians, cropped to the window where it is non-zero
+                # after conversion to uint8
+                sigma = 5
+                radius = 4 * sigma
+                x_range = np.arange(max(0, x - radius), min(image.shape[1], x + radius + 1))
+                y_range = np.arange(max(0, y - radius), min(image.shape[0], y + radius + 1))
+                if len(x_range) and len(y_range):
+                    gaussian_x = np.exp(-(x_range - x)**2 / (2 * sigma**2))
+                    gaussian_y = np.exp(-(y_range - y)**2 / (2 * sigma**2))
+                    spot = 255 * np.outer(gaussian_y, gaussian_x)
+                    image[y_range[0]:y_range[-1]+1, x_range[0]:x_range[-1]+1] = np.clip(spot, 0, 255).astype(np.uint8)
 
-            logger.debug(f"Generated image with shape {image.shape}")
-            return np.clip(image, 0, 255).astype(np.uint8)
+            logger.debug("Generated image with shape %s", image.shape)
+            return image
         except Exception as e:
             logger.error(f"Error generating image: {str(e)}")
             return np.zeros(size, dtype=np.uint8)
@@ -0,0 +1,128 @@
+# tirf_sim/simulation/lod.py
+
+import numpy as np
+
+from .cache import StateHasher
+from ..optical_components import Camera, RayBatch
+from ..microscope.tracer import SequentialTracer
+
+class ProgressiveRenderer:
+    """Level-of-detail rendering of the camera image.
+
+    Estimates the image the camera shows, the diffraction spots of the
+    traced laser rays, by sampling photons from each spot's PSF (see
+    Camera.sample_diffraction_spots). The light path is propagated on its
+    own, so the full-resolution sensor is neither cleared nor drawn on.
+
+    While the microscope keeps changing, each render() is a quick preview:
+    preview_photons photons binned into preview_scale x preview_scale
+    pixel blocks. Once nothing has changed since the last call, each
+    render() adds refine_photons more at full resolution and returns the
+    running average, which converges to the camera image, until
+    max_photons have been drawn; render() then returns None. The preview
+    is seeded with (seed, 0) and refinement pass k with (seed, k), so a
+    converged image is reproducible. With a ResultCache, converged images
+    are stored under the microscope's state hash and returned straight
+    away when the same state comes back, e.g. when a slider returns to an
+    earlier value.
+    """
+
+    def __init__(self, microscope, light_table, preview_scale=4, preview_photons=2**10, refine_photons=2**16,
+                 max_photons=2**20, seed=0, cache=None):
+        self.microscope = microscope
+        self.light_table = light_table
+        self.preview_scale = preview_scale
+        self.preview_photons = preview_photons
+        self.refine_photons = refine_photons
+        self.max_photons = max_photons
+        self.seed = seed
+        self.tracer = SequentialTracer(max_depth=light_table.tracer.max_depth)
+        self.cache = cache
+        self.hasher = StateHasher()
+        self.passes = 0  # Refinement passes in the current image
+        self.counts = None
+        self.ray_batch = light_table.ray_batch  # Segments of the last traced state, for the light table view
+        self.hits = 0  # Rays reaching the camera in the last traced state
+        self._spots = None
+        self._state = None
+
+    @property
+    def photons(self):
+        return self.passes * self.refine_photons
+
+    def is_refining(self):
+        # True while the current image can still be improved
+        return self._state is not None and self.photons < self.max_photons
+
+    def reset(self):
+        self._state = None
+
+    def render(self):
+        """Image for the next step; None if there is nothing new."""
+        camera = self.microscope.get_component(Camera)
+        if camera is None:
+            return None
+        state = [(component, component.version) for component in self.microscope.components]
+        if state != self._state:
+            self._state = state
+            self.passes = 0
+            self.counts = None
+            self.trace(camera)
+            converged = self.cache.get(self.cache_key()) if self.cache is not None else None
+            if converged is not None:
+                self.passes = self.max_passes()
+                return converged
+            counts = self.sample(camera, self.preview_photons, self.preview_scale, 0)
+            return counts / self.preview_scale ** 2
+        if not self.is_refining():
+            return None
+        self.passes += 1
+        counts = self.sample(camera, self.refine_photons, 1, self.passes)
+        if self.counts is None:
+            self.counts = counts
+        else:
+            self.counts += counts
+        image = self.counts / self.passes
+        if self.cache is not None and not self.is_refining():
+            image = self.cache.put(self.cache_key(), image)
+        return image
+
+    def trace(self, camera):
+        # Propagate the laser rays, keeping their segments and where they reach the camera
+        hits = []
+
+        def on_detector(component, rays):
+            if component is camera:
+                hit, pixel_x, pixel_y = camera.ray_intersection_batch(rays)
+                hits.append((pixel_x, pixel_y, rays.intensities[hit]))
+
+        source = self.light_table.source_batch()
+        if source is None:
+            self.ray_batch = RayBatch.empty()
+            self._spots = None
+        else:
+            self.ray_batch = self.tracer.propagate(self.light_table.components, source, on_detector,
+                                                   keep_segments=True)
+            self._spots = tuple(np.concatenate(arrays) for arrays in zip(*hits)) if hits else None
+        self.hits = 0 if self._spots is None else len(self._spots[0])
+
+    def sample(self, camera, photons, scale, step):
+        # One pass of photons spread over the spots, binned at the given scale
+        counts = np.zeros(camera.binned_shape(scale))
+        if self.hits and camera.is_on:
+            rng = np.random.default_rng([self.seed, step])
+            xs, ys, weights = self._spots
+            camera.sample_diffraction_spots(xs, ys, weights, max(1, photons // len(xs)), rng, counts, scale)
+        return counts
+
+    def max_passes(self):
+        return -(-self.max_photons // self.refine_photons)
+
+    def cache_key(self):
+        # The converged image depends on the state and the refinement settings
+        return self.hasher.digest(self.microscope, 'lod', self.refine_photons, self.max_photons, self.seed)
+
+def display_image(image, out=None):
+    """image clipped to 0..255 as uint8, like Camera.get_display_image."""
+    out = np.empty(image.shape, dtype=np.uint8) if out is None else out
+    return np.clip(image, 0, 255, out=out, casting='unsafe')
@@ -0,0 +1,125 @@
+# tirf_sim/simulation/monte_carlo.py
+
+import time
+from collections import deque
+
+import numpy as np
+
+from ..microscope.tracer import SequentialTracer
+from ..optical_components import Laser, Camera
+from ..logger import logger
+
+PHOTON_CHUNK = 2**15  # Photons traced per vectorized pass
+CHUNKS_PER_BLOCK = 16  # Chunks summed by a worker before its counts are sent back
+BLOCKS_PER_WORKER = 2  # Blocks queued or finished but not yet added, per worker
+
+# Microscope set up once per worker process by init_worker
+_worker_state = {}
+
+def emitting_lasers(microscope):
+    return [c for c in microscope.components if isinstance(c, Laser) and c.is_on and c.power > 0]
+
+def get_cameras(microscope):
+    return [c for c in microscope.components if isinstance(c, Camera)]
+
+def photon_budget(microscope, exposure_time):
+    """Real photons emitted in exposure_time, and a ray length reaching past every camera."""
+    lasers = emitting_lasers(microscope)
+    cameras = get_cameras(microscope)
+    if not lasers or not cameras:
+        return 0.0, 0.0
+    emitted = sum(laser.photon_rate() for laser in lasers) * exposure_time
+    # Like the light table, rays run well beyond the farthest camera
+    length = 3 * max(np.linalg.norm(camera.position - laser.position) for laser in lasers for camera in cameras)
+    return emitted, length
+
+def trace_chunk(microscope, tracer, chunk, size, seed, photon_weight, length, counts, scale=1):
+    # Emit and trace one chunk; its Generator depends only on (seed, chunk)
+    rng = np.random.default_rng([seed, chunk])
+    lasers = emitting_lasers(microscope)
+    cameras = get_cameras(microscope)
+    powers = np.array([laser.power for laser in lasers], dtype=float)
+    choice = rng.choice(len(lasers), size, p=powers / powers.sum())
+    for index, laser in enumerate(lasers):
+        batch = laser.emit_photons(int(np.count_nonzero(choice == index)), rng, photon_weight, length)
+        tracer.propagate(microscope.components, batch,
+                         lambda camera, rays: camera.count_photons(rays, counts[cameras.index(camera)], scale))
+
+def trace_block(microscope, tracer, block, photons, chunk_size, seed, photon_weight, length):
+    """Counts per camera from the chunks of one block, summed in chunk order."""
+    counts = [np.zeros(camera.image.shape) for camera in get_cameras(microscope)]
+    first = block * CHUNKS_PER_BLOCK
+    for chunk in range(first, min(first + CHUNKS_PER_BLOCK, -(-photons // chunk_size))):
+        size = min(chunk_size, photons - chunk * chunk_size)
+        trace_chunk(microscope, tracer, chunk, size, seed, photon_weight, length, counts)
+    return counts
+
+def init_worker(microscope):
+    _worker_state['microscope'] = microscope
+    _worker_state['tracer'] = SequentialTracer(max_depth=microscope.tracer.max_depth)
+
+def run_block(task):
+    return trace_block(_worker_state['microscope'], _worker_state['tracer'], *task)
+
+def map_in_order(executor, function, tasks, window):
+    """executor.map with at most window tasks submitted and not yet yielded.
+
+    Results are yielded in task order, so a slow task holds back at most
+    window - 1 finished results rather than every one after it.
+    """
+    pending = deque()
+    for task in tasks:
+        if len(pending) == window:
+            yield pending.popleft().result()
+        pending.append(executor.submit(function, task))
+    while pending:
+        yield pending.popleft().result()
+
+def add_blocks(totals, results):
+    # Blocks are added in order, so the sums do not depend on the worker count
+    for counts in results:
+        for total, count in zip(totals, counts):
+            total += count
+
+def simulate_photons(microscope, photons=10**6, exposure_time=0.05, seed=0, workers=1,
+                     chunk_size=PHOTON_CHUNK):
+    """Monte Carlo image of the laser light reaching each camera.
+
+    The switched-on lasers emit `photons` simulated photons in total, shared
+    in proportion to their power and sampled from their Gaussian beam
+    profiles. Each stands for an equal share of the real photons emitted in
+    exposure_time, so the counts scale with Laser.power. Photons are traced
+    chunk_size at a time and binned into the pixel they hit, and at most
+    BLOCKS_PER_WORKER blocks per worker are in flight, so memory use does
+    not grow with the photon count.
+
+    Chunk k draws from a Generator seeded with (seed, k), and chunks are
+    summed in fixed blocks of CHUNKS_PER_BLOCK in the same order whatever
+    the number of workers, so the result is identical on 1 or 32 cores.
+    Returns one float64 photon-count image per Camera, in component order.
+    """
+    totals = [np.zeros(camera.image.shape) for camera in get_cameras(microscope)]
+    emitted, length = photon_budget(microscope, exposure_time)
+    if not emitted or photons <= 0:
+        return totals
+
+    photon_weight = emitted / photons
+    chunks = -(-photons // chunk_size)
+    tasks = [(block, photons, chunk_size, seed, photon_weight, length)
+             for block in range(-(-chunks // CHUNKS_PER_BLOCK))]
+
+    start = time.perf_counter()
+    if workers == 1:
+        tracer = SequentialTracer(max_depth=microscope.tracer.max_depth)
+        add_blocks(totals, (trace_block(microscope, tracer, *task) for task in tasks))
+    else:
+        # multiprocessing is only imported when a pool is used
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(microscope,)) as executor:
+            add_blocks(totals, map_in_order(executor, run_block, tasks, BLOCKS_PER_WORKER * workers))
+
+    elapsed = time.perf_counter() - start
+    logger.info("Traced %d photons in %d chunks on %d workers in %.2f s",
+                photons, chunks, workers, elapsed)
+    return totals
@@ -0,0 +1,84 @@
+# tirf_sim/simulation/movie.py
+
+import json
+import os
+import time
+
+import numpy as np
+
+from ..optical_components import Camera
+from ..logger import logger
+
+def iter_movie(microscope, frames, dynamics=None, frame_time=0.05, seed=None, method='auto'):
+    """Yield frames of a time-lapse of microscope.sample.
+
+    Each frame images the sample, then the dynamics advance it by
+    frame_time seconds. The sample is changed in place. If the camera has
+    a detector model, frames are its digitized read-out with noise seeded
+    by (seed, frame index). Otherwise they are the camera's own image
+    buffer, overwritten by the next frame; copy them to keep them.
+    """
+    camera = movie_camera(microscope)
+    rng = np.random.default_rng(seed)
+    for index in range(frames):
+        microscope.render_sample(camera, method)
+        yield camera.read_out(seed, index)
+        if dynamics is not None:
+            dynamics.step(microscope.sample, frame_time, microscope.get_sample_excitation(), rng)
+
+def movie_camera(microscope):
+    # The camera to film the sample with; ValueError if either is missing
+    if microscope.sample is None:
+        raise ValueError("Microscope has no sample to film")
+    camera = microscope.get_component(Camera)
+    if camera is None:
+        raise ValueError("Microscope has no Camera to film with")
+    return camera
+
+def render_movie(microscope, frames, output, dynamics=None, frame_time=0.05, seed=None, method='auto',
+                 dtype=None, chunk_frames=64):
+    """Render a time-lapse into <output>.npy and return the path.
+
+    Frames are streamed into the file through a memory map of at most
+    chunk_frames frames at a time, so memory use does not grow with the
+    number of frames. dtype defaults to the detector's output type, or
+    float32 without one. The settings are written to <output>_params.json.
+    If rendering fails, the partly written file is removed.
+    """
+    camera = movie_camera(microscope)
+    path = f"{output}.npy"
+    frame_shape = camera.image.shape
+    if camera.detector is not None:
+        frame_shape = camera.detector.output_shape(frame_shape)
+        dtype = dtype or camera.detector.dtype
+    dtype = dtype or np.float32
+    # Create the file and its header, then map one chunk of frames at a time
+    stack = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=(frames,) + frame_shape)
+    offset = stack.offset
+    del stack
+    frame_bytes = np.dtype(dtype).itemsize * int(np.prod(frame_shape))
+
+    start = time.perf_counter()
+    chunk = None
+    try:
+        for index, image in enumerate(iter_movie(microscope, frames, dynamics, frame_time, seed, method)):
+            position = index % chunk_frames
+            if position == 0:
+                chunk = np.memmap(path, dtype=dtype, mode='r+', offset=offset + index * frame_bytes,
+                                  shape=(min(chunk_frames, frames - index),) + frame_shape)
+            chunk[position] = image
+            if position == len(chunk) - 1:
+                chunk.flush()
+                chunk = None
+    except BaseException:
+        chunk = None  # Unmap before removing the file
+        os.remove(path)
+        raise
+    elapsed = time.perf_counter() - start
+
+    with open(f"{output}_params.json", 'w') as f:
+        json.dump({'frames': frames, 'frame_time': frame_time, 'seed': seed, 'mode': microscope.mode,
+                   'emitters': len(microscope.sample)}, f, indent=2)
+    logger.info("Wrote %d frames to %s in %.2f s (%.1f frames/s)",
+                frames, path, elapsed, frames / elapsed if elapsed else 0)
+    return path
@@ -0,0 +1,116 @@
+# tirf_sim/simulation/profiling.py
+
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+from ..logger import logger
+
+class FrameProfiler:
+    """Per-stage frame timings kept in fixed-size ring buffers.
+
+    Each series ('trace', 'deposit', 'render', 'display', 'plot', 'frame',
+    'rays', 'hits') holds its last `capacity` values in a preallocated
+    float64 array, so recording a value is one store and never allocates.
+    Stages are timed in milliseconds; stats() gives rolling percentiles.
+
+    capture(frames, path) runs cProfile over the next `frames` frames on
+    the thread that calls begin_frame/end_frame and writes a pstats file,
+    which snakeviz, gprof2dot or flameprof can turn into a flame graph.
+    """
+    STAGES = ('trace', 'deposit', 'render', 'display', 'plot')
+    COUNTERS = ('rays', 'hits')
+    PERCENTILES = (50, 95, 99)
+
+    def __init__(self, capacity=512, enabled=True):
+        self.capacity = capacity
+        self.enabled = enabled
+        self.series = {name: np.zeros(capacity) for name in self.STAGES + ('frame',) + self.COUNTERS}
+        self.counts = dict.fromkeys(self.series, 0)
+        self._lock = threading.Lock()
+        self._frame_start = None
+        self._capture = None  # (cProfile.Profile, frames left, path)
+
+    def record(self, name, value):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.series[name][self.counts[name] % self.capacity] = value
+            self.counts[name] += 1
+
+    @contextmanager
+    def stage(self, name):
+        # Time the enclosed block as one sample of the named stage
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - start) * 1000)
+
+    def begin_frame(self):
+        if self._capture is not None:
+            self._capture[0].enable()
+        self._frame_start = time.perf_counter()
+
+    def end_frame(self, rays=0, hits=0):
+        if self._frame_start is not None:
+            self.record('frame', (time.perf_counter() - self._frame_start) * 1000)
+            self._frame_start = None
+        self.record('rays', rays)
+        self.record('hits', hits)
+        if self._capture is not None:
+            profile, frames, path = self._capture
+            profile.disable()
+            self._capture = (profile, frames - 1, path) if frames > 1 else None
+            if frames <= 1:
+                profile.dump_stats(path)
+                logger.info(f"Wrote frame profile to {path}")
+
+    def discard_frame(self):
+        # Drop a frame that produced nothing, without counting it
+        if self._capture is not None:
+            self._capture[0].disable()
+        self._frame_start = None
+
+    def capture(self, frames, path):
+        """Profile the next `frames` frames with cProfile and dump them to path."""
+        if frames < 1:
+            raise ValueError("Number of frames to profile must be at least 1")
+        import cProfile
+        self._capture = (cProfile.Profile(), frames, path)
+
+    def values(self, name):
+        # Recorded values of one series, oldest first
+        with self._lock:
+            count = self.counts[name]
+            data = self.series[name]
+            if count <= self.capacity:
+                return data[:count].copy()
+            start = count % self.capacity
+            return np.concatenate([data[start:], data[:start]])
+
+    def stats(self, name):
+        """Sample count, mean and p50/p95/p99 of one series; None if it is empty."""
+        values = self.values(name)
+        if not len(values):
+            return None
+        p50, p95, p99 = np.percentile(values, self.PERCENTILES)
+        return {'count': len(values), 'mean': float(values.mean()),
+                'p50': float(p50), 'p95': float(p95), 'p99': float(p99)}
+
+    def summary(self):
+        return {name: self.stats(name) for name in self.series if self.counts[name]}
+
+    def format_summary(self):
+        # One line per stage, for logs and the GUI overlay
+        lines = [f"{'stage':<8} {'p50':>7} {'p95':>7} {'p99':>7}"]
+        for name, stats in self.summary().items():
+            unit = '' if name in self.COUNTERS else ' ms'
+            lines.append(f"{name:<8} {stats['p50']:>7.2f} {stats['p95']:>7.2f} {stats['p99']:>7.2f}{unit}")
+        return '\n'.join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.counts = dict.fromkeys(self.series, 0)
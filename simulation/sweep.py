@@ -0,0 +1,161 @@
+# tirf_sim/simulation/sweep.py
+
+import copy
+import itertools
+import os
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .engine import SimulationEngine
+from .light_table import IMAGE_SIZE
+from .cache import ResultCache
+from ..microscope import Microscope
+from ..microscope.scene import build_microscope
+from ..optical_components import Laser, Camera
+from ..logger import logger
+
+CACHE_BYTES = 64 * 2**20  # In-memory result cache per worker
+
+SweepResult = namedtuple('SweepResult', ['index', 'params', 'image', 'elapsed'])
+
+# Engine set up once per worker process by init_worker and reused across tasks
+_worker_state = {}
+
+def parameter_grid(**axes):
+    """Every combination of the given parameter values, last axis fastest.
+
+    'angle_x', 'angle_y' (degrees) and 'power' set the Laser; keys of the
+    form 'Type.attribute', e.g. 'Objective.numerical_aperture', set that
+    attribute on every component of that type; 'is_on' is a list of
+    on/off states, one per microscope component.
+    """
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*axes.values())]
+
+def set_if_changed(component, attribute, value):
+    # Assigning bumps the component version, so skip no-op assignments
+    if not np.array_equal(getattr(component, attribute), value):
+        setattr(component, attribute, value)
+
+def apply_parameters(microscope, params):
+    laser = next((c for c in microscope.components if isinstance(c, Laser)), None)
+    for name, value in params.items():
+        if name in ('angle_x', 'angle_y', 'power'):
+            if laser is None:
+                raise ValueError("Scene has no Laser to sweep")
+            continue
+        if name == 'is_on':
+            for component, is_on in zip(microscope.components, value):
+                set_if_changed(component, 'is_on', bool(is_on))
+            continue
+        component_type, attribute = name.split('.')
+        matches = [c for c in microscope.components if type(c).__name__ == component_type]
+        if not matches:
+            raise ValueError(f"Scene has no {component_type} for parameter {name}")
+        for component in matches:
+            set_if_changed(component, attribute, value)
+
+    if laser is not None:
+        angle_x = np.radians(params.get('angle_x', np.degrees(laser.angle_x)))
+        angle_y = np.radians(params.get('angle_y', np.degrees(laser.angle_y)))
+        if not np.allclose([angle_x, angle_y], [laser.angle_x, laser.angle_y], rtol=0, atol=1e-12):
+            laser.set_angles(angle_x, angle_y)
+        set_if_changed(laser, 'power', params.get('power', laser.power))
+
+def render_configuration(engine, params, source='camera'):
+    apply_parameters(engine.microscope, params)
+    if source == 'camera':
+        image = engine.get_camera_image()
+        if image is None:
+            raise ValueError("Scene has no Camera to render")
+        return image.astype(np.float32)
+    return engine.get_image()
+
+def image_layout(microscope, source='camera'):
+    # (shape, dtype) of the images render_configuration returns
+    if source == 'camera':
+        camera = microscope.get_component(Camera)
+        if camera is None:
+            raise ValueError("Scene has no Camera to render")
+        return camera.image.shape, np.float32
+    return IMAGE_SIZE, np.uint8
+
+def init_worker(scene, source, cache_bytes=CACHE_BYTES, cache_dir=None, output=None):
+    # A Microscope, e.g. from load_scene's compiled cache, is used as it is
+    microscope = scene if isinstance(scene, Microscope) else build_microscope(scene)
+    engine = SimulationEngine(microscope, ResultCache(cache_bytes, cache_dir))
+    engine.start()
+    _worker_state['engine'] = engine
+    _worker_state['source'] = source
+    _worker_state['stack'] = np.load(output, mmap_mode='r+') if output is not None else None
+
+def run_task(task):
+    # With an output stack the image is written there and not sent back
+    index, params = task
+    start = time.perf_counter()
+    image = render_configuration(_worker_state['engine'], params, _worker_state['source'])
+    stack = _worker_state['stack']
+    if stack is not None:
+        stack[index] = image
+        image = None
+    return SweepResult(index, params, image, time.perf_counter() - start)
+
+def run_sweep(scene, parameters, workers=None, source='camera', chunksize=None, cache_bytes=CACHE_BYTES,
+              cache_dir=None, output=None):
+    """Render every parameter set of a scene, yielding results in order.
+
+    scene is a scene dict or a Microscope. A Microscope is copied to the
+    workers as it is, so a scene loaded with load_scene is not rebuilt
+    in every worker; the caller's Microscope is not changed.
+    workers=None uses one process per CPU; workers=1 runs in this process.
+    Each SweepResult carries the time its worker spent on the task.
+    Repeated configurations are served from each worker's in-memory
+    ResultCache of cache_bytes; with cache_dir, results are also stored
+    there and shared between workers and later sweeps.
+
+    With output, a .npy path, the images are stacked there: workers write
+    their frames into the memory-mapped file and send back only the
+    parameters and timing, and each result's image is its row of the
+    stack. Without it every image is pickled back to this process.
+    chunksize=None sends one task at a time when images come back, and
+    larger chunks when only small results do.
+    """
+    workers = workers or os.cpu_count()
+    tasks = list(enumerate(parameters))
+    start = time.perf_counter()
+
+    stack = None
+    if output is not None and tasks:
+        microscope = scene if isinstance(scene, Microscope) else build_microscope(scene)
+        shape, dtype = image_layout(microscope, source)
+        stack = np.lib.format.open_memmap(output, mode='w+', dtype=dtype, shape=(len(tasks),) + shape)
+    else:
+        output = None
+    if chunksize is None:
+        chunksize = 1 if stack is None else max(1, len(tasks) // (4 * workers))
+
+    if workers == 1:
+        init_worker(copy.deepcopy(scene), source, cache_bytes, cache_dir, output)
+        try:
+            yield from stacked(map(run_task, tasks), stack)
+        finally:
+            _worker_state.clear()
+    else:
+        # multiprocessing is only imported when a pool is used
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_worker,
+                                 initargs=(scene, source, cache_bytes, cache_dir, output)) as executor:
+            yield from stacked(executor.map(run_task, tasks, chunksize=chunksize), stack)
+
+    if stack is not None:
+        stack.flush()
+    elapsed = time.perf_counter() - start
+    logger.info("Swept %d configurations on %d workers in %.2f s (%.1f per second)",
+                len(tasks), workers, elapsed, len(tasks) / elapsed if elapsed else 0)
+
+def stacked(results, stack):
+    # Point each result at its row of the output stack, if there is one
+    for result in results:
+        yield result if stack is None else result._replace(image=stack[result.index])
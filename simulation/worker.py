@@ -0,0 +1,164 @@
+# tirf_sim/simulation/worker.py
+
+import threading
+import time
+from collections import deque, namedtuple
+
+import numpy as np
+
+from .sweep import apply_parameters
+from .lod import display_image
+from ..logger import logger
+
+Frame = namedtuple('Frame', ['sequence', 'params', 'image', 'rays', 'schematic', 'elapsed'])
+
+class SimulationWorker:
+    """Runs a SimulationEngine on a background thread.
+
+    Callers submit parameter snapshots (see sweep.apply_parameters); only
+    the newest snapshot not yet started is kept, so a slow frame never
+    builds a backlog. Finished frames go into a bounded queue that drops
+    the oldest frame when full, and on_frame() is called from the worker
+    thread after each one; the receiver should take latest_frame().
+    The worker owns the microscope while running, so other threads must
+    change it only through submit().
+
+    Frame images are uint8 display buffers taken from a small pool; hand
+    a frame back with release() once it is shown so its buffer is reused
+    instead of allocating a new one for every frame.
+
+    With level-of-detail rendering on (SimulationEngine.set_lod), a
+    changed snapshot first gives a coarse preview frame, and while no new
+    snapshot arrives the worker keeps sending progressively refined frames.
+    """
+
+    def __init__(self, engine, on_frame=None, max_queued_frames=2):
+        self.engine = engine
+        self.on_frame = on_frame
+        self.frames = deque(maxlen=max_queued_frames)
+        self.dropped_frames = 0
+        self.sequence = 0
+        self.frame_buffers = []  # Free display buffers
+        self.params = {}  # Snapshot shown by the latest frame
+        self.showing_lod = False  # Latest frame came from level-of-detail rendering
+        self._pending = None
+        self._condition = threading.Condition()
+        self._running = False
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self.run, name='tirf_sim-simulation', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        with self._condition:
+            self._running = False
+            self._condition.notify()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def submit(self, params):
+        # Replace any snapshot the worker has not started on yet
+        with self._condition:
+            self._pending = dict(params)
+            self._condition.notify()
+
+    def latest_frame(self):
+        """Newest finished frame, discarding older ones; None if there is none."""
+        with self._condition:
+            if not self.frames:
+                return None
+            frame = self.frames.pop()
+            self.dropped_frames += len(self.frames)
+            for stale in self.frames:
+                self.release_buffer(stale.image)
+            self.frames.clear()
+            return frame
+
+    def release(self, frame):
+        """Return a frame's image buffer to the pool once it is no longer used."""
+        with self._condition:
+            self.release_buffer(frame.image)
+
+    def release_buffer(self, buffer):
+        if buffer is not None:
+            self.frame_buffers.append(buffer)
+
+    def acquire_buffer(self, shape):
+        with self._condition:
+            while self.frame_buffers:
+                buffer = self.frame_buffers.pop()
+                if buffer.shape == shape:
+                    return buffer
+        return np.empty(shape, dtype=np.uint8)
+
+    def run(self):
+        while True:
+            with self._condition:
+                # With nothing submitted, keep refining a level-of-detail image until it converges
+                while self._pending is None and self._running and not self.engine.needs_refinement():
+                    self._condition.wait()
+                if not self._running:
+                    break
+                params, self._pending = self._pending, None
+
+            try:
+                frame = self.render(params)
+            except Exception as e:
+                logger.error(f"Error rendering frame: {str(e)}")
+                continue
+            if frame is None:
+                continue
+
+            with self._condition:
+                if len(self.frames) == self.frames.maxlen:
+                    self.dropped_frames += 1
+                    self.release_buffer(self.frames[0].image)
+                self.frames.append(frame)
+            if self.on_frame is not None:
+                self.on_frame()
+
+    def render(self, params):
+        # Apply a snapshot (None refines the current one) and trace it;
+        # None if there is nothing new to show
+        start = time.perf_counter()
+        profiler = self.engine.profiler
+        profiler.begin_frame()
+        if params is not None:
+            apply_parameters(self.engine.microscope, params)
+            self.params = params
+        if not self.engine.is_running:
+            profiler.discard_frame()
+            return None
+        # set_lod may swap the renderer from the GUI thread, so read it once
+        lod = self.engine.lod
+        if lod is not None:
+            # The renderer traces the light path itself, without the full-resolution deposit
+            with profiler.stage('trace'):
+                image = lod.render()
+            if image is None:
+                profiler.discard_frame()
+                return None
+            with profiler.stage('render'):
+                image = display_image(image, self.acquire_buffer(image.shape))
+            rays, hits = lod.ray_batch, lod.hits
+        else:
+            # Redraw the camera image after level-of-detail frames even if nothing changed
+            if self.engine.is_current() and self.sequence and not self.showing_lod:
+                profiler.discard_frame()
+                return None
+            # Traced, or taken from the engine's ResultCache for a state seen before
+            image = self.engine.get_camera_image()
+            if image is not None:
+                with profiler.stage('render'):
+                    image = display_image(image, self.acquire_buffer(image.shape))
+            rays, hits = self.engine.get_ray_batch(), self.engine.hits
+        self.showing_lod = lod is not None
+        self.sequence += 1
+        profiler.end_frame(rays=len(rays), hits=hits)
+        return Frame(self.sequence, self.params, image, rays,
+                     self.engine.get_schematic_representation(), time.perf_counter() - start)
@@ -0,0 +1,170 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from ..microscope.scene import build_microscope
+from ..optical_components import Lens
+from ..simulation import SimulationEngine, SimulationWorker, ResultCache, StateHasher, run_sweep, parameter_grid
+from ..simulation import cache as cache_module
+from ..simulation.sweep import apply_parameters
+from .test_render import SCENE
+
+class TestStateHash(unittest.TestCase):
+    def test_hash_follows_settings(self):
+        hasher = StateHasher()
+        first = build_microscope(SCENE)
+        key = hasher.digest(first)
+        # Stable across separately built microscopes and fresh hashers
+        self.assertEqual(StateHasher().digest(build_microscope(SCENE)), key)
+
+        changes = [lambda m: m.components[0].set_angles(0.1, 0),
+                   lambda m: setattr(m.components[0], 'wavelength', 561),
+                   lambda m: m.components[1].turn_off(),
+                   lambda m: setattr(m.components[2], 'position', (600, 501, 0)),
+                   lambda m: setattr(m.components[2], 'psf_sigma', 3),
+                   lambda m: m.set_mode('Epifluorescence')]
+        keys = {key}
+        for change in changes:
+            microscope = build_microscope(SCENE)
+            change(microscope)
+            keys.add(hasher.digest(microscope))
+        self.assertEqual(len(keys), len(changes) + 1)
+
+        # Settings stored behind a property setter count too
+        microscope = build_microscope(SCENE)
+        lens = Lens([500, 500, 0], [0, 0, 1], 100, 25)
+        microscope.add_component(lens)
+        before = hasher.digest(microscope)
+        lens.focal_length = 200
+        self.assertNotEqual(hasher.digest(microscope), before)
+
+        # Drawing on the camera does not change the state
+        first.components[2].image[:] = 7
+        self.assertEqual(hasher.digest(first), key)
+        self.assertNotEqual(hasher.digest(first, 'camera'), key)
+
+class TestResultCache(unittest.TestCase):
+    def test_lru_bounded_by_bytes(self):
+        cache = ResultCache(max_bytes=3 * 800)
+        for key in 'abc':
+            cache.put(key, np.zeros(100))
+        self.assertIsNotNone(cache.get('a'))
+        cache.put('d', np.zeros(100))
+        # 'b' was least recently used
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(sorted(cache.entries), ['a', 'c', 'd'])
+        self.assertEqual(cache.nbytes, 2400)
+        with self.assertRaises(ValueError):
+            cache.get('a')[0] = 1
+
+    def test_disk_tier_is_shared(self):
+        with tempfile.TemporaryDirectory() as directory:
+            ResultCache(directory=directory).put('key', np.arange(6.0).reshape(2, 3))
+            other = ResultCache(directory=directory)
+            image = other.get('key')
+            self.assertIsInstance(image, np.memmap)
+            np.testing.assert_array_equal(image, np.arange(6.0).reshape(2, 3))
+            self.assertEqual(other.disk_hits, 1)
+            self.assertEqual(os.listdir(directory), [os.path.basename(other.path('key'))])
+
+            # Results from another cache version or code are not served
+            with mock.patch.object(cache_module, 'CACHE_VERSION', cache_module.CACHE_VERSION + 1):
+                self.assertIsNone(ResultCache(directory=directory).get('key'))
+
+    def test_disk_tier_is_bounded(self):
+        with tempfile.TemporaryDirectory() as directory:
+            cache = ResultCache(directory=directory, max_disk_bytes=2 * 928)
+            for age, key in enumerate('ab'):
+                cache.put(key, np.zeros(100))
+                os.utime(cache.path(key), (age, age))
+            os.utime(cache.path('a'), (5, 5))  # 'b' is now least recently used
+            cache.put('c', np.zeros(100))
+            self.assertEqual(sorted(os.listdir(directory)),
+                             sorted(os.path.basename(cache.path(key)) for key in 'ac'))
+            self.assertEqual(cache.disk_bytes, 2 * 928)
+
+    def test_disk_trim_keeps_other_files(self):
+        with tempfile.TemporaryDirectory() as directory:
+            user_file = os.path.join(directory, 'sweep.npy')
+            np.save(user_file, np.zeros(10000))
+            os.utime(user_file, (0, 0))
+            cache = ResultCache(directory=directory, max_disk_bytes=50000)
+            cache.put('key', np.zeros(100))
+            self.assertTrue(os.path.exists(user_file))
+            self.assertTrue(os.path.exists(cache.path('key')))
+            self.assertEqual(cache.disk_bytes, 928)
+
+    def test_engine_serves_repeated_states(self):
+        engine = SimulationEngine(build_microscope(SCENE), ResultCache())
+        engine.start()
+        images = []
+        for angle in [80, 85, 80]:
+            apply_parameters(engine.microscope, {'angle_x': angle})
+            images.append(engine.get_camera_image())
+        self.assertIs(images[2], images[0])
+        self.assertEqual((engine.cache.hits, engine.cache.misses), (1, 2))
+        self.assertFalse(np.array_equal(images[0], images[1]))
+
+    def test_cache_hit_restores_traced_state(self):
+        engine = SimulationEngine(build_microscope(SCENE), ResultCache())
+        engine.start()
+        camera = engine.microscope.components[2]
+        traced = []
+        for angle in [80, 85]:
+            apply_parameters(engine.microscope, {'angle_x': angle})
+            engine.get_camera_image()
+            traced.append((engine.get_ray_batch(), camera.image.copy()))
+
+        # Back to the first state: served from the cache with its rays and camera image
+        apply_parameters(engine.microscope, {'angle_x': 80})
+        engine.get_camera_image()
+        self.assertEqual(engine.cache.hits, 1)
+        np.testing.assert_array_equal(engine.get_ray_batch().directions, traced[0][0].directions)
+        np.testing.assert_array_equal(camera.image, traced[0][1])
+        # The light table image is not cached yet; it is traced afresh
+        np.testing.assert_array_equal(engine.get_image(), engine.light_table.get_image())
+
+        # The next change is traced from scratch
+        apply_parameters(engine.microscope, {'angle_x': 90})
+        engine.get_camera_image()
+        self.assertEqual(engine.light_table.tracer.retraced_from, 0)
+        self.assertFalse(np.array_equal(camera.image, traced[0][1]))
+
+    def test_worker_serves_earlier_state_from_cache(self):
+        engine = SimulationEngine(build_microscope(SCENE), ResultCache())
+        engine.start()
+        worker = SimulationWorker(engine)
+        frames = [worker.render({'angle_x': angle}) for angle in [80, 85, 80]]
+        self.assertEqual((engine.cache.hits, engine.cache.misses), (1, 2))
+        np.testing.assert_array_equal(frames[2].image, frames[0].image)
+        np.testing.assert_array_equal(frames[2].rays.directions, frames[0].rays.directions)
+
+    def test_progressive_image_reused(self):
+        engine = SimulationEngine(build_microscope(SCENE), ResultCache())
+        engine.start()
+        laser = engine.microscope.components[0]
+        laser.set_angles(np.radians(85), 0)
+        engine.set_lod(True, preview_photons=1000, refine_photons=1000, max_photons=2000)
+        frames = [engine.render_lod_frame() for _ in range(3)]
+        self.assertFalse(engine.needs_refinement())
+
+        laser.power = 50
+        engine.render_lod_frame()
+        laser.power = 100
+        # Back to the first state: the converged image, with no preview or refinement
+        self.assertIs(engine.render_lod_frame(), frames[2])
+        self.assertFalse(engine.needs_refinement())
+
+    def test_sweep_reuses_disk_cache(self):
+        grid = parameter_grid(angle_x=[80, 85, 90, 80])
+        with tempfile.TemporaryDirectory() as directory:
+            first = list(run_sweep(SCENE, grid, workers=2, cache_dir=directory))
+            self.assertEqual(len(os.listdir(directory)), 3)
+            second = list(run_sweep(SCENE, grid, workers=1, cache_dir=directory, cache_bytes=0))
+        for a, b in zip(first, second):
+            np.testing.assert_array_equal(a.image, b.image)
+        np.testing.assert_array_equal(first[3].image, first[0].image)
+
+if __name__ == '__main__':
+    unittest.main()
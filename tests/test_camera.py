@@ -0,0 +1,108 @@
+import unittest
+import numpy as np
+from ..optical_components.camera import Camera
+
+def reference_spot(shape, x, y, sigma=5, radius=20):
+    # Direct per-pixel evaluation of a single diffraction spot
+    image = np.zeros(shape)
+    x_range = np.arange(max(0, int(x) - radius), min(shape[1], int(x) + radius + 1))
+    y_range = np.arange(max(0, int(y) - radius), min(shape[0], int(y) + radius + 1))
+    xx, yy = np.meshgrid(x_range, y_range)
+    gaussian = np.exp(-((xx - x) ** 2 + (yy - y) ** 2) / (2 * sigma))
+    image[y_range[0]:y_range[-1] + 1, x_range[0]:x_range[-1] + 1] = gaussian / gaussian.max() * 255
+    return image
+
+class TestCameraSplatting(unittest.TestCase):
+    def setUp(self):
+        self.camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(200, 200))
+
+    def test_single_spot_matches_reference(self):
+        self.camera.add_diffraction_spot(80.37, 120.81)
+        expected = reference_spot(self.camera.image.shape, 80.37, 120.81)
+        np.testing.assert_allclose(self.camera.image, expected, atol=5)
+
+    def test_spot_clipped_at_sensor_edge(self):
+        self.camera.add_diffraction_spots([1.5, 198.5], [0.2, 199.9])
+        self.assertGreater(self.camera.image[0, 1], 200)
+        self.assertGreater(self.camera.image[199, 198], 200)
+
+    def test_accumulate_modes(self):
+        xs, ys = [100.0, 100.0], [100.0, 100.0]
+        self.camera.add_diffraction_spots(xs, ys, mode='max')
+        self.assertAlmostEqual(self.camera.image[100, 100], 255)
+
+        self.camera.clear_image()
+        self.camera.add_diffraction_spots(xs, ys, weights=[1.0, 0.5], mode='add')
+        self.assertAlmostEqual(self.camera.image[100, 100], 255 * 1.5)
+
+        with self.assertRaises(ValueError):
+            self.camera.add_diffraction_spots(xs, ys, mode='mean')
+
+class TestCameraBuffers(unittest.TestCase):
+    def test_image_dtypes(self):
+        camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(50, 50))
+        self.assertEqual(camera.image.dtype, np.float32)
+        with self.assertRaises(ValueError):
+            Camera(position=(0, 0, 0), orientation=(-1, 0, 0), dtype=np.int8)
+
+    def test_uint16_accumulation_saturates(self):
+        camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(50, 50), dtype=np.uint16)
+        camera.add_diffraction_spots([25.0] * 300, [25.0] * 300, mode='add')
+        self.assertEqual(camera.image.dtype, np.uint16)
+        self.assertEqual(camera.image[25, 25], 65535)
+        self.assertEqual(camera.image[0, 0], 0)
+
+    def test_display_image_reuses_buffer(self):
+        camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(50, 60))
+        camera.add_diffraction_spots([30.0, 30.0], [25.0, 25.0], mode='add')
+        buffer = np.empty((50, 60), dtype=np.uint8)
+        display = camera.get_display_image(buffer)
+        self.assertIs(display, buffer)
+        self.assertEqual(display[25, 30], 255)
+        self.assertTrue(display.flags.c_contiguous)
+
+        camera.turn_off()
+        self.assertIs(camera.get_image(), camera.get_image())
+        self.assertFalse(camera.get_display_image(buffer).any())
+
+class TestCameraFFTImaging(unittest.TestCase):
+    def setUp(self):
+        self.camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(64, 64))
+        rng = np.random.default_rng(0)
+        self.xs, self.ys = rng.uniform(8, 56, (2, 200))
+        self.weights = rng.uniform(0.5, 2, 200)
+
+    def test_fft_matches_direct_splatting(self):
+        self.camera.render_spots(self.xs, self.ys, self.weights, variance=4, radius=8, method='direct')
+        direct = self.camera.image.copy()
+        self.camera.clear_image()
+        self.camera.render_spots(self.xs, self.ys, self.weights, variance=4, radius=8, method='fft')
+        np.testing.assert_allclose(self.camera.image, direct, atol=0.02 * direct.max())
+        self.assertAlmostEqual(self.camera.image.sum(), self.weights.sum(), places=2)
+
+    def test_auto_picks_fft_for_dense_samples(self):
+        self.assertEqual(self.camera.render_spots(self.xs[:10], self.ys[:10], 1, 4, 8), 'direct')
+        xs, ys = np.tile(self.xs, 100), np.tile(self.ys, 100)
+        self.assertEqual(self.camera.render_spots(xs, ys, 1, 4, 8), 'fft')
+        with self.assertRaises(ValueError):
+            self.camera.render_spots(xs, ys, 1, 4, 8, method='splat')
+
+    def test_transfer_function_cached(self):
+        shape = self.camera.get_fft_grid_shape(8, 2)
+        first = self.camera.get_psf_transfer_function(shape, 4, 8, 2)
+        self.assertIs(self.camera.get_psf_transfer_function(shape, 4, 8, 2), first)
+        self.assertIsNot(self.camera.get_psf_transfer_function(shape, 9, 8, 2), first)
+
+    def test_psf_caches_are_bounded(self):
+        # Sweeping the PSF width keeps only the most recent settings
+        shape = self.camera.get_fft_grid_shape(8, 2)
+        for variance in range(1, 40):
+            self.camera.get_psf_transfer_function(shape, variance, 8, 2)
+            self.camera.get_psf_kernel_table(variance, 8)
+        self.assertEqual(len(self.camera._psf_transfer_functions), Camera.MAX_PSF_TRANSFER_FUNCTIONS)
+        self.assertEqual(len(self.camera._psf_kernel_tables), Camera.MAX_PSF_KERNEL_TABLES)
+        latest = self.camera.get_psf_kernel_table(39, 8)
+        self.assertIs(self.camera.get_psf_kernel_table(39, 8), latest)
+
+if __name__ == '__main__':
+    unittest.main()
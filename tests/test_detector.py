@@ -0,0 +1,47 @@
+import unittest
+import numpy as np
+from ..optical_components import Camera, DetectorModel
+
+class TestDetectorModel(unittest.TestCase):
+    def setUp(self):
+        self.photons = np.full((200, 300), 100.0)
+        # Ideal detector: counts are photons plus the offset, with shot noise only
+        self.detector = DetectorModel(quantum_efficiency=1.0, read_noise=0, dark_current=0, offset=100)
+
+    def test_shot_noise_statistics(self):
+        counts = self.detector.apply(self.photons, seed=1)
+        self.assertEqual(counts.dtype, np.uint16)
+        self.assertAlmostEqual(counts.mean(), 200, delta=0.2)
+        self.assertAlmostEqual(counts.astype(float).var(), 100, delta=3)
+
+    def test_em_gain_doubles_relative_variance(self):
+        self.detector.em_gain = 10
+        self.detector.adc_gain = 10
+        counts = self.detector.apply(self.photons, seed=2).astype(float) - 100
+        self.assertAlmostEqual(counts.mean(), 100, delta=0.5)
+        # Excess noise factor of 2 for a high-gain EM register
+        self.assertAlmostEqual(counts.var() / 100, 2, delta=0.1)
+
+    def test_per_frame_seeding(self):
+        first = self.detector.apply(self.photons, seed=3, frame=5)
+        np.testing.assert_array_equal(self.detector.apply(self.photons, seed=3, frame=5), first)
+        self.assertFalse(np.array_equal(self.detector.apply(self.photons, seed=3, frame=6), first))
+
+    def test_binning_and_adc_range(self):
+        self.detector.binning = 4
+        self.detector.bit_depth = 8
+        counts = self.detector.apply(self.photons[:, :299], seed=4)
+        self.assertEqual(counts.shape, (50, 74))
+        self.assertEqual(counts.dtype, np.uint16)
+        # 1600 photons per binned pixel saturate an 8-bit ADC
+        self.assertTrue(np.all(counts == 255))
+
+    def test_camera_read_out(self):
+        camera = Camera(position=(0, 0, 0), orientation=(-1, 0, 0), sensor_size=(20, 20))
+        camera.image[:] = 50
+        self.assertIs(camera.read_out(), camera.image)
+        camera.detector = self.detector
+        self.assertAlmostEqual(camera.read_out(seed=5).mean(), 150, delta=2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+import unittest
+import numpy as np
+from ..optical_components import Camera, Lens, Mirror
+
+class TestGeometryCache(unittest.TestCase):
+    def test_geometry_cached_until_moved(self):
+        camera = Camera(position=(600, 500, 0), orientation=(-1, 0, 0), sensor_size=(10, 10))
+        geometry = camera.geometry
+        self.assertIs(camera.geometry, geometry)
+        np.testing.assert_array_almost_equal(camera.get_local_x(), [0, 1, 0])
+        np.testing.assert_array_almost_equal(camera.get_local_y(), [0, 0, 1])
+
+        camera.position = (0, 0, 0)
+        self.assertIsNot(camera.geometry, geometry)
+        camera.orientation = (0, 1, 0)
+        np.testing.assert_array_almost_equal(camera.get_local_x(), [1, 0, 0])
+
+    def test_in_place_change_rejected(self):
+        mirror = Mirror(position=(0, 0, 0), orientation=(1, 0, 1), size=(1, 1))
+        with self.assertRaises(ValueError):
+            mirror.position[0] = 1
+        with self.assertRaises(ValueError):
+            mirror.orientation[0] = 1
+
+    def test_lens_focal_point_follows_focal_length(self):
+        lens = Lens(position=(0, 0, 0), orientation=(0, 0, 1), focal_length=50, diameter=25)
+        np.testing.assert_array_almost_equal(lens.geometry.focal_point, [0, 0, 50])
+        lens.focal_length = 20
+        np.testing.assert_array_almost_equal(lens.geometry.focal_point, [0, 0, 20])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,23 @@
+import os
+import subprocess
+import sys
+import unittest
+
+PACKAGE = __package__.rsplit('.', 1)[0]
+ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+class TestImports(unittest.TestCase):
+    def test_core_imports_are_light(self):
+        # A fresh interpreter, as in a sweep worker or the headless renderer
+        code = (f"import logging, sys\n"
+                f"import {PACKAGE}.simulation, {PACKAGE}.sample, {PACKAGE}.render, {PACKAGE}.gui\n"
+                f"print(sorted(m for m in ['PyQt5', 'pyqtgraph', 'scipy', 'multiprocessing', 'cProfile'] "
+                f"if m in sys.modules))\n"
+                f"print(logging.getLogger('tirf_sim').handlers)\n")
+        env = dict(os.environ, PYTHONPATH=ROOT)
+        output = subprocess.run([sys.executable, '-c', code], env=env, capture_output=True, text=True,
+                                check=True).stdout
+        self.assertEqual(output.splitlines(), ['[]', '[]'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import unittest
+import numpy as np
+from ..microscope.tracer import SequentialTracer
+from ..optical_components import Camera, Filter, Laser, Mirror, RayBatch
+from ..simulation.light_table import LightTable
+
+def build_bench():
+    # Beam along +x, folded up to +z by a mirror, then through a filter
+    # and folded back to +x onto the camera
+    camera = Camera(position=(300, -50, 150), orientation=(-1, 0, 0), sensor_size=(100, 100))
+    return [
+        Mirror(position=(100, 0, 0), orientation=(1, 0, 1), size=(20, 20)),
+        Filter(position=(100, 0, 100), orientation=(0, 0, 1), pass_band=(400, 700)),
+        Mirror(position=(100, 0, 200), orientation=(1, 0, 1), size=(20, 20)),
+        camera,
+    ], camera
+
+class TestIncrementalTrace(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.batch = RayBatch(origins=np.column_stack([np.zeros(50), rng.normal(0, 2, (50, 2))]),
+                              directions=(1, 0, 0), wavelengths=488, lengths=1000)
+
+    def test_version_tracks_assignments(self):
+        laser = Laser(position=(0, 0, 0), orientation=(1, 0, 0), wavelength=488, power=100)
+        version = laser.version
+        laser.set_angles(0.1, 0)
+        self.assertGreater(laser.version, version)
+        version = laser.version
+        laser.turn_off()
+        self.assertGreater(laser.version, version)
+
+    def test_unchanged_scene_is_not_retraced(self):
+        components, camera = build_bench()
+        tracer = SequentialTracer()
+        first = tracer.trace(components, self.batch)
+        self.assertEqual(tracer.retraced_from, 0)
+        image = camera.image.copy()
+        self.assertTrue(image.any())
+
+        second = tracer.trace(components, self.batch)
+        self.assertIsNone(tracer.retraced_from)
+        np.testing.assert_array_equal(first.origins, second.origins)
+        np.testing.assert_array_equal(camera.image, image)
+
+    def test_change_retraces_downstream_only(self):
+        components, camera = build_bench()
+        tracer = SequentialTracer()
+        tracer.trace(components, self.batch)
+
+        # The filter is only reached on the second bounce
+        components[1].pass_band = (500, 700)
+        segments = tracer.trace(components, self.batch)
+        self.assertEqual(tracer.retraced_from, 1)
+        self.assertFalse(camera.image.any())
+
+        components[1].pass_band = (400, 700)
+        components[3].position = (300, -40, 150)
+        segments = tracer.trace(components, self.batch)
+        self.assertEqual(tracer.retraced_from, 1)
+        image = camera.image.copy()
+
+        fresh_components, fresh_camera = build_bench()
+        fresh_camera.position = (300, -40, 150)
+        expected = SequentialTracer().trace(fresh_components, self.batch)
+        np.testing.assert_array_almost_equal(segments.origins, expected.origins)
+        np.testing.assert_array_almost_equal(segments.lengths, expected.lengths)
+        np.testing.assert_array_equal(image, fresh_camera.image)
+
+    def test_light_table_reports_changes(self):
+        light_table = LightTable()
+        laser = Laser(position=(0, 0, 0), orientation=(1, 0, 0), wavelength=488, power=100)
+        laser.set_angles(np.pi / 2, 0)
+        components, camera = build_bench()
+        for component in [laser] + components:
+            light_table.add_component(component)
+
+        self.assertTrue(light_table.simulate_light_path())
+        self.assertTrue(camera.image.any())
+        self.assertFalse(light_table.simulate_light_path())
+        self.assertTrue(camera.image.any())
+
+        laser.power = 50
+        self.assertTrue(light_table.simulate_light_path())
+        laser.turn_off()
+        self.assertTrue(light_table.simulate_light_path())
+        self.assertFalse(camera.image.any())
+
+if __name__ == '__main__':
+    unittest.main()
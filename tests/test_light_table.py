@@ -0,0 +1,36 @@
+import unittest
+import numpy as np
+from ..simulation.light_table import LightTable
+from ..optical_components import Objective, Ray
+
+def reference_image(size, ray):
+    # Per-pixel loop the vectorized renderer replaces
+    image = np.zeros(size)
+    x = int(size[0] / 2 + ray.direction[0] * 20)
+    y = int(size[1] / 2 + ray.direction[1] * 20)
+    for i in range(size[0]):
+        for j in range(size[1]):
+            distance = np.sqrt((i - x)**2 + (j - y)**2)
+            image[j, i] = 255 * np.exp(-distance**2 / (2 * 5**2))
+    return np.clip(image, 0, 255).astype(np.uint8)
+
+class TestLightTableImage(unittest.TestCase):
+    def setUp(self):
+        self.light_table = LightTable()
+        self.light_table.add_component(Objective(position=(0, 0, 0), orientation=(0, 0, 1),
+                                                 magnification=60, numerical_aperture=1.49))
+
+    def test_matches_reference(self):
+        for direction in [(0, 0, 1), (0.7, -0.3, 0.6), (-1, 1, 0)]:
+            for size in [(100, 100), (48, 48)]:
+                ray = Ray(origin=(0, 0, 0), direction=direction, wavelength=488)
+                self.light_table.rays = [ray]
+                np.testing.assert_array_equal(self.light_table.get_image(size), reference_image(size, ray))
+
+    def test_no_rays_gives_blank_image(self):
+        image = self.light_table.get_image((64, 64))
+        self.assertEqual(image.dtype, np.uint8)
+        self.assertFalse(image.any())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import os
+import unittest
+import numpy as np
+from ..optical_components import RayBatch
+
+try:
+    os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+    from PyQt5.QtWidgets import QApplication
+    from ..gui.light_table_view import LightTableView
+except ImportError:
+    QApplication = None
+
+COMPONENTS = [
+    ('rectangle', np.array([100, 500]), np.array([1, 0]), (20, 20)),
+    ('circle', np.array([300, 500]), np.array([1, 0]), (30, 30)),
+]
+
+@unittest.skipIf(QApplication is None, "PyQt5 and pyqtgraph are required")
+class TestLightTableView(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        self.view = LightTableView()
+        rng = np.random.default_rng(0)
+        self.rays = RayBatch(origins=rng.uniform(0, 1000, (200, 3)), directions=rng.normal(size=(200, 3)),
+                             wavelengths=488, lengths=100)
+
+    def test_items_are_retained(self):
+        self.view.update_light_table(COMPONENTS, self.rays)
+        items = list(self.view.plot_widget.listDataItems())
+        self.assertEqual(len(items), 3)  # Two components and one ray item
+
+        moved = [COMPONENTS[0], ('circle', np.array([320, 500]), np.array([1, 0]), (30, 30))]
+        self.view.update_light_table(moved, self.rays[:10])
+        self.assertEqual(self.view.plot_widget.listDataItems(), items)
+        x, y = self.view.ray_item.getData()
+        self.assertEqual(len(x), 20)
+
+        self.view.update_light_table(moved[:1], [])
+        self.assertEqual(len(self.view.plot_widget.listDataItems()), 2)
+
+    def test_auto_range_only_on_bounds_change(self):
+        calls = []
+        self.view.plot_widget.autoRange = lambda *args: calls.append(args)
+        self.view.update_light_table(COMPONENTS, self.rays)
+        self.view.update_light_table(COMPONENTS, self.rays)
+        self.assertEqual(len(calls), 1)
+        self.view.update_light_table(COMPONENTS, self.rays[:5])
+        self.assertEqual(len(calls), 2)
+
+if __name__ == '__main__':
+    unittest.main()
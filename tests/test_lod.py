@@ -0,0 +1,122 @@
+import threading
+import time
+import unittest
+import numpy as np
+from ..microscope.scene import build_microscope, DEFAULT_SCENE
+from ..optical_components import Camera
+from ..simulation import SimulationEngine, SimulationWorker
+from ..simulation.lod import display_image
+from ..simulation.sweep import apply_parameters
+from .test_render import SCENE
+
+class TestLevelOfDetail(unittest.TestCase):
+    def setUp(self):
+        self.engine = SimulationEngine(build_microscope(SCENE))
+        self.engine.start()
+        self.engine.microscope.components[0].set_angles(np.radians(85), 0)
+        self.engine.set_lod(True, preview_scale=4, preview_photons=1000, refine_photons=2**15, max_photons=2**17)
+        self.lod = self.engine.lod
+
+    def test_preview_then_refinement(self):
+        camera = self.engine.microscope.components[2]
+        preview = self.engine.render_lod_frame()
+        self.assertEqual(preview.shape, (16, 16))
+        self.assertGreater(preview.max(), 0)
+        self.assertTrue(self.lod.is_refining())
+        # The light path was propagated without drawing on the full sensor
+        self.assertEqual(self.lod.hits, 1)
+        self.assertFalse(camera.image.any())
+
+        passes = [self.engine.render_lod_frame() for _ in range(5)]
+        self.assertIsNone(passes.pop())
+        for image in passes:
+            self.assertEqual(image.shape, (64, 64))
+        self.assertFalse(self.engine.needs_refinement())
+
+        # The running average converges to the camera image
+        full = SimulationEngine(build_microscope(SCENE))
+        full.microscope.components[0].set_angles(np.radians(85), 0)
+        full.start()
+        expected = full.get_camera_image()
+        errors = [np.abs(image - expected).max() for image in passes]
+        self.assertLess(errors[-1], 0.05 * expected.max())
+        self.assertLess(errors[-1], errors[0])
+
+        # A change goes back to a preview and refinement starts over
+        self.engine.microscope.components[0].power = 50
+        self.assertEqual(self.engine.render_lod_frame().shape, (16, 16))
+        self.assertEqual(self.lod.passes, 0)
+
+    def test_seeds_do_not_overlap(self):
+        # The preview and the first refinement pass draw different photons
+        self.lod.preview_scale = 1
+        self.lod.preview_photons = self.lod.refine_photons
+        preview = self.engine.render_lod_frame()
+        self.assertFalse(np.array_equal(self.engine.render_lod_frame(), preview))
+
+    def test_preview_is_cheaper_than_a_frame(self):
+        engine = SimulationEngine(build_microscope(DEFAULT_SCENE))
+        engine.start()
+        camera = engine.microscope.get_component(Camera)
+
+        def full_frame():
+            engine.trace_frame()
+            return camera.get_display_image()
+
+        def preview():
+            return display_image(engine.render_lod_frame())
+
+        timings = {}
+        for name, render in [('full', full_frame), ('preview', preview)]:
+            engine.set_lod(name == 'preview')
+            samples = []
+            for angle in np.linspace(80, 90, 21):
+                apply_parameters(engine.microscope, {'angle_x': angle})
+                start = time.perf_counter()
+                render()
+                samples.append(time.perf_counter() - start)
+            timings[name] = np.median(samples)
+        self.assertLess(timings['preview'], timings['full'])
+
+    def test_switching_off_during_render(self):
+        # The worker renders with the renderer it checked, even if set_lod runs meanwhile
+        worker = SimulationWorker(self.engine)
+        lod = self.lod
+
+        class SwitchOff:
+            def render(inner):
+                self.engine.set_lod(False)
+                return lod.render()
+
+            def __getattr__(inner, name):
+                return getattr(lod, name)
+
+        self.engine.lod = SwitchOff()
+        frame = worker.render({'angle_x': 85})
+        self.assertEqual(frame.image.shape, (16, 16))
+        self.assertTrue(worker.showing_lod)
+
+    def test_worker_refines_while_idle(self):
+        frames = []
+        done = threading.Event()
+
+        def on_frame():
+            frame = worker.latest_frame()
+            if frame is not None:
+                frames.append(frame.image.shape)
+                worker.release(frame)
+            if len(frames) == 5:
+                done.set()
+
+        worker = SimulationWorker(self.engine, on_frame=on_frame, max_queued_frames=8)
+        worker.start()
+        try:
+            worker.submit({'angle_x': 85})
+            self.assertTrue(done.wait(5))
+        finally:
+            worker.stop(timeout=5)
+        # A preview and refinement passes from a single snapshot
+        self.assertEqual(frames, [(16, 16)] + [(64, 64)] * 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from ..microscope import Microscope
+from ..simulation import simulate_photons
+from ..simulation.monte_carlo import map_in_order
+from ..optical_components import Laser, Camera
+
+class TestMonteCarlo(unittest.TestCase):
+    def setUp(self):
+        # Beam along +x onto the middle of a 64 x 64 sensor
+        self.microscope = Microscope()
+        self.laser = Laser(position=(100, 532, 32), orientation=(1, 0, 0), wavelength=488, power=100,
+                           beam_waist=10)
+        self.laser.set_angles(np.pi / 2, 0)
+        self.microscope.add_component(self.laser)
+        self.microscope.add_component(Camera(position=(600, 500, 0), orientation=(-1, 0, 0), sensor_size=(64, 64)))
+
+    def test_gaussian_beam_profile(self):
+        laser = Laser(position=(0, 0, 0), orientation=(1, 0, 0), wavelength=488, power=1, beam_waist=4)
+        photons = laser.emit_photons(100000, np.random.default_rng(0), weight=2.0)
+        offsets = photons.origins - laser.position
+        # Spread across the beam only, with sigma = waist / 2 along each axis
+        np.testing.assert_allclose(offsets @ laser.calculate_direction(), 0, atol=1e-9)
+        self.assertAlmostEqual(np.sqrt(np.mean(np.sum(offsets**2, axis=1) / 2)), 2, delta=0.02)
+        np.testing.assert_array_equal(photons.intensities, 2.0)
+
+    def test_counts_follow_beam_and_power(self):
+        counts = simulate_photons(self.microscope, 100000, seed=1)[0]
+        for axis in np.indices(counts.shape):
+            # Pixel i spans [i, i + 1), so a beam centred at 32 averages to index 31.5
+            centre = np.average(axis, weights=counts)
+            self.assertAlmostEqual(centre, 31.5, delta=0.1)
+            # Beam sigma of 5 pixels, widened slightly by binning into pixels
+            self.assertAlmostEqual(np.sqrt(np.average((axis - centre)**2, weights=counts)), 5, delta=0.1)
+
+        # Real photons in the exposure: P t lambda / (h c); all but the far tails land on the sensor
+        emitted = 0.1 * 0.05 * 488e-9 / (6.62607015e-34 * 299792458.0)
+        self.assertAlmostEqual(counts.sum() / emitted, 1, delta=1e-3)
+        self.laser.power = 50
+        half = simulate_photons(self.microscope, 100000, seed=1)[0]
+        np.testing.assert_allclose(half, counts / 2)
+        self.laser.power = 0
+        self.assertFalse(simulate_photons(self.microscope, 1000)[0].any())
+
+    def test_identical_across_worker_counts(self):
+        serial = simulate_photons(self.microscope, 50000, seed=7, chunk_size=1000)
+        parallel = simulate_photons(self.microscope, 50000, seed=7, chunk_size=1000, workers=3)
+        np.testing.assert_array_equal(parallel[0], serial[0])
+        other_seed = simulate_photons(self.microscope, 50000, seed=8, chunk_size=1000)
+        self.assertFalse(np.array_equal(other_seed[0], serial[0]))
+
+    def test_blocks_in_flight_are_bounded(self):
+        yielded = []
+        in_flight = []  # Tasks submitted and not yet yielded, at each submit
+
+        class Executor(ThreadPoolExecutor):
+            def submit(self, function, task):
+                in_flight.append(task + 1 - len(yielded))
+                return super().submit(function, task)
+
+        def task(i):
+            time.sleep(0.01 if i == 0 else 0)  # A slow first block holds back the rest
+            return i
+
+        with Executor(4) as executor:
+            for result in map_in_order(executor, task, range(20), window=3):
+                yielded.append(result)
+        self.assertEqual(yielded, list(range(20)))
+        self.assertEqual(max(in_flight), 3)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from ..microscope import Microscope
+from ..optical_components import Laser, Objective, Camera, DetectorModel
+from ..sample import FluorophoreSample, FluorophoreDynamics
+from ..simulation import render_movie, iter_movie
+
+def build_microscope(count=500, seed=0):
+    microscope = Microscope()
+    microscope.add_component(Laser(position=(0, 0, 0), orientation=(0, 0, 1), wavelength=488, power=1))
+    microscope.add_component(Objective(position=(0, 0, 10), orientation=(0, 0, 1),
+                                       magnification=100, numerical_aperture=1.49))
+    microscope.add_component(Camera(position=(0, 0, 100), orientation=(0, 0, -1), sensor_size=(32, 48)))
+    microscope.set_sample(FluorophoreSample.random(count, extent=(48 * 160, 32 * 160), depth=200, seed=seed))
+    return microscope
+
+class TestFluorophoreDynamics(unittest.TestCase):
+    def test_blinking_reaches_steady_state(self):
+        sample = FluorophoreSample(np.zeros((20000, 3)))
+        dynamics = FluorophoreDynamics(on_rate=1.0, off_rate=3.0, bleach_rate=0)
+        rng = np.random.default_rng(1)
+        for _ in range(100):
+            dynamics.step(sample, 0.05, rng=rng)
+        # on / (on + off) of the emitters are active at equilibrium
+        self.assertAlmostEqual(np.mean(sample.states == sample.ACTIVE), 0.25, delta=0.02)
+        self.assertFalse(np.any(sample.states == sample.BLEACHED))
+
+    def test_bleaching_is_permanent_and_follows_excitation(self):
+        sample = FluorophoreSample(np.zeros((10000, 3)))
+        dynamics = FluorophoreDynamics(on_rate=0, off_rate=0, bleach_rate=10.0)
+        excitation = np.where(np.arange(10000) < 5000, 10.0, 0.0).astype(np.float32)
+        rng = np.random.default_rng(2)
+        dynamics.step(sample, 1.0, excitation, rng)
+        self.assertTrue(np.all(sample.states[:5000] == sample.BLEACHED))
+        self.assertTrue(np.all(sample.states[5000:] == sample.ACTIVE))
+
+        dynamics.on_rate = 100.0
+        dynamics.step(sample, 1.0, excitation, rng)
+        self.assertTrue(np.all(sample.states[:5000] == sample.BLEACHED))
+
+    def test_diffusion_stays_above_coverslip(self):
+        sample = FluorophoreSample(np.zeros((10000, 3)))
+        FluorophoreDynamics(diffusion=1e4).step(sample, 0.5, rng=np.random.default_rng(3))
+        self.assertTrue(np.all(sample.positions[:, 2] >= 0))
+        # Mean squared lateral step of 2 D dt per axis
+        self.assertAlmostEqual(np.var(sample.positions[:, 0]) / 1e4, 1.0, delta=0.05)
+
+class TestMovie(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.output = os.path.join(self.tmpdir.name, 'movie')
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_streamed_movie_matches_frames(self):
+        dynamics = FluorophoreDynamics(on_rate=2.0, off_rate=2.0)
+        path = render_movie(build_microscope(), 10, self.output, dynamics, seed=7, chunk_frames=4)
+        movie = np.load(path)
+        self.assertEqual(movie.shape, (10, 32, 48))
+        self.assertEqual(movie.dtype, np.float32)
+
+        expected = [frame.copy() for frame in iter_movie(build_microscope(), 10, dynamics, seed=7)]
+        np.testing.assert_allclose(movie, np.array(expected), rtol=1e-5, atol=1e-6)
+        # Blinking changes the image from frame to frame
+        self.assertFalse(np.allclose(movie[0], movie[-1]))
+
+        with open(f"{self.output}_params.json") as f:
+            self.assertEqual(json.load(f)['frames'], 10)
+
+    def test_detector_frames(self):
+        microscope = build_microscope()
+        microscope.get_component(Camera).detector = DetectorModel(binning=2)
+        movie = np.load(render_movie(microscope, 3, self.output, seed=11))
+        self.assertEqual(movie.shape, (3, 16, 24))
+        self.assertEqual(movie.dtype, np.uint16)
+        # Noise is seeded per frame, so a frame can be regenerated on its own
+        frames = iter_movie(build_microscope(), 3, seed=11)
+        camera = microscope.get_component(Camera)
+        for index, image in enumerate(frames):
+            np.testing.assert_array_equal(camera.detector.apply(image, seed=11, frame=index), movie[index])
+
+    def test_movie_needs_sample(self):
+        microscope = build_microscope()
+        microscope.set_sample(None)
+        with self.assertRaises(ValueError):
+            render_movie(microscope, 2, self.output)
+        self.assertFalse(os.path.exists(self.output + '.npy'))
+
+    def test_failed_movie_is_removed(self):
+        class FailingDynamics(FluorophoreDynamics):
+            def step(self, *args):
+                raise RuntimeError("dynamics failed")
+
+        with self.assertRaises(RuntimeError):
+            render_movie(build_microscope(), 4, self.output, FailingDynamics())
+        self.assertFalse(os.path.exists(self.output + '.npy'))
+
+if __name__ == '__main__':
+    unittest.main()
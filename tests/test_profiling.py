@@ -0,0 +1,51 @@
+import os
+import pstats
+import tempfile
+import unittest
+import numpy as np
+from ..microscope.scene import build_microscope
+from ..simulation import SimulationEngine, SimulationWorker, FrameProfiler
+from .test_render import SCENE
+
+class TestFrameProfiler(unittest.TestCase):
+    def test_ring_buffer_keeps_latest_values(self):
+        profiler = FrameProfiler(capacity=10)
+        for value in range(25):
+            profiler.record('trace', value)
+        np.testing.assert_array_equal(profiler.values('trace'), np.arange(15, 25))
+        stats = profiler.stats('trace')
+        self.assertEqual(stats['count'], 10)
+        self.assertAlmostEqual(stats['p50'], 19.5)
+        self.assertAlmostEqual(stats['p99'], 23.91)
+        self.assertIsNone(profiler.stats('plot'))
+        self.assertEqual(list(profiler.summary()), ['trace'])
+
+    def test_capture_writes_pstats(self):
+        profiler = FrameProfiler()
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = os.path.join(tmpdir, 'frames.prof')
+            profiler.capture(2, path)
+            for _ in range(2):
+                self.assertFalse(os.path.exists(path))
+                profiler.begin_frame()
+                np.linalg.svd(np.ones((20, 20)))
+                profiler.end_frame()
+            functions = [name for _, _, name in pstats.Stats(path).stats]
+            self.assertIn('svd', functions)
+        self.assertEqual(profiler.stats('frame')['count'], 2)
+
+    def test_worker_records_stages(self):
+        engine = SimulationEngine(build_microscope(SCENE))
+        engine.start()
+        worker = SimulationWorker(engine)
+        for angle in [80, 85, 85, 90]:
+            worker.render({'angle_x': angle})
+        summary = engine.profiler.summary()
+        # The repeated snapshot traced nothing and is not counted
+        for name in ['trace', 'deposit', 'render', 'frame', 'rays', 'hits']:
+            self.assertEqual(summary[name]['count'], 3, name)
+        self.assertGreaterEqual(summary['hits']['p50'], 1)
+        self.assertIn('deposit', engine.profiler.format_summary())
+
+if __name__ == '__main__':
+    unittest.main()
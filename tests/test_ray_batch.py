@@ -0,0 +1,53 @@
+import unittest
+import numpy as np
+from ..optical_components import Mirror, Lens, BeamSplitter, Filter, Objective, Camera
+from ..optical_components.base import Ray, RayBatch
+
+class TestRayBatch(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        self.rays = [Ray(origin=rng.normal(size=3), direction=rng.normal(size=3),
+                         wavelength=450 + 10 * i, intensity=0.5)
+                     for i in range(8)]
+        self.batch = RayBatch.from_rays(self.rays)
+
+    def test_round_trip(self):
+        rays = self.batch.to_rays()
+        self.assertEqual(len(rays), len(self.rays))
+        for original, ray in zip(self.rays, rays):
+            np.testing.assert_array_almost_equal(ray.origin, original.origin)
+            np.testing.assert_array_almost_equal(ray.direction, original.direction)
+            self.assertEqual(ray.wavelength, original.wavelength)
+            self.assertEqual(ray.intensity, original.intensity)
+
+    def test_batch_matches_single_ray(self):
+        components = [
+            Mirror(position=(0, 0, 0), orientation=(1, 0, 1), size=(1, 1)),
+            Lens(position=(0, 0, 5), orientation=(0, 0, 1), focal_length=50, diameter=25),
+            BeamSplitter(position=(0, 0, 0), orientation=(1, 0, 1), split_ratio=0.5),
+            Filter(position=(0, 0, 0), orientation=(0, 0, 1), pass_band=(470, 500)),
+            Objective(position=(0, 0, 0), orientation=(0, 0, 1), magnification=60, numerical_aperture=1.49),
+        ]
+        for component in components:
+            batched = component.interact_with_light_batch(self.batch).to_rays()
+            single = [out for ray in self.rays for out in component.interact_with_light(ray)]
+            if isinstance(component, BeamSplitter):
+                # Batched output is all reflected rays followed by all transmitted rays
+                single = single[0::2] + single[1::2]
+            self.assertEqual(len(batched), len(single))
+            for a, b in zip(batched, single):
+                np.testing.assert_array_almost_equal(a.direction, b.direction)
+                self.assertEqual(a.wavelength, b.wavelength)
+
+    def test_camera_batch_intersection(self):
+        camera = Camera(position=(600, 500, 0), orientation=(-1, 0, 0), sensor_size=(100, 100))
+        batch = RayBatch(origins=np.tile([100.0, 520.0, 10.0], (3, 1)),
+                         directions=[[1, 0, 0], [-1, 0, 0], [0, 1, 0]],
+                         wavelengths=488, lengths=1500)
+        hit, pixel_x, pixel_y = camera.ray_intersection_batch(batch)
+        np.testing.assert_array_equal(hit, [True, False, False])
+        np.testing.assert_array_almost_equal([pixel_x[0], pixel_y[0]], [20, 10])
+        self.assertEqual(camera.ray_intersection(batch.to_rays()[0]), (pixel_x[0], pixel_y[0]))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from .. import render
+
+SCENE = {
+    'mode': 'TIRF',
+    'components': [
+        {'type': 'Laser', 'position': [100, 500, 0], 'orientation': [1, 0, 0], 'wavelength': 488, 'power': 100},
+        {'type': 'Objective', 'position': [300, 500, 0], 'orientation': [1, 0, 0],
+         'magnification': 60, 'numerical_aperture': 1.49},
+        {'type': 'Camera', 'position': [600, 500, 0], 'orientation': [-1, 0, 0], 'sensor_size': [64, 64]},
+    ],
+}
+
+class TestRender(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.scene_path = os.path.join(self.tmpdir.name, 'scene.json')
+        # Keep compiled scenes out of the user's own cache
+        environment = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': os.path.join(self.tmpdir.name, 'cache')})
+        environment.start()
+        self.addCleanup(environment.stop)
+        with open(self.scene_path, 'w') as f:
+            json.dump(SCENE, f)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_parse_values(self):
+        self.assertEqual(render.parse_values('1,2.5'), [1.0, 2.5])
+        self.assertEqual(render.parse_values('0:10:3'), [0.0, 5.0, 10.0])
+
+    def test_sweep_writes_stack(self):
+        output = os.path.join(self.tmpdir.name, 'sweep')
+        for source, shape in [('camera', (64, 64)), ('light-table', (100, 100))]:
+            render.main(['--scene', self.scene_path, '--angle-x', '80,90', '--power', '10,50,100',
+                         '--source', source, '--output', output])
+            stack = np.load(output + '.npy')
+            self.assertEqual(stack.shape, (6,) + shape)
+            with open(output + '_params.json') as f:
+                frames = json.load(f)['frames']
+            self.assertEqual(frames[4], {'angle_x': 90.0, 'angle_y': 0.0, 'power': 50.0})
+
+        # At angle_x = 90 degrees the beam points straight at the camera
+        self.assertTrue(np.load(output + '.npy')[3:].any())
+
+    def test_does_not_import_gui(self):
+        # In a fresh interpreter, since other tests may import the gui package
+        package = render.__name__.rsplit('.', 1)[0]
+        root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        code = f"import sys, {render.__name__}; print('{package}.gui' in sys.modules)"
+        output = subprocess.run([sys.executable, '-c', code], env=dict(os.environ, PYTHONPATH=root),
+                                capture_output=True, text=True, check=True).stdout
+        self.assertEqual(output.strip(), 'False')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+import numpy as np
+from ..microscope import Microscope
+from ..optical_components import Laser, Objective, Camera
+from ..sample import (FluorophoreSample, critical_angle, penetration_depth, interface_intensity, TIRFTable,
+                      get_tirf_table)
+
+class TestEvanescentField(unittest.TestCase):
+    def test_penetration_depth(self):
+        theta_c = critical_angle(1.518, 1.33)
+        self.assertTrue(np.isinf(penetration_depth(theta_c - 0.01, 488)))
+        # lambda / (4 pi sqrt(n1^2 sin^2 theta - n2^2)) at 70 degrees
+        self.assertAlmostEqual(float(penetration_depth(np.radians(70), 488)), 75.3, delta=0.2)
+        depths = penetration_depth(np.radians([65, 70, 75]), 488)
+        self.assertTrue(np.all(np.diff(depths) < 0))
+
+    def test_interface_intensity_continuous_at_critical_angle(self):
+        theta_c = critical_angle(1.518, 1.33)
+        below, above = interface_intensity([theta_c - 1e-9, theta_c + 1e-9])
+        self.assertAlmostEqual(below, above, delta=1e-2)
+        self.assertAlmostEqual(float(interface_intensity(np.pi / 2)), 0)
+
+class TestTIRFTable(unittest.TestCase):
+    def test_lookup_matches_analytic(self):
+        table = TIRFTable(561, 1.518, 1.38)
+        theta = np.linspace(0, np.pi / 2, 100001)
+        profile = table.lookup(theta)
+        np.testing.assert_allclose(profile.depth, penetration_depth(theta, 561, 1.518, 1.38), rtol=1e-12)
+        np.testing.assert_allclose(profile.intensity, interface_intensity(theta, 1.518, 1.38), atol=1e-5)
+        np.testing.assert_array_equal(profile.total_reflection, theta > critical_angle(1.518, 1.38))
+        self.assertTrue(profile.in_aperture.all())
+
+        # Scalars in, scalars out
+        depth, intensity, total, _ = table.lookup(np.radians(70))
+        self.assertEqual(np.shape(depth), ())
+        self.assertTrue(total)
+
+    def test_objective_aperture_and_sharing(self):
+        table = get_tirf_table(488, numerical_aperture=1.45)
+        self.assertIs(get_tirf_table(488, numerical_aperture=1.45), table)
+        self.assertIsNot(get_tirf_table(488, numerical_aperture=1.49), table)
+        theta = np.radians([70, 75])  # Within and beyond arcsin(1.45 / 1.518) = 72.8 degrees
+        profile = table.lookup(theta)
+        np.testing.assert_array_equal(profile.in_aperture, [True, False])
+        self.assertEqual(profile.intensity[1], 0)
+        self.assertGreater(profile.intensity[0], 0)
+        with self.assertRaises(ValueError):
+            TIRFTable(488, 1.33, 1.518)
+
+class TestFluorophoreSample(unittest.TestCase):
+    def test_excitation_decays_with_height(self):
+        sample = FluorophoreSample([[0, 0, 0], [0, 0, 100], [0, 0, 0]],
+                                   states=[1, 1, FluorophoreSample.BLEACHED])
+        theta = np.radians(70)
+        excitation = sample.excitation(theta, 488)
+        depth = penetration_depth(theta, 488)
+        self.assertAlmostEqual(excitation[1] / excitation[0], np.exp(-100 / depth), places=5)
+        self.assertEqual(excitation[2], 0)
+
+        # Below the critical angle the whole sample is lit
+        excitation = sample.excitation(0.0, 488)
+        self.assertAlmostEqual(excitation[0], excitation[1])
+
+class TestSampleRendering(unittest.TestCase):
+    def setUp(self):
+        self.microscope = Microscope()
+        self.laser = Laser(position=(0, 0, 0), orientation=(0, 0, 1), wavelength=488, power=1)
+        self.camera = Camera(position=(0, 0, 100), orientation=(0, 0, -1), sensor_size=(64, 64))
+        self.microscope.add_component(self.laser)
+        self.microscope.add_component(Objective(position=(0, 0, 10), orientation=(0, 0, 1),
+                                                magnification=100, numerical_aperture=1.49))
+        self.microscope.add_component(self.camera)
+        self.microscope.set_sample(FluorophoreSample([[0, 0, 50], [1600, 0, 1000]]))
+
+    def test_epifluorescence_lights_whole_sample(self):
+        self.microscope.set_mode("Epifluorescence")
+        self.laser.set_angles(np.radians(70), 0)
+        image = self.microscope.render_sample()
+        excitation = self.microscope.get_sample_excitation()
+        self.assertAlmostEqual(image.sum(), excitation.sum(), places=3)
+        # 160 nm pixels, centred on the optical axis
+        self.assertEqual(np.unravel_index(np.argmax(image), image.shape), (32, 32))
+        self.assertGreater(image[32, 42], 0.5 * image[32, 32])
+
+    def test_tirf_excites_only_near_coverslip(self):
+        self.laser.set_angles(np.radians(70), 0)
+        image = self.microscope.render_sample()
+        self.assertGreater(image[32, 32], 0)
+        self.assertEqual(image[32, 42], 0)
+
+    def test_excitation_profile_follows_laser(self):
+        self.laser.set_angles(np.radians(70), 0)
+        profile = self.microscope.get_excitation_profile()
+        self.assertAlmostEqual(float(profile.depth), float(penetration_depth(np.radians(70), 488)))
+        excitation = self.microscope.get_sample_excitation()
+        self.assertAlmostEqual(excitation[0] / float(profile.intensity), np.exp(-50 / profile.depth), places=5)
+        self.assertFalse(self.microscope.get_excitation_profile(np.radians(80)).in_aperture)
+
+    def test_beam_beyond_numerical_aperture_is_blocked(self):
+        self.laser.set_angles(np.radians(80), 0)
+        self.assertEqual(self.microscope.render_sample().sum(), 0)
@@ -0,0 +1,144 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+try:
+    import yaml
+except ImportError:
+    yaml = None
+from ..microscope import (Microscope, load_scene, save_scene, read_scene_file, build_microscope,
+                          validate_scene, scene_from_microscope)
+from ..microscope import scene as scene_module
+from ..optical_components import (Laser, Mirror, Lens, BeamSplitter, Filter, Objective, Camera,
+                                  DetectorModel, TransmissionCurve)
+
+def build_full_microscope():
+    microscope = Microscope()
+    microscope.set_mode("Epifluorescence")
+    laser = Laser(position=(0, 0, 0), orientation=(1, 0, 0), wavelength=561, power=20)
+    laser.set_angles(np.radians(10), np.radians(-5))
+    camera = Camera(position=(900, 0, 0), orientation=(-1, 0, 0), sensor_size=(32, 48), dtype=np.uint16)
+    camera.accumulate_mode = 'add'
+    camera.detector = DetectorModel(em_gain=300, binning=2)
+    for component in [laser,
+                      Mirror(position=(100, 0, 0), orientation=(1, 1, 0), size=(20, 20, 1)),
+                      Lens(position=(200, 0, 0), orientation=(1, 0, 0), focal_length=50, diameter=25),
+                      BeamSplitter(position=(300, 0, 0), orientation=(1, 0, 1), split_ratio=0.3),
+                      Filter(position=(400, 0, 0), orientation=(1, 0, 0), pass_band=(500, 600),
+                             transmission=TransmissionCurve.band_pass(500, 600, peak=0.9)),
+                      Objective(position=(500, 0, 0), orientation=(1, 0, 0), magnification=100,
+                                numerical_aperture=1.49, immersion_index=1.52),
+                      camera]:
+        microscope.add_component(component)
+    microscope.components[2].turn_off()
+    return microscope
+
+class TestSceneFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        # Compiled scenes go to the per-user cache, here inside the test directory
+        environment = mock.patch.dict(os.environ, {'XDG_CACHE_HOME': self.path('cache')})
+        environment.start()
+        self.addCleanup(environment.stop)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_round_trip_all_formats(self):
+        expected = scene_from_microscope(build_full_microscope())
+        for name in ['bench.json', 'bench.toml'] + (['bench.yaml'] if yaml else []):
+            save_scene(build_full_microscope(), self.path(name))
+            self.assertEqual(read_scene_file(self.path(name), cache_dir=False), expected, name)
+            microscope = load_scene(self.path(name))
+            self.assertEqual(len(microscope.components), 7)
+
+        camera = microscope.components[-1]
+        self.assertEqual(camera.image.dtype, np.uint16)
+        self.assertEqual(camera.detector.em_gain, 300)
+        self.assertAlmostEqual(microscope.components[0].angle_x, np.radians(10))
+        self.assertFalse(microscope.components[2].is_on)
+        self.assertEqual(microscope.components[4].transmission, TransmissionCurve.band_pass(500, 600, peak=0.9))
+        self.assertIsNone(microscope.components[3].reflection)
+
+    def test_validation_reports_every_problem(self):
+        scene = {'mode': 'Confocal', 'components': [
+            {'type': 'Laser', 'position': [0, 0], 'orientation': [1, 0, 0], 'wavelength': 488},
+            {'type': 'Lens', 'position': [0, 0, 0], 'orientation': [1, 0, 0], 'focal_length': 50,
+             'diameter': 25, 'colour': 'red'},
+            {'type': 'Prism'},
+        ]}
+        with self.assertRaises(ValueError) as context:
+            validate_scene(scene)
+        message = str(context.exception)
+        for problem in ['mode', 'components[0].position', 'components[0].power: missing',
+                        'components[1].colour', 'components[2].type']:
+            self.assertIn(problem, message)
+
+        save_path = self.path('bad.json')
+        with self.assertRaises(ValueError):
+            save_scene(scene, save_path)
+        self.assertFalse(os.path.exists(save_path))
+
+    def test_compiled_cache_follows_file_contents(self):
+        path = self.path('bench.json')
+        save_scene(build_full_microscope(), path)
+        scene = read_scene_file(path)
+        cache_dir = scene_module.default_cache_dir()
+        cached = os.listdir(cache_dir)
+        self.assertEqual(len(cached), 1)
+        self.assertEqual(read_scene_file(path), scene)
+
+        microscope = build_microscope(scene)
+        microscope.set_mode("TIRF")
+        save_scene(microscope, path)
+        self.assertEqual(read_scene_file(path)['mode'], 'TIRF')
+        self.assertEqual(read_scene_file(path, cache_dir=False)['mode'], 'TIRF')
+        # The earlier compiled version is replaced
+        self.assertEqual(len(os.listdir(cache_dir)), 1)
+        self.assertNotEqual(os.listdir(cache_dir), cached)
+
+    def test_compiled_cache_follows_package_code(self):
+        path = self.path('bench.json')
+        save_scene(build_full_microscope(), path)
+        load_scene(path)
+        cache_dir = scene_module.default_cache_dir()
+        cached = os.listdir(cache_dir)
+        # Changed component classes must not load pickles made by the old ones
+        with mock.patch.object(scene_module, 'code_digest', return_value='changed'), \
+                mock.patch.object(scene_module, 'build_microscope', wraps=build_microscope) as build:
+            microscope = load_scene(path)
+        build.assert_called_once()
+        self.assertNotEqual(os.listdir(cache_dir), cached)
+        self.assertEqual(len(microscope.components), len(build_full_microscope().components))
+
+    def test_compiled_cache_is_private(self):
+        path = self.path('bench.json')
+        save_scene(build_full_microscope(), path)
+        load_scene(path)
+        # Nothing is written next to the scene file
+        self.assertEqual(sorted(os.listdir(self.tmpdir.name)), ['bench.json', 'cache'])
+        cache_dir = scene_module.default_cache_dir()
+        self.assertEqual(os.path.dirname(cache_dir), self.path(os.path.join('cache', 'tirf_sim')))
+        if os.name != 'posix':
+            return
+        self.assertEqual(os.stat(cache_dir).st_mode & 0o077, 0)
+        (name,) = os.listdir(cache_dir)
+        self.assertEqual(os.stat(os.path.join(cache_dir, name)).st_mode & 0o077, 0)
+
+        # A compiled file others could have written is not unpickled
+        os.chmod(os.path.join(cache_dir, name), 0o666)
+        with mock.patch.object(scene_module.pickle, 'load') as unpickle:
+            self.assertIsNone(scene_module.read_compiled_scene(os.path.join(cache_dir, name), True))
+        unpickle.assert_not_called()
+        with mock.patch.object(scene_module, 'build_microscope', wraps=build_microscope) as build:
+            load_scene(path)
+        build.assert_called_once()
+        # It is replaced by a private one
+        self.assertEqual(os.stat(os.path.join(cache_dir, name)).st_mode & 0o077, 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from ..optical_components import (Laser, Mirror, BeamSplitter, Filter, Camera, RayBatch,
+                                  TransmissionCurve)
+from ..simulation.light_table import LightTable
+
+LINES = [405, 488, 561, 640]
+
+class TestTransmissionCurve(unittest.TestCase):
+    def test_matches_linear_interpolation(self):
+        curve = TransmissionCurve([400, 450, 520, 600], [0.0, 0.9, 0.9, 0.1])
+        wavelengths = np.random.default_rng(0).uniform(300, 700, 10000)
+        np.testing.assert_allclose(curve(wavelengths), np.interp(wavelengths, curve.wavelengths, curve.values),
+                                   atol=1e-9)
+        self.assertEqual(TransmissionCurve.as_curve(curve.to_table()), curve)
+
+    def test_rejects_bad_tables(self):
+        for table in [([400], [1]), ([500, 400], [0, 1]), ([400, 500], [0, 1.5]), ([400, 500], [0])]:
+            with self.assertRaises(ValueError):
+                TransmissionCurve(*table)
+
+    def test_filter_scales_intensity(self):
+        rays = RayBatch(np.zeros((4, 3)), (1, 0, 0), LINES, intensities=0.5)
+        band = Filter(position=(0, 0, 0), orientation=(1, 0, 0), pass_band=(0, 0),
+                      transmission=TransmissionCurve.band_pass(470, 600, peak=0.8))
+        passed = band.interact_with_light_batch(rays)
+        np.testing.assert_array_equal(passed.wavelengths, [488, 561])
+        np.testing.assert_allclose(passed.intensities, [0.4, 0.4])
+
+    def test_beam_splitter_conserves_intensity(self):
+        rays = RayBatch(np.zeros((1, 3)), (1, 0, 0), 488).with_spectrum(LINES, [1, 2, 3, 4])
+        np.testing.assert_array_equal(rays.intensities, [1, 2, 3, 4])
+        splitter = BeamSplitter(position=(0, 0, 0), orientation=(1, 0, 1), split_ratio=0.3)
+        out = splitter.interact_with_light_batch(rays)
+        np.testing.assert_allclose(out.intensities, [0.3, 0.6, 0.9, 1.2, 0.7, 1.4, 2.1, 2.8])
+
+        # A dichroic reflects the short wavelengths and passes the rest, with no empty branches
+        splitter.reflection = TransmissionCurve.short_pass(520)
+        out = splitter.interact_with_light_batch(rays)
+        np.testing.assert_array_equal(out.wavelengths, LINES)
+        np.testing.assert_array_almost_equal(out.directions[:2], [[0, 0, 1]] * 2)
+        np.testing.assert_array_almost_equal(out.directions[2:], [[1, 0, 0]] * 2)
+
+    def test_four_lasers_four_channels(self):
+        # Lasers emit along +z; dichroics at z = 100, 200, 300 and a mirror at
+        # z = 400 send each line along +x onto its own camera
+        light_table = LightTable()
+        for wavelength in LINES:
+            light_table.add_component(Laser(position=(0, 0, 0), orientation=(0, 0, 1),
+                                             wavelength=wavelength, power=100))
+        cameras = []
+        for z, cut_off in zip([100, 200, 300], [450, 520, 600]):
+            light_table.add_component(BeamSplitter(position=(0, 0, z), orientation=(1, 0, 1), split_ratio=0,
+                                                   reflection=TransmissionCurve.short_pass(cut_off)))
+        light_table.add_component(Mirror(position=(0, 0, 400), orientation=(1, 0, 1), size=(20, 20)))
+        for z in [100, 200, 300, 400]:
+            cameras.append(Camera(position=(100, -50, z - 50), orientation=(-1, 0, 0), sensor_size=(100, 100)))
+            light_table.add_component(cameras[-1])
+        # Emission filter in front of the 561 channel transmits 60%
+        light_table.add_component(Filter(position=(50, 0, 300), orientation=(1, 0, 0), pass_band=(0, 0),
+                                         transmission=TransmissionCurve.band_pass(550, 600, peak=0.6)))
+
+        self.assertTrue(light_table.simulate_light_path())
+        self.assertEqual(light_table.tracer.levels[0].rays.wavelengths.tolist(), LINES)
+        peaks = [camera.image[50, 50] for camera in cameras]
+        np.testing.assert_allclose(peaks, [255, 255, 0.6 * 255, 255], rtol=1e-5)
+        for camera in cameras:
+            self.assertAlmostEqual(camera.image.max(), camera.image[50, 50])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from ..simulation.sweep import parameter_grid, run_sweep, apply_parameters
+from ..microscope.scene import build_microscope
+from .test_render import SCENE
+
+class TestSweep(unittest.TestCase):
+    def test_parameter_grid_order(self):
+        grid = parameter_grid(angle_x=[0, 10], power=[1, 2, 3])
+        self.assertEqual(len(grid), 6)
+        self.assertEqual(grid[1], {'angle_x': 0, 'power': 2})
+        self.assertEqual(grid[3], {'angle_x': 10, 'power': 1})
+
+    def test_apply_component_setting(self):
+        microscope = build_microscope(SCENE)
+        apply_parameters(microscope, {'angle_x': 90, 'Objective.numerical_aperture': 1.2})
+        self.assertAlmostEqual(microscope.components[0].angle_x, np.pi / 2)
+        self.assertEqual(microscope.components[1].numerical_aperture, 1.2)
+        with self.assertRaises(ValueError):
+            apply_parameters(microscope, {'Mirror.size': 3})
+
+    def test_parallel_matches_serial(self):
+        grid = parameter_grid(angle_x=[80, 85, 90], angle_y=[0, 2])
+        serial = list(run_sweep(SCENE, grid, workers=1))
+        parallel = list(run_sweep(SCENE, grid, workers=2))
+        self.assertEqual([r.index for r in parallel], list(range(len(grid))))
+        for a, b in zip(serial, parallel):
+            self.assertEqual(a.params, b.params)
+            np.testing.assert_array_equal(a.image, b.image)
+            self.assertGreaterEqual(b.elapsed, 0)
+
+    def test_microscope_scene(self):
+        grid = parameter_grid(angle_x=[80, 90])
+        microscope = build_microscope(SCENE)
+        version = microscope.components[0].version
+        expected = list(run_sweep(SCENE, grid, workers=1))
+        for workers in [1, 2]:
+            for a, b in zip(expected, run_sweep(microscope, grid, workers=workers)):
+                np.testing.assert_array_equal(a.image, b.image)
+        # The workers change copies, not the caller's microscope
+        self.assertEqual(microscope.components[0].version, version)
+
+    def test_output_stack(self):
+        grid = parameter_grid(angle_x=[80, 85, 90], angle_y=[0, 2])
+        expected = list(run_sweep(SCENE, grid, workers=1))
+        with tempfile.TemporaryDirectory() as directory:
+            for workers in [1, 2]:
+                path = os.path.join(directory, f'sweep{workers}.npy')
+                results = list(run_sweep(SCENE, grid, workers=workers, output=path))
+                # Each result's image is its row of the stack written by the workers
+                for a, b in zip(expected, results):
+                    self.assertIsInstance(b.image, np.memmap)
+                    np.testing.assert_array_equal(a.image, b.image)
+                np.testing.assert_array_equal(np.load(path), [r.image for r in expected])
+                del results
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+import numpy as np
+from ..microscope import Microscope
+from ..microscope.tracer import SequentialTracer
+from ..optical_components import BeamSplitter, Camera, Filter, Mirror, Ray, RayBatch
+
+class TestSequentialTracer(unittest.TestCase):
+    def setUp(self):
+        self.ray = Ray(origin=(0, 0, 0), direction=(1, 0, 0), wavelength=488)
+
+    def test_beam_splitter_branches(self):
+        microscope = Microscope()
+        camera = Camera(position=(300, -50, -50), orientation=(-1, 0, 0), sensor_size=(100, 100))
+        microscope.add_component(camera)
+        microscope.add_component(BeamSplitter(position=(100, 0, 0), orientation=(1, 0, 1), split_ratio=0.5))
+
+        segments = microscope.simulate_light_path(self.ray)
+        self.assertEqual(len(segments), 3)
+        self.assertAlmostEqual(segments[0].length, 100)
+        directions = np.array([segment.direction for segment in segments[1:]])
+        np.testing.assert_array_almost_equal(directions, [[0, 0, 1], [1, 0, 0]])
+        self.assertAlmostEqual(segments[2].length, 200)
+        # split_ratio 0.5 sends half the intensity along each branch
+        self.assertAlmostEqual(camera.image[50, 50], 127.5, places=4)
+
+    def test_misses_component_outside_aperture(self):
+        microscope = Microscope()
+        microscope.add_component(Filter(position=(100, 50, 0), orientation=(1, 0, 0), pass_band=(600, 700)))
+        segments = microscope.simulate_light_path(self.ray)
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0].length, self.ray.length)
+
+    def test_nearest_component_first(self):
+        microscope = Microscope()
+        microscope.add_component(Mirror(position=(200, 0, 0), orientation=(1, 0, 1), size=(20, 20)))
+        microscope.add_component(Filter(position=(100, 0, 0), orientation=(1, 0, 0), pass_band=(600, 700)))
+        segments = microscope.simulate_light_path(self.ray)
+        self.assertEqual(len(segments), 1)
+        self.assertAlmostEqual(segments[0].length, 100)
+
+    def test_bvh_matches_brute_force(self):
+        rng = np.random.default_rng(1)
+        components = [Filter(position=rng.uniform(0, 1000, 3), orientation=rng.normal(size=3),
+                             pass_band=(400, 700)) for _ in range(100)]
+        batch = RayBatch(origins=rng.uniform(0, 1000, (500, 3)), directions=rng.normal(size=(500, 3)),
+                         wavelengths=488, lengths=2000)
+        results = []
+        for use_bvh in [True, False]:
+            tracer = SequentialTracer(use_bvh=use_bvh)
+            tracer.update_index(components)
+            results.append(tracer.nearest_hits(batch))
+        self.assertTrue((results[0][1] >= 0).any())
+        np.testing.assert_array_equal(results[0][1], results[1][1])
+        np.testing.assert_array_equal(results[0][0], results[1][0])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import threading
+import time
+import unittest
+import numpy as np
+from ..microscope.scene import build_microscope
+from ..simulation import SimulationEngine, SimulationWorker
+from .test_render import SCENE
+
+class TestSimulationWorker(unittest.TestCase):
+    def setUp(self):
+        self.engine = SimulationEngine(build_microscope(SCENE))
+        self.engine.start()
+        self.frame_ready = threading.Event()
+        self.worker = SimulationWorker(self.engine, on_frame=self.frame_ready.set)
+        self.worker.start()
+
+    def tearDown(self):
+        self.worker.stop(timeout=5)
+
+    def slow_down(self, seconds):
+        simulate = self.engine.light_table.simulate_light_path
+
+        def slow_simulate():
+            time.sleep(seconds)
+            return simulate()
+        self.engine.light_table.simulate_light_path = slow_simulate
+
+    def test_submit_does_not_block_and_keeps_latest(self):
+        self.slow_down(0.5)
+        start = time.perf_counter()
+        for angle in range(80, 91):
+            self.worker.submit({'angle_x': angle})
+        self.assertLess(time.perf_counter() - start, 0.1)
+
+        deadline = time.time() + 5
+        frame = None
+        while time.time() < deadline:
+            self.frame_ready.wait(1)
+            self.frame_ready.clear()
+            frame = self.worker.latest_frame() or frame
+            if frame is not None and frame.params['angle_x'] == 90:
+                break
+        self.assertEqual(frame.params['angle_x'], 90)
+        # Intermediate snapshots were skipped rather than queued
+        self.assertLessEqual(self.worker.sequence, 2)
+        self.assertTrue(frame.image.any())
+
+    def test_bounded_queue_drops_stale_frames(self):
+        for angle in [80, 85, 90, 89]:
+            self.frame_ready.clear()
+            self.worker.submit({'angle_x': angle})
+            self.assertTrue(self.frame_ready.wait(5))
+        self.assertEqual(len(self.worker.frames), 2)
+        self.assertEqual(self.worker.dropped_frames, 2)
+        self.assertEqual(self.worker.latest_frame().params['angle_x'], 89)
+        self.assertIsNone(self.worker.latest_frame())
+
+    def test_released_buffers_are_reused(self):
+        images = []
+        for angle in [80, 85, 90]:
+            self.frame_ready.clear()
+            self.worker.submit({'angle_x': angle})
+            self.assertTrue(self.frame_ready.wait(5))
+            frame = self.worker.latest_frame()
+            images.append(frame.image)
+            self.worker.release(frame)
+        self.assertEqual(images[0].dtype, np.uint8)
+        self.assertIs(images[1], images[0])
+        self.assertIs(images[2], images[0])
+
+    def test_unchanged_snapshot_gives_no_frame(self):
+        self.worker.submit({'angle_x': 90})
+        self.assertTrue(self.frame_ready.wait(5))
+        self.frame_ready.clear()
+        self.worker.submit({'angle_x': 90})
+        self.assertFalse(self.frame_ready.wait(0.3))
+        self.assertEqual(self.worker.sequence, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,3 @@
-from .vector_math import normalize, reflect
+from .vector_math import normalize, reflect, normalize_rows, reflect_rows, ray_plane_intersection
 
-__all__ = ['normalize', 'reflect']
+__all__ = ['normalize', 'reflect', 'normalize_rows', 'reflect_rows', 'ray_plane_intersection']
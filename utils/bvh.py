@@ -0,0 +1,83 @@
+import numpy as np
+
+class BVH:
+    """Bounding-volume hierarchy over axis-aligned boxes.
+
+    Built top-down by splitting at the median centroid along the longest
+    axis. Traversal is batched: each node is tested against all rays that
+    reached it in one vectorized slab test.
+    """
+
+    def __init__(self, lower, upper, leaf_size=4):
+        self.lower = np.asarray(lower, dtype=float).reshape(-1, 3)
+        self.upper = np.asarray(upper, dtype=float).reshape(-1, 3)
+        self.leaf_size = leaf_size
+
+        # Flattened nodes: bounds, children (-1 for leaves) and item ranges
+        self.node_lower = []
+        self.node_upper = []
+        self.children = []
+        self.split_axes = []
+        self.item_ranges = []
+        self.items = np.arange(len(self.lower))
+        if len(self.items):
+            self.build(0, len(self.items))
+        self.node_lower = np.array(self.node_lower).reshape(-1, 3)
+        self.node_upper = np.array(self.node_upper).reshape(-1, 3)
+
+    def build(self, start, end):
+        node = len(self.children)
+        items = self.items[start:end]
+        self.node_lower.append(self.lower[items].min(axis=0))
+        self.node_upper.append(self.upper[items].max(axis=0))
+        self.children.append((-1, -1))
+        self.split_axes.append(0)
+        self.item_ranges.append((start, end))
+
+        if end - start > self.leaf_size:
+            centroids = (self.lower[items] + self.upper[items]) / 2
+            axis = np.argmax(np.ptp(centroids, axis=0))
+            self.items[start:end] = items[np.argsort(centroids[:, axis], kind='stable')]
+            middle = (start + end) // 2
+            left = self.build(start, middle)
+            right = self.build(middle, end)
+            self.children[node] = (left, right)
+            self.split_axes[node] = axis
+        return node
+
+    def traverse(self, origins, directions, max_t, visit_leaf):
+        """Call visit_leaf(items, ray_indices) for every leaf a ray may hit.
+
+        max_t holds the nearest hit found so far for each ray and may be
+        lowered by visit_leaf to prune the rest of the traversal.
+        """
+        if not len(self.children) or not len(origins):
+            return
+        with np.errstate(divide='ignore', invalid='ignore'):
+            inverse_directions = 1 / directions
+
+        stack = [(0, np.arange(len(origins)))]
+        while stack:
+            node, rays = stack.pop()
+            with np.errstate(invalid='ignore'):
+                t0 = (self.node_lower[node] - origins[rays]) * inverse_directions[rays]
+                t1 = (self.node_upper[node] - origins[rays]) * inverse_directions[rays]
+            # A ray parallel to a slab gives +-inf, or nan when its origin lies
+            # on the slab boundary, which counts as inside and is ignored
+            t_near = np.nanmax(np.minimum(t0, t1), axis=1)
+            t_far = np.nanmin(np.maximum(t0, t1), axis=1)
+            rays = rays[(t_far >= np.maximum(t_near, 0)) & (t_near <= max_t[rays])]
+            if not len(rays):
+                continue
+
+            left, right = self.children[node]
+            if left < 0:
+                start, end = self.item_ranges[node]
+                visit_leaf(self.items[start:end], rays)
+            else:
+                # Visit the child nearer to most rays first so hits found
+                # there prune the other one
+                if np.sum(directions[rays, self.split_axes[node]]) < 0:
+                    left, right = right, left
+                stack.append((right, rays))
+                stack.append((left, rays))
@@ -5,3 +5,19 @@ def normalize(v):
 
 def reflect(v, normal):
     return v - 2 * np.dot(v, normal) * normal
+
+def normalize_rows(v):
+    # Row-wise normalize for (N, 3) arrays
+    return v / np.linalg.norm(v, axis=1, keepdims=True)
+
+def reflect_rows(v, normal):
+    # Reflect every row of an (N, 3) array about a single normal
+    return v - 2 * (v @ normal)[:, np.newaxis] * normal
+
+def ray_plane_intersection(origins, directions, point, normal):
+    # Distance along each ray to the plane, np.inf where the ray is parallel
+    denominators = directions @ normal
+    crossing = np.abs(denominators) > 1e-6
+    t = np.full(len(origins), np.inf)
+    t[crossing] = ((point - origins[crossing]) @ normal) / denominators[crossing]
+    return t